@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Load testing for the FlowSpace API
+Replays the backend_test.py / backend_smtp_test.py flows (boards, cards,
+activity, invite -> accept) from many concurrent async clients and reports
+throughput and p50/p95/p99 latency per endpoint
+
+Runs on one box: users and boards are seeded straight into the local mongod
+and invite mail goes to a built-in SMTP sink. Start the backend with the
+sink as its mail server so invites never leave the machine:
+  SMTP_HOST=127.0.0.1 SMTP_PORT=2525 <usual backend command>
+
+Every worker calls from 127.0.0.1, which the proxy's rate limiter treats as
+one client. Start the proxy with its limiter off (PROXY_UNLIMITED_ENV):
+  PROXY_RATE_LIMIT=0 SMTP_HOST=127.0.0.1 SMTP_PORT=2525 <usual backend command>
+or load Node directly with --base-url http://localhost:8002. Any 429s are
+reported in their own column and left out of the latency and req/s figures.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from flowspace_client import (
+    BACKEND_URL, MONGO_URL, PROXY_UNLIMITED_ENV, ApiResponse, AsyncFlowSpaceClient, Colors,
+    generate_jwt_token, print_endpoint_table,
+)
+
+class SMTPSink:
+    """Minimal SMTP server that accepts and discards every message.
+
+    Speaks just enough of RFC 5321 for nodemailer (EHLO, MAIL, RCPT, DATA,
+    RSET, NOOP, QUIT) and counts messages so mail throughput can be reported.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.messages = 0
+        self.bytes = 0
+        self.first_message: Optional[float] = None
+        self.last_message: Optional[float] = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._session, self.host, self.port)
+
+    def reset(self):
+        self.messages = 0
+        self.bytes = 0
+        self.first_message = None
+        self.last_message = None
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        try:
+            await reply('220 flowspace-sink ESMTP')
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode('latin-1').strip().upper()
+                if command.startswith(('EHLO', 'HELO')):
+                    await reply('250-flowspace-sink')
+                    await reply('250 8BITMIME')
+                elif command.startswith('DATA'):
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    size = 0
+                    while True:
+                        data = await reader.readline()
+                        if not data or data in (b'.\r\n', b'.\n'):
+                            break
+                        size += len(data)
+                    self.messages += 1
+                    self.bytes += size
+                    now = time.perf_counter()
+                    self.first_message = self.first_message or now
+                    self.last_message = now
+                    await reply('250 OK queued')
+                elif command.startswith('QUIT'):
+                    await reply('221 Bye')
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP and anything else
+                    await reply('250 OK')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def stats(self) -> Dict:
+        span = (self.last_message - self.first_message) if self.messages > 1 else 0.0
+        return {
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'messages_per_second': round((self.messages - 1) / span, 1) if span else None,
+        }
+
+class LoadFixtures:
+    """Users, boards and tokens seeded directly into MongoDB for one run.
+
+    Everything is tagged with the run id so concurrent runs do not collide
+    and cleanup only removes what this run created.
+    """
+
+    def __init__(self, mongo_url: str, run_id: str):
+        from pymongo import MongoClient
+        self.client = MongoClient(mongo_url)
+        self.db = self.client.get_default_database('flowspace')
+        self.run_id = run_id
+        self.users: List[Dict] = []
+        self.boards: List[Dict] = []
+
+    def seed(self, users: int, boards_per_user: int):
+        from bson import ObjectId
+        now = datetime.utcnow()
+        user_docs = [{
+            '_id': ObjectId(),
+            'name': f'Load User {i}',
+            'email': f'load-{self.run_id}-{i}@flowspace.test',
+            'password': 'load123',
+            'avatarUrl': f'https://api.dicebear.com/7.x/avataaars/svg?seed=load{i}',
+            'createdAt': now,
+            'updatedAt': now,
+        } for i in range(users)]
+        self.db.users.insert_many(user_docs)
+
+        board_docs = []
+        for user in user_docs:
+            for b in range(boards_per_user):
+                columns = [{'_id': ObjectId(), 'title': title, 'order': order}
+                           for order, title in enumerate(('To Do', 'In Progress', 'Done'))]
+                board_docs.append({
+                    '_id': ObjectId(),
+                    'title': f'Load Board {b} ({user["name"]})',
+                    'description': f'load test {self.run_id}',
+                    'ownerId': user['_id'],
+                    'members': [{'userId': user['_id'], 'role': 'owner'}],
+                    'columns': columns,
+                    'createdAt': now,
+                    'updatedAt': now,
+                })
+        if board_docs:
+            self.db.boards.insert_many(board_docs)
+
+        self.users = [{'id': str(u['_id']), 'email': u['email'], 'token': generate_jwt_token(str(u['_id']))}
+                      for u in user_docs]
+        by_owner: Dict[str, List[Dict]] = {}
+        for board in board_docs:
+            entry = {'id': str(board['_id']), 'column_id': str(board['columns'][0]['_id']), 'cards': []}
+            self.boards.append(entry)
+            by_owner.setdefault(str(board['ownerId']), []).append(entry)
+        for user in self.users:
+            user['boards'] = by_owner.get(user['id'], [])
+
+    def cleanup(self):
+        from bson import ObjectId
+        board_ids = [ObjectId(b['id']) for b in self.boards]
+        user_ids = [ObjectId(u['id']) for u in self.users]
+        self.db.invites.delete_many({'boardId': {'$in': board_ids}})
+        self.db.cards.delete_many({'boardId': {'$in': board_ids}})
+        self.db.activities.delete_many({'userId': {'$in': user_ids}})
+        self.db.boards.delete_many({'_id': {'$in': board_ids}})
+        self.db.users.delete_many({'_id': {'$in': user_ids}})
+        self.client.close()
+
+class FlowSpaceLoadTester:
+    """Runs weighted scenarios from concurrent workers over one pooled client"""
+
+    # Scenario weights, roughly a read-heavy board session
+    SCENARIOS = {
+        'list_boards': 15,
+        'get_board': 20,
+        'list_cards': 25,
+        'create_card': 10,
+        'update_card': 10,
+        'list_activity': 15,
+        'invite_and_accept': 5,
+    }
+
+    def __init__(self, base_url: str, fixtures: LoadFixtures, concurrency: int, seed: int):
+        self.fixtures = fixtures
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        # No retries: a failed call is a data point, not something to hide
+        self.api = AsyncFlowSpaceClient(base_url, connections=concurrency, retries=0)
+        self.invites = 0
+
+    async def call(self, pending, expected: int = 200) -> Optional[ApiResponse]:
+        """Await one client call; None unless it returned the expected status.
+
+        Latency and status are recorded by the client's CallTimings.
+        """
+        try:
+            response = await pending
+        except httpx.HTTPError:
+            return None
+        return response if response.status_code == expected else None
+
+    def pick_owner(self) -> Dict:
+        return self.random.choice([u for u in self.fixtures.users if u['boards']])
+
+    async def list_boards(self):
+        user = self.random.choice(self.fixtures.users)
+        await self.call(self.api.list_boards(token=user['token']))
+
+    async def get_board(self):
+        user = self.pick_owner()
+        board = self.random.choice(user['boards'])
+        await self.call(self.api.get_board(board['id'], token=user['token']))
+
+    async def list_cards(self):
+        user = self.pick_owner()
+        board = self.random.choice(user['boards'])
+        await self.call(self.api.list_cards(board['id'], token=user['token']))
+
+    async def create_card(self):
+        user = self.pick_owner()
+        board = self.random.choice(user['boards'])
+        response = await self.call(self.api.create_card(
+            board['id'], board['column_id'], f'Load Card {uuid.uuid4().hex[:8]}', 'Created by the load test',
+            tags=['load'], token=user['token']), expected=201)
+        if response is not None:
+            board['cards'].append(response.json()['card']['_id'])
+
+    async def update_card(self):
+        user = self.pick_owner()
+        board = self.random.choice(user['boards'])
+        if not board['cards']:
+            return await self.create_card()
+        card_id = self.random.choice(board['cards'])
+        await self.call(self.api.update_card(card_id, token=user['token'], title=f'Updated {uuid.uuid4().hex[:8]}',
+                                             description='Updated by the load test'))
+
+    async def list_activity(self):
+        user = self.random.choice(self.fixtures.users)
+        await self.call(self.api.list_activity(token=user['token']))
+
+    async def invite_and_accept(self):
+        """Ordered flow: the owner invites, another seeded user accepts"""
+        owner = self.pick_owner()
+        board = self.random.choice(owner['boards'])
+        invitee = self.random.choice([u for u in self.fixtures.users if u is not owner] or [owner])
+        self.invites += 1
+        response = await self.call(self.api.send_invite(
+            board['id'], f'invite-{self.fixtures.run_id}-{self.invites}@flowspace.test', 'editor',
+            token=owner['token']))
+        if response is None:
+            return
+        await self.call(self.api.accept_invite(response.json()['token'], token=invitee['token']))
+
+    async def worker(self, deadline: float, remaining: List[int]):
+        names = list(self.SCENARIOS)
+        weights = [self.SCENARIOS[name] for name in names]
+        while time.perf_counter() < deadline and remaining[0] != 0:
+            remaining[0] -= 1
+            scenario = self.random.choices(names, weights)[0]
+            await getattr(self, scenario)()
+
+    async def run(self, duration: float, iterations: int) -> float:
+        async with self.api:
+            # Warm the pool so connection setup is not part of the measurement
+            await asyncio.gather(*(self.api.client.get('/api/ping') for _ in range(self.concurrency)))
+            remaining = [iterations if iterations > 0 else -1]
+            started = time.perf_counter()
+            await asyncio.gather(*(self.worker(started + duration, remaining) for _ in range(self.concurrency)))
+            return time.perf_counter() - started
+
+def print_report(report: Dict):
+    print_endpoint_table(report['endpoints'])
+    total = report['total']
+    print(f"\nTotal: {total['requests']} requests in {report['seconds']}s "
+          f"({Colors.GREEN}{total['rps']} req/s{Colors.RESET}, {total['errors']} errors)")
+    print(f"Latency p50/p95/p99: {total['p50_ms']} / {total['p95_ms']} / {total['p99_ms']} ms")
+    if total['rate_limited']:
+        env = ' '.join(f'{k}={v}' for k, v in PROXY_UNLIMITED_ENV.items())
+        print(f"{Colors.YELLOW}{total['rate_limited']} requests were rate limited (429) and are not in the "
+              f"figures above; start the proxy with {env} or point --base-url at Node{Colors.RESET}")
+    if report.get('smtp'):
+        smtp = report['smtp']
+        print(f"SMTP sink: {smtp['messages']} messages, {smtp['messages_per_second'] or '-'} msg/s")
+
+async def main_async(args) -> Dict:
+    sink = None
+    if args.smtp_sink:
+        host, port = args.smtp_sink.rsplit(':', 1)
+        sink = SMTPSink(host, int(port))
+        await sink.start()
+        print(f"  SMTP sink listening on {args.smtp_sink}")
+
+    run_id = uuid.uuid4().hex[:8]
+    fixtures = LoadFixtures(args.mongo_url, run_id)
+    print(f"\n{Colors.BOLD}Seeding {args.users} users x {args.boards_per_user} boards (run {run_id})...{Colors.RESET}")
+    fixtures.seed(args.users, args.boards_per_user)
+
+    tester = FlowSpaceLoadTester(args.base_url, fixtures, args.concurrency, args.seed)
+    try:
+        print(f"{Colors.BOLD}Running at concurrency {args.concurrency} for "
+              f"{args.iterations or 'unlimited'} iterations / {args.duration}s...{Colors.RESET}")
+        elapsed = await tester.run(args.duration, args.iterations)
+        # Give queued invite mail a moment to reach the sink
+        if sink is not None:
+            await asyncio.sleep(args.smtp_grace)
+    finally:
+        if sink is not None:
+            await sink.close()
+        if args.keep:
+            print(f"{Colors.YELLOW}Keeping seeded data for run {run_id}{Colors.RESET}")
+        else:
+            fixtures.cleanup()
+
+    return {
+        'run_id': run_id,
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 3),
+        'endpoints': tester.api.timings.report(elapsed),
+        'total': tester.api.timings.total(elapsed),
+        'smtp': sink.stats() if sink is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test of the FlowSpace API')
+    parser.add_argument('--base-url', default=BACKEND_URL)
+    parser.add_argument('--mongo-url', default=MONGO_URL)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--boards-per-user', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run for')
+    parser.add_argument('--iterations', type=int, default=0, help='Stop after this many scenarios (0 = no limit)')
+    parser.add_argument('--seed', type=int, default=1, help='Scenario mix seed')
+    parser.add_argument('--smtp-sink', default='127.0.0.1:2525', help='host:port for the local SMTP sink ("" to skip)')
+    parser.add_argument('--smtp-grace', type=float, default=2.0, help='Seconds to wait for trailing mail')
+    parser.add_argument('--keep', action='store_true', help='Do not delete the seeded data')
+    parser.add_argument('--json', help='Write the report to this file')
+    args = parser.parse_args()
+
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}FlowSpace Load Test - {args.base_url}{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report['total']['errors'] == 0 and report['total']['rate_limited'] == 0
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
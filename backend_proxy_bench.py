@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Proxy overhead benchmark for server/server.py
+Runs the proxy ASGI app (uvicorn, PROXY_SPAWN_NODE=0) in front of a stub
+upstream with fixed latency and payload size, and optionally in front of a
+running Node server, and measures the latency and CPU the proxy adds per
+request compared with calling the upstream directly
+
+Results are written as JSON so proxy changes can be compared run to run:
+  python backend_proxy_bench.py --sizes 256,16384 --concurrency 1,32 --json before.json
+  python backend_proxy_bench.py --node-url http://localhost:8002 --json node.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from flowspace_client import PROXY_UNLIMITED_ENV, Colors, percentile
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server')
+
+# Proxy settings for a like-for-like comparison: no response cache, no
+# coalescing of identical GETs, no rate limiting and no static serving.
+# --proxy-env overrides any of them.
+PROXY_BENCH_ENV = {
+    'PROXY_SPAWN_NODE': '0',
+    'PROXY_CACHE_TTL': '0',
+    'PROXY_COALESCE_GETS': '0',
+    'PROXY_SERVE_SPA': '0',
+    'PROXY_SERVE_UPLOADS': '0',
+    **PROXY_UNLIMITED_ENV,
+}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def process_cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process, from /proc/<pid>/stat"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+def stub_payload(size: int) -> bytes:
+    """A JSON document of exactly `size` bytes (at least 12)"""
+    size = max(size, 12)
+    return b'{"data":"' + b'x' * (size - 11) + b'"}'
+
+async def serve_stub(port: int, latency: float):
+    """Keep-alive HTTP/1.1 upstream answering every request with a JSON
+    payload sized by the `size` query parameter, after a fixed latency"""
+    payloads: Dict[int, bytes] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+                target = request_line.split(b' ')[1].decode()
+                size = 256
+                if 'size=' in target:
+                    size = int(target.split('size=', 1)[1].split('&', 1)[0])
+                body = payloads.get(size)
+                if body is None:
+                    body = payloads[size] = stub_payload(size)
+                if latency:
+                    await asyncio.sleep(latency)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json; charset=utf-8\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+def run_stub(port: int, latency: float):
+    asyncio.run(serve_stub(port, latency))
+
+def start_proxy(upstream_port: int, extra_env: Dict[str, str]) -> tuple:
+    """Start uvicorn serving server:app in front of the given upstream port"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(upstream_port), **PROXY_BENCH_ENV)
+    env.update(extra_env)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'server:app', '--host', '127.0.0.1', '--port', str(port),
+         '--no-access-log', '--log-level', 'warning'],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    return process, port
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f'{url} did not become ready within {timeout}s')
+
+async def run_load(base_url: str, path: str, requests_total: int, concurrency: int,
+                   headers: Dict[str, str], cpu_pid: Optional[int] = None) -> Dict:
+    """Fire requests_total GETs with the given concurrency over one pooled client"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests_total
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=30.0) as client:
+        # Warm the pools (ours and the proxy's) before measuring
+        await asyncio.gather(*(client.get(path) for _ in range(concurrency * 2)))
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        cpu_before = process_cpu_seconds(cpu_pid) if cpu_pid else 0.0
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        cpu_after = process_cpu_seconds(cpu_pid) if cpu_pid else 0.0
+
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+    if cpu_pid:
+        cpu = cpu_after - cpu_before
+        result['cpu_seconds'] = round(cpu, 3)
+        result['cpu_us_per_request'] = round(cpu / len(latencies) * 1e6, 1) if latencies else 0.0
+        result['cpu_cores_busy'] = round(cpu / elapsed, 3) if elapsed else 0.0
+    return result
+
+def compare(target: str, size: Optional[int], concurrency: int, direct: Dict, proxied: Dict) -> Dict:
+    return {
+        'target': target,
+        'payload_bytes': size,
+        'concurrency': concurrency,
+        'direct': direct,
+        'proxied': proxied,
+        'added_mean_ms': round(proxied['mean_ms'] - direct['mean_ms'], 3),
+        'added_p50_ms': round(proxied['p50_ms'] - direct['p50_ms'], 3),
+        'added_p99_ms': round(proxied['p99_ms'] - direct['p99_ms'], 3),
+        'proxy_cpu_us_per_request': proxied.get('cpu_us_per_request'),
+        'throughput_ratio': round(proxied['rps'] / direct['rps'], 3) if direct['rps'] else None,
+    }
+
+def print_row(row: Dict):
+    label = f"{row['target']}"
+    if row['payload_bytes'] is not None:
+        label += f" {row['payload_bytes']}B"
+    label += f" c={row['concurrency']}"
+    print(f"{label:<24}{row['direct']['p50_ms']:>10}{row['proxied']['p50_ms']:>10}"
+          f"{Colors.YELLOW}{row['added_p50_ms']:>10}{row['added_p99_ms']:>10}{Colors.RESET}"
+          f"{row['proxy_cpu_us_per_request']:>12}{row['direct']['rps']:>10}{row['proxied']['rps']:>10}")
+
+async def bench_target(target: str, upstream_url: str, proxy_url: str, proxy_pid: int,
+                       paths: List[tuple], args) -> List[Dict]:
+    await wait_until_ready(f'{proxy_url}/_proxy/ready')
+    headers = {'Accept-Encoding': args.accept_encoding}
+    rows = []
+    for size, path in paths:
+        for concurrency in args.concurrency:
+            direct = await run_load(upstream_url, path, args.requests, concurrency, headers)
+            proxied = await run_load(proxy_url, path, args.requests, concurrency, headers, cpu_pid=proxy_pid)
+            row = compare(target, size, concurrency, direct, proxied)
+            print_row(row)
+            rows.append(row)
+    return rows
+
+def parse_env(pairs: List[str]) -> Dict[str, str]:
+    return dict(pair.split('=', 1) for pair in pairs)
+
+async def main_async(args) -> List[Dict]:
+    results = []
+    extra_env = parse_env(args.proxy_env)
+    print(f"\n{Colors.BOLD}{'':<24}{'direct':>10}{'proxied':>10}{'+p50':>10}{'+p99':>10}"
+          f"{'cpu us/req':>12}{'rps dir':>10}{'rps prx':>10}{Colors.RESET}")
+
+    stub_port = free_port()
+    stub = multiprocessing.Process(target=run_stub, args=(stub_port, args.latency_ms / 1000), daemon=True)
+    stub.start()
+    proxy, proxy_port = start_proxy(stub_port, extra_env)
+    try:
+        paths = [(size, f'/api/bench?size={size}') for size in args.sizes]
+        results += await bench_target('stub', f'http://127.0.0.1:{stub_port}',
+                                      f'http://127.0.0.1:{proxy_port}', proxy.pid, paths, args)
+    finally:
+        proxy.terminate()
+        proxy.wait()
+        stub.terminate()
+
+    if args.node_url:
+        node_port = int(args.node_url.rsplit(':', 1)[1].split('/')[0])
+        proxy, proxy_port = start_proxy(node_port, extra_env)
+        try:
+            results += await bench_target('node', args.node_url, f'http://127.0.0.1:{proxy_port}',
+                                          proxy.pid, [(None, args.node_path)], args)
+        finally:
+            proxy.terminate()
+            proxy.wait()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the latency and CPU added by the FlowSpace proxy')
+    parser.add_argument('--sizes', default='256,4096,65536', help='Stub payload sizes in bytes')
+    parser.add_argument('--concurrency', default='1,16,64', help='Concurrency levels')
+    parser.add_argument('--requests', type=int, default=5000, help='Requests per measurement')
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='Stub upstream latency')
+    parser.add_argument('--node-url', default='', help='Also benchmark a running Node server, e.g. http://localhost:8002')
+    parser.add_argument('--node-path', default='/api/ping', help='Path to request from Node')
+    parser.add_argument('--accept-encoding', default='identity', help='Accept-Encoding sent by the client')
+    parser.add_argument('--proxy-env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra environment for the proxy, e.g. PROXY_STREAM_BODIES=0')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(',') if s]
+    args.concurrency = [int(c) for c in args.concurrency.split(',') if c]
+
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}FlowSpace Proxy Overhead Benchmark{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+
+    results = asyncio.run(main_async(args))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count(),
+                'config': {
+                    'requests': args.requests,
+                    'latency_ms': args.latency_ms,
+                    'accept_encoding': args.accept_encoding,
+                    'proxy_env': dict(PROXY_BENCH_ENV, **parse_env(args.proxy_env)),
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
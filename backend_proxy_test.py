@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Proxy behaviour tests for server/server.py
+Runs the proxy (PROXY_SPAWN_NODE=0) in front of a stub upstream that
+records what reaches it, so proxy-only guarantees can be checked without
+Node or MongoDB:
+
+  python backend_proxy_test.py
+"""
+
+import asyncio
+import json
+import multiprocessing
+import sys
+
+import httpx
+import jwt
+
+from backend_proxy_bench import free_port, start_proxy, wait_until_ready
+from flowspace_client import JWT_SECRET, Colors, TestLog, generate_jwt_token
+
+async def serve_stub(port: int):
+    """Upstream that sets a refresh cookie on /api/auth/login, answers
+    socket.io polls with a `card:update:ok` ack for the `board` query
+    parameter, any If-None-Match with a bodiless 304, and every other
+    request with the Cookie header it received. Board reads also carry the
+    board's version `v`, which a card created on it (over HTTP or a
+    socket.io polling POST) bumps. `slow=1` adds 300ms after the version
+    is read."""
+    versions = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                cookie = None
+                validator = None
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    name = name.strip().lower()
+                    if name == b'content-length':
+                        length = int(value.strip())
+                    elif name == b'cookie':
+                        cookie = value.strip().decode()
+                    elif name == b'if-none-match':
+                        validator = value.strip().decode()
+                payload = await reader.readexactly(length) if length else b''
+                method, target = request_line.decode().split(' ')[:2]
+                route = target.split('?', 1)[0].strip('/').split('/')
+                status = b'200 OK'
+                extra = b''
+                content_type = b'application/json; charset=utf-8'
+                state = {'cookie': cookie}
+                if method == 'POST' and route[:2] == ['api', 'cards'] and route[3:] == ['cards']:
+                    versions[route[2]] = versions.get(route[2], 0) + 1
+                    status = b'201 Created'
+                elif method == 'POST' and route[0] == 'socket.io':
+                    for packet in payload.decode().split('\x1e'):
+                        if packet.startswith('42'):
+                            event, data = json.loads(packet[2:])
+                            if event == 'card:create':
+                                versions[data['boardId']] = versions.get(data['boardId'], 0) + 1
+                elif route[:2] == ['api', 'boards'] and len(route) == 3:
+                    state['v'] = versions.get(route[2], 0)
+                body = json.dumps(state).encode()
+                if 'slow=1' in target:
+                    await asyncio.sleep(0.3)
+                if target.startswith('/api/auth/login'):
+                    extra = b'Set-Cookie: refreshToken=stub-refresh-token; Path=/; HttpOnly\r\n'
+                elif method == 'POST' and target.startswith('/socket.io/'):
+                    content_type, body = b'text/plain; charset=UTF-8', b'ok'
+                elif target.startswith('/socket.io/'):
+                    board_id = target.split('board=', 1)[1].split('&', 1)[0]
+                    content_type = b'text/plain; charset=UTF-8'
+                    body = ('2\x1e42' + json.dumps(['card:update:ok', {'boardId': board_id}])).encode()
+                elif validator is not None:
+                    status, body = b'304 Not Modified', b''
+                writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: ' + content_type + b'\r\n' + extra +
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port)
+    async with server:
+        await server.serve_forever()
+
+def run_stub(port: int):
+    asyncio.run(serve_stub(port))
+
+class ProxyTester(TestLog):
+    def __init__(self, proxy_url: str):
+        super().__init__()
+        self.proxy_url = proxy_url
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        # A fresh client per call, so the test side never replays cookies either
+        async with httpx.AsyncClient(base_url=self.proxy_url, timeout=10.0) as client:
+            return await client.request(method, path, **kwargs)
+
+    async def test_upstream_cookies_not_shared(self):
+        """A Set-Cookie on one response must not ride along on another caller's request"""
+        self.print(f"\n{Colors.BOLD}Test: Upstream cookies are not shared between callers{Colors.RESET}")
+
+        response = await self.request('POST', '/api/auth/login', json={})
+        relayed = 'refreshToken=stub-refresh-token' in response.headers.get('set-cookie', '')
+        self.log_test("Set-Cookie relayed to the caller", relayed,
+                      f"Status {response.status_code}, Set-Cookie: {response.headers.get('set-cookie')}")
+
+        # Twice, so the request lands on a pooled connection as well as a new one
+        for attempt in range(2):
+            response = await self.request('POST', '/api/auth/refresh')
+            cookie = response.json().get('cookie') if response.status_code == 200 else 'n/a'
+            self.log_test(f"Cookie-less request reaches upstream without cookies ({attempt + 1})",
+                          response.status_code == 200 and cookie is None,
+                          f"Status {response.status_code}, upstream saw Cookie: {cookie}")
+
+        response = await self.request('POST', '/api/auth/refresh', headers={'Cookie': 'refreshToken=mine'})
+        cookie = response.json().get('cookie') if response.status_code == 200 else 'n/a'
+        self.log_test("Caller's own Cookie header is forwarded unchanged", cookie == 'refreshToken=mine',
+                      f"Status {response.status_code}, upstream saw Cookie: {cookie}")
+
+    async def test_polling_ack_invalidates_validator(self):
+        """A socket.io ack delivered over long-polling must retire the board's ETag"""
+        self.print(f"\n{Colors.BOLD}Test: Long-polling acks invalidate cached validators{Colors.RESET}")
+        board_id = '0123456789abcdef01234567'
+        headers = {'Authorization': f'Bearer {generate_jwt_token("fedcba9876543210fedcba98")}'}
+
+        response = await self.request('GET', f'/api/boards/{board_id}', headers=headers)
+        etag = response.headers.get('etag')
+        self.log_test("Board read gets an ETag", response.status_code == 200 and etag is not None,
+                      f"Status {response.status_code}, ETag: {etag}")
+        if etag is None:
+            return
+        headers['If-None-Match'] = etag
+        response = await self.request('GET', f'/api/boards/{board_id}', headers=headers)
+        self.log_test("Revalidation answered by the proxy",
+                      response.status_code == 304 and response.headers.get('x-proxy-cache') == 'REVALIDATED',
+                      f"Status {response.status_code}, X-Proxy-Cache: {response.headers.get('x-proxy-cache')}")
+
+        response = await self.request('GET', f'/socket.io/?EIO=4&transport=polling&board={board_id}')
+        self.log_test("Polling GET relayed", response.status_code == 200 and 'card:update:ok' in response.text,
+                      f"Status {response.status_code}, body: {response.text[:80]}")
+
+        response = await self.request('GET', f'/api/boards/{board_id}', headers=headers)
+        self.log_test("Revalidation after the ack goes back to upstream",
+                      response.headers.get('x-proxy-cache') != 'REVALIDATED',
+                      f"Status {response.status_code}, X-Proxy-Cache: {response.headers.get('x-proxy-cache')}")
+
+    async def test_write_during_read_not_cached(self):
+        """A read that was upstream while a write landed must not be cached"""
+        self.print(f"\n{Colors.BOLD}Test: Reads racing a write are not cached{Colors.RESET}")
+        board_id = '0123456789abcdef0123aaaa'
+        headers = {'Authorization': f'Bearer {generate_jwt_token("fedcba9876543210fedcba98")}'}
+
+        read = asyncio.ensure_future(self.request('GET', f'/api/boards/{board_id}?slow=1', headers=headers))
+        # Let the read reach upstream before the write does
+        await asyncio.sleep(0.1)
+        response = await self.request('POST', f'/api/cards/{board_id}/cards', headers=headers, json={})
+        self.log_test("Write during the read succeeds", response.status_code == 201,
+                      f"Status {response.status_code}")
+        response = await read
+        self.log_test("Racing read gets the old version", response.json().get('v') == 0,
+                      f"Status {response.status_code}, body: {response.text[:80]}")
+
+        response = await self.request('GET', f'/api/boards/{board_id}?slow=1', headers=headers)
+        self.log_test("Next read sees the write",
+                      response.json().get('v') == 1 and response.headers.get('x-proxy-cache') != 'HIT',
+                      f"X-Proxy-Cache: {response.headers.get('x-proxy-cache')}, body: {response.text[:80]}")
+
+    async def test_socket_write_retires_racing_etag(self):
+        """An ETag sent with a read that raced a socket.io write must not revalidate"""
+        self.print(f"\n{Colors.BOLD}Test: Socket.io writes retire ETags of racing reads{Colors.RESET}")
+        board_id = '0123456789abcdef0123bbbb'
+        headers = {'Authorization': f'Bearer {generate_jwt_token("fedcba9876543210fedcba98")}'}
+
+        read = asyncio.ensure_future(self.request('GET', f'/api/boards/{board_id}?slow=1', headers=headers))
+        await asyncio.sleep(0.1)
+        frame = '42' + json.dumps(['card:create', {'boardId': board_id, 'title': 'x'}])
+        response = await self.request('POST', '/socket.io/?EIO=4&transport=polling', content=frame)
+        self.log_test("Polling POST relayed", response.status_code == 200,
+                      f"Status {response.status_code}")
+        response = await read
+        etag = response.headers.get('etag')
+        self.log_test("Racing read gets the old version with an ETag",
+                      response.json().get('v') == 0 and etag is not None,
+                      f"ETag: {etag}, body: {response.text[:80]}")
+        if etag is None:
+            return
+
+        response = await self.request('GET', f'/api/boards/{board_id}?slow=1',
+                                      headers=dict(headers, **{'If-None-Match': etag}))
+        self.log_test("Its ETag gets the new body, not a 304",
+                      response.status_code == 200 and response.json().get('v') == 1,
+                      f"Status {response.status_code}, X-Proxy-Cache: {response.headers.get('x-proxy-cache')}")
+
+    async def test_coalesced_get_not_conditional(self):
+        """A follower without a validator must not get the leader's 304"""
+        self.print(f"\n{Colors.BOLD}Test: Coalesced GETs are never made conditional{Colors.RESET}")
+        path = '/api/boards/0123456789abcdef01234567?slow=1'
+        headers = {'Authorization': f'Bearer {generate_jwt_token("fedcba9876543210fedcba98")}'}
+
+        leader = asyncio.ensure_future(self.request('GET', path, headers=dict(headers, **{'If-None-Match': 'W/"old"'})))
+        # Let the leader's call reach upstream before the follower joins it
+        await asyncio.sleep(0.1)
+        follower = await self.request('GET', path, headers=headers)
+        await leader
+        self.log_test("Follower without a validator gets the full body",
+                      follower.status_code == 200 and follower.content != b'',
+                      f"Status {follower.status_code}, {len(follower.content)} bytes")
+
+    async def test_get_after_write_not_coalesced(self):
+        """A GET that starts after a write must not share a call that started before it"""
+        self.print(f"\n{Colors.BOLD}Test: GETs after a write start their own call{Colors.RESET}")
+        board_id = '0123456789abcdef0123cccc'
+        path = f'/api/boards/{board_id}?slow=1'
+        headers = {'Authorization': f'Bearer {generate_jwt_token("fedcba9876543210fedcba98")}'}
+
+        leader = asyncio.ensure_future(self.request('GET', path, headers=headers))
+        await asyncio.sleep(0.1)
+        response = await self.request('POST', f'/api/cards/{board_id}/cards', headers=headers, json={})
+        self.log_test("Write during the call succeeds", response.status_code == 201,
+                      f"Status {response.status_code}")
+        response = await self.request('GET', path, headers=headers)
+        await leader
+        self.log_test("GET after the write sees it", response.json().get('v') == 1,
+                      f"Status {response.status_code}, body: {response.text[:80]}")
+
+    async def test_client_abort_keeps_worker_healthy(self):
+        """Clients dropping mid-upload must not count as worker failures"""
+        self.print(f"\n{Colors.BOLD}Test: Aborted uploads do not eject the worker{Colors.RESET}")
+        url = httpx.URL(self.proxy_url)
+        # One more than the default PROXY_WORKER_MAX_FAILURES
+        for _ in range(4):
+            reader, writer = await asyncio.open_connection(url.host, url.port)
+            writer.write(b'POST /api/cards/0123456789abcdef0123dddd/cards HTTP/1.1\r\nHost: proxy\r\n'
+                         b'Content-Type: application/json\r\nContent-Length: 1000\r\n\r\n{"title":')
+            await writer.drain()
+            # Let the proxy start relaying the body before the client goes away
+            await asyncio.sleep(0.2)
+            writer.close()
+        await asyncio.sleep(0.2)
+
+        response = await self.request('GET', '/_proxy/stats')
+        failures = [worker.get('consecutive_failures') for worker in response.json().get('workers', [])]
+        self.log_test("Worker failure count unchanged", response.status_code == 200 and failures == [0],
+                      f"Status {response.status_code}, consecutive failures: {failures}")
+
+    async def test_rate_limit_retry_after(self):
+        """Over-limit callers get a 429 with Retry-After, and a request refused
+        for its address leaves the user's quota alone"""
+        self.print(f"\n{Colors.BOLD}Test: Rate limits answer 429 with Retry-After{Colors.RESET}")
+        token = generate_jwt_token("fedcba9876543210fedcba98")
+        first = {'Authorization': f'Bearer {token}', 'X-Forwarded-For': '198.51.100.1'}
+        second = {'Authorization': f'Bearer {token}', 'X-Forwarded-For': '198.51.100.2'}
+
+        # The address allows 2 requests and the user 3
+        statuses = [(await self.request('GET', '/api/auth/me', headers=first)).status_code for _ in range(2)]
+        self.log_test("Requests within the limits pass", statuses == [200, 200], f"Statuses {statuses}")
+        response = await self.request('GET', '/api/auth/me', headers=first)
+        retry_after = response.headers.get('retry-after', '')
+        self.log_test("Address over its limit gets 429 with Retry-After",
+                      response.status_code == 429 and retry_after.isdigit() and int(retry_after) >= 1,
+                      f"Status {response.status_code}, Retry-After: {retry_after}")
+
+        response = await self.request('GET', '/api/auth/me', headers=second)
+        self.log_test("User's last token survives the address rejection", response.status_code == 200,
+                      f"Status {response.status_code}")
+        response = await self.request('GET', '/api/auth/me', headers=second)
+        self.log_test("User over its limit gets 429", response.status_code == 429 and 'retry-after' in response.headers,
+                      f"Status {response.status_code}, Retry-After: {response.headers.get('retry-after')}")
+
+    async def test_malformed_time_claims_rejected(self):
+        """A correctly signed token whose exp/nbf is not a number gets a 401"""
+        self.print(f"\n{Colors.BOLD}Test: Non-numeric exp/nbf claims are rejected{Colors.RESET}")
+        for claim in ('exp', 'nbf'):
+            token = jwt.encode({'sub': 'fedcba9876543210fedcba98', claim: 'tomorrow'}, JWT_SECRET, algorithm='HS256')
+            response = await self.request('GET', '/api/boards', headers={'Authorization': f'Bearer {token}'})
+            self.log_test(f"String {claim} answered with 401", response.status_code == 401,
+                          f"Status {response.status_code}")
+
+# Proxy settings per group of tests, on top of PROXY_BENCH_ENV
+TEST_RUNS = [
+    # The response cache only serves tokens the proxy can verify itself
+    ({'PROXY_CACHE_TTL': '15', 'JWT_ACCESS_SECRET': JWT_SECRET},
+     ['test_upstream_cookies_not_shared', 'test_polling_ack_invalidates_validator',
+      'test_write_during_read_not_cached', 'test_malformed_time_claims_rejected',
+      'test_client_abort_keeps_worker_healthy']),
+    # Starts with nothing cached, which used to skip the version bumps
+    ({'PROXY_CACHE_TTL': '15', 'JWT_ACCESS_SECRET': JWT_SECRET},
+     ['test_socket_write_retires_racing_etag']),
+    ({'PROXY_ETAGS': '0', 'PROXY_COALESCE_GETS': '1', 'JWT_ACCESS_SECRET': JWT_SECRET},
+     ['test_coalesced_get_not_conditional']),
+    # Rate limits on (PROXY_BENCH_ENV turns them off), with buckets that
+    # take 1000s to refill
+    ({'PROXY_RATE_LIMIT': '1', 'JWT_ACCESS_SECRET': JWT_SECRET,
+      'PROXY_RATE_LIMIT_USER_RPS': '0.001', 'PROXY_RATE_LIMIT_USER_BURST': '3',
+      'PROXY_RATE_LIMIT_IP_RPS': '0.001', 'PROXY_RATE_LIMIT_IP_BURST': '2'},
+     ['test_rate_limit_retry_after']),
+    # Coalescing alone, with the response cache still off
+    ({'PROXY_COALESCE_GETS': '1', 'JWT_ACCESS_SECRET': JWT_SECRET},
+     ['test_get_after_write_not_coalesced']),
+]
+
+async def run_tests() -> ProxyTester:
+    stub_port = free_port()
+    stub = multiprocessing.Process(target=run_stub, args=(stub_port,), daemon=True)
+    stub.start()
+    tester = ProxyTester('')
+    try:
+        for env, tests in TEST_RUNS:
+            proxy, proxy_port = start_proxy(stub_port, env)
+            tester.proxy_url = f'http://127.0.0.1:{proxy_port}'
+            try:
+                await wait_until_ready(f'{tester.proxy_url}/_proxy/ready')
+                for test in tests:
+                    await getattr(tester, test)()
+            finally:
+                proxy.terminate()
+                proxy.wait()
+    finally:
+        stub.terminate()
+        print('\n'.join(tester.output))
+    return tester
+
+def main() -> bool:
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}FlowSpace Proxy Tests{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+
+    tester = asyncio.run(run_tests())
+    passed = sum(1 for r in tester.test_results if r['passed'])
+    total = len(tester.test_results)
+    print(f"\nTotal Tests: {total}")
+    print(f"{Colors.GREEN}Passed: {passed}{Colors.RESET}")
+    print(f"{Colors.RED}Failed: {total - passed}{Colors.RESET}")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
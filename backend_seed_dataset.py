@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for FlowSpace performance testing
+Bulk-loads production-sized users, boards (with members and columns),
+cards (with tags and history), activities, notes and invites into Mongo
+and prints the load rate per collection
+
+Everything is derived from --seed: the same seed and counts always produce
+the same documents with the same _ids, whichever worker count is used.
+Distributions are skewed the way real workspaces are - a few power users
+own and join most boards, a few boards hold most cards, recent activity
+dominates.
+
+  python backend_seed_dataset.py --scale 0.01            # 1k users, 50k cards
+  python backend_seed_dataset.py                          # 100k users, 5M cards, 20M activities
+  python backend_seed_dataset.py --drop-dataset           # remove a seeded dataset
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import struct
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterator, List, Tuple
+
+from flowspace_client import MONGO_URL, Colors
+
+# Counts at --scale 1.0
+FULL_SCALE = {
+    'users': 100_000,
+    'boards': 50_000,
+    'cards': 5_000_000,
+    'activities': 20_000_000,
+    'notes': 20_000,
+    'invites': 200_000,
+}
+
+# Load order: references only ever point at collections loaded earlier
+COLLECTIONS = ['users', 'boards', 'notes', 'invites', 'cards', 'activities']
+
+# One byte in every seeded _id says which collection it belongs to, so a
+# dataset can be found (and dropped) by _id range alone
+COLLECTION_CODES = {'users': 1, 'boards': 2, 'columns': 3, 'cards': 4, 'activities': 5,
+                    'notes': 6, 'invites': 7, 'history': 8}
+
+# Fixed timestamp part of seeded ObjectIds ('5EED' + seed tag)
+DATASET_EPOCH = 0x5EED0000
+
+COLUMN_TITLES = ['To Do', 'In Progress', 'Review', 'Done']
+TAGS = ['bug', 'feature', 'urgent', 'backend', 'frontend', 'design', 'docs', 'research', 'ops',
+        'security', 'performance', 'ux', 'api', 'mobile', 'billing', 'infra', 'qa', 'growth',
+        'support', 'analytics', 'onboarding', 'search', 'payments', 'email', 'i18n']
+CARD_WORDS = ['Fix', 'Add', 'Refactor', 'Investigate', 'Update', 'Remove', 'Migrate', 'Review',
+              'login', 'dashboard', 'export', 'avatar', 'invite flow', 'board view', 'notifications',
+              'search index', 'rate limiter', 'activity feed', 'settings page', 'card drag and drop']
+# (action, entityType, weight), roughly the mix the app logs
+ACTIONS = [('updated card', 'card', 40), ('created card', 'card', 25), ('moved card', 'card', 15),
+           ('deleted card', 'card', 4), ('updated note', 'note', 8), ('created board', 'board', 3),
+           ('joined board', 'board', 3), ('updated profile', 'user', 2)]
+HISTORY_ACTIONS = ['created', 'updated', 'moved', 'assigned', 'tagged']
+
+def dataset_tag(seed: int) -> int:
+    return seed & 0xFFFF
+
+def seeded_id(tag: int, collection: str, index: int):
+    """Deterministic ObjectId: fixed timestamp, collection code, index"""
+    from bson import ObjectId
+    return ObjectId(struct.pack('>IBxxxI', DATASET_EPOCH + tag, COLLECTION_CODES[collection], index))
+
+def id_range(tag: int, collection: str) -> Dict:
+    return {'$gte': seeded_id(tag, collection, 0), '$lte': seeded_id(tag, collection, 0xFFFFFFFF)}
+
+@lru_cache(maxsize=None)
+def zipf_weights(n: int, s: float) -> List[float]:
+    """Cumulative Zipf weights over ranks 0..n-1 for random.choices"""
+    return list(accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+
+def zipf_pick(rng: random.Random, n: int, s: float, k: int = 1) -> List[int]:
+    return rng.choices(range(n), cum_weights=zipf_weights(n, s), k=k)
+
+def recent(rng: random.Random, as_of: datetime, days: int = 365) -> datetime:
+    """Timestamp within `days` of as_of, skewed towards as_of"""
+    return as_of - timedelta(seconds=days * 86400 * rng.random() ** 2.5)
+
+class DatasetSpec:
+    """Counts, seed and skew for one dataset; picklable for the worker pool"""
+
+    def __init__(self, counts: Dict[str, int], seed: int, as_of: datetime, skew: float):
+        self.counts = counts
+        self.seed = seed
+        self.tag = dataset_tag(seed)
+        self.as_of = as_of
+        self.skew = skew
+
+    def rng(self, *key) -> random.Random:
+        return random.Random(':'.join(str(part) for part in (self.seed,) + key))
+
+    def oid(self, collection: str, index: int):
+        return seeded_id(self.tag, collection, index)
+
+    @lru_cache(maxsize=65536)
+    def board_members(self, board: int) -> Tuple[int, List[Tuple[int, str]]]:
+        """Owner and (user, role) members of a board, recomputable anywhere"""
+        rng = self.rng('board', board)
+        users = self.counts['users']
+        owner = zipf_pick(rng, users, self.skew)[0]
+        # Mostly small teams, occasionally a whole department
+        size = min(int(rng.paretovariate(1.3)), 50, users - 1)
+        members = [(owner, 'owner')]
+        seen = {owner}
+        for user in zipf_pick(rng, users, self.skew * 0.8, k=size):
+            if user not in seen:
+                seen.add(user)
+                members.append((user, 'editor' if rng.random() < 0.7 else 'viewer'))
+        return owner, members
+
+    def __hash__(self):
+        return hash((self.seed, tuple(sorted(self.counts.items()))))
+
+    def __eq__(self, other):
+        return isinstance(other, DatasetSpec) and (self.seed, self.counts) == (other.seed, other.counts)
+
+# Document builders. Each builds the documents [start, stop) of one
+# collection from per-document RNGs, so blocks can be generated in any
+# order by any process.
+
+def build_users(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    for i in range(start, stop):
+        rng = spec.rng('user', i)
+        created = recent(rng, spec.as_of, days=3 * 365)
+        yield {
+            '_id': spec.oid('users', i),
+            'name': f'Seed User {i}',
+            'email': f'user{i}.{spec.tag}@seed.flowspace.test',
+            'avatarUrl': f'https://api.dicebear.com/7.x/avataaars/svg?seed={spec.tag}-{i}',
+            'createdAt': created,
+            'updatedAt': created,
+        }
+
+def build_boards(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    for i in range(start, stop):
+        rng = spec.rng('board-doc', i)
+        owner, members = spec.board_members(i)
+        created = recent(rng, spec.as_of, days=2 * 365)
+        yield {
+            '_id': spec.oid('boards', i),
+            'title': f'Board {i}',
+            'description': f'Seeded board {i}',
+            'ownerId': spec.oid('users', owner),
+            'members': [{'_id': spec.oid('users', user), 'userId': spec.oid('users', user), 'role': role}
+                        for user, role in members],
+            'columns': [{'_id': spec.oid('columns', i * len(COLUMN_TITLES) + order), 'title': title,
+                         'order': order} for order, title in enumerate(COLUMN_TITLES)],
+            'createdAt': created,
+            'updatedAt': recent(rng, spec.as_of, days=30),
+        }
+
+def build_cards(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    boards = spec.counts['boards']
+    for i in range(start, stop):
+        rng = spec.rng('card', i)
+        board = zipf_pick(rng, boards, spec.skew)[0]
+        _, members = spec.board_members(board)
+        author = spec.oid('users', rng.choice(members)[0])
+        editor = spec.oid('users', rng.choice(members)[0])
+        created = recent(rng, spec.as_of)
+        # Most cards are touched once or twice, a few are argued over for weeks
+        history = [{'_id': spec.oid('history', i * 64 + h), 'by': spec.oid('users', rng.choice(members)[0]),
+                    'action': rng.choice(HISTORY_ACTIONS), 'when': created + timedelta(hours=h * rng.random() * 24)}
+                   for h in range(min(int(rng.paretovariate(1.5)), 64))]
+        yield {
+            '_id': spec.oid('cards', i),
+            'boardId': spec.oid('boards', board),
+            'columnId': spec.oid('columns', board * len(COLUMN_TITLES) + rng.randrange(len(COLUMN_TITLES))),
+            'title': f'{rng.choice(CARD_WORDS[:8])} {rng.choice(CARD_WORDS[8:])} #{i}',
+            'description': 'Seeded card',
+            'assigneeId': author if rng.random() < 0.5 else None,
+            'createdBy': author,
+            'updatedBy': editor,
+            'tags': sorted({TAGS[t] for t in zipf_pick(rng, len(TAGS), 1.1, k=rng.randrange(4))}),
+            'order': rng.randrange(1000),
+            'history': history,
+            'createdAt': created,
+            'updatedAt': history[-1]['when'] if history else created,
+        }
+
+def build_activities(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    boards, cards = spec.counts['boards'], max(spec.counts['cards'], 1)
+    actions = [(action, entity) for action, entity, _ in ACTIONS]
+    weights = list(accumulate(weight for _, _, weight in ACTIONS))
+    for i in range(start, stop):
+        rng = spec.rng('activity', i)
+        board = zipf_pick(rng, boards, spec.skew)[0]
+        _, members = spec.board_members(board)
+        action, entity = rng.choices(actions, cum_weights=weights)[0]
+        created = recent(rng, spec.as_of, days=180)
+        yield {
+            '_id': spec.oid('activities', i),
+            'boardId': spec.oid('boards', board),
+            'userId': spec.oid('users', rng.choice(members)[0]),
+            'action': action,
+            'entityType': entity,
+            'entityId': spec.oid('cards', rng.randrange(cards)) if entity == 'card' else spec.oid('boards', board),
+            'createdAt': created,
+            'updatedAt': created,
+        }
+
+def build_notes(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    # Note.boardId is unique: note i belongs to board i
+    for i in range(start, min(stop, spec.counts['boards'])):
+        rng = spec.rng('note', i)
+        _, members = spec.board_members(i)
+        created = recent(rng, spec.as_of)
+        yield {
+            '_id': spec.oid('notes', i),
+            'boardId': spec.oid('boards', i),
+            'content': f'<p>Seeded notes for board {i}</p>' * rng.randint(1, 20),
+            'updatedBy': spec.oid('users', rng.choice(members)[0]),
+            'createdAt': created,
+            'updatedAt': created,
+        }
+
+def build_invites(spec: DatasetSpec, start: int, stop: int) -> Iterator[Dict]:
+    boards = spec.counts['boards']
+    for i in range(start, stop):
+        rng = spec.rng('invite', i)
+        board = zipf_pick(rng, boards, spec.skew)[0]
+        owner, _ = spec.board_members(board)
+        created = recent(rng, spec.as_of, days=60)
+        yield {
+            '_id': spec.oid('invites', i),
+            'boardId': spec.oid('boards', board),
+            'invitedBy': spec.oid('users', owner),
+            'email': f'invitee{i}.{spec.tag}@seed.flowspace.test',
+            'token': f'seed-{spec.tag}-{i:010d}',
+            'role': 'editor' if rng.random() < 0.8 else 'viewer',
+            'status': rng.choices(['pending', 'accepted', 'expired'], [30, 60, 10])[0],
+            'expiresAt': created + timedelta(days=7),
+            'createdAt': created,
+            'updatedAt': created,
+        }
+
+BUILDERS = {
+    'users': build_users,
+    'boards': build_boards,
+    'cards': build_cards,
+    'activities': build_activities,
+    'notes': build_notes,
+    'invites': build_invites,
+}
+
+# Worker processes: one MongoClient each, opened by the pool initializer
+
+_worker: Dict = {}
+
+def init_worker(mongo_url: str, db_name: str, spec: DatasetSpec, upsert: bool):
+    from pymongo import MongoClient
+    _worker['db'] = MongoClient(mongo_url)[db_name]
+    _worker['spec'] = spec
+    _worker['upsert'] = upsert
+
+def load_block(job: Tuple[str, int, int]) -> Tuple[str, int, float]:
+    """Build and write one block; returns (collection, docs, seconds spent writing)"""
+    from pymongo import ReplaceOne
+    from pymongo.errors import BulkWriteError
+    collection, start, stop = job
+    docs = list(BUILDERS[collection](_worker['spec'], start, stop))
+    if not docs:
+        return collection, 0, 0.0
+    target = _worker['db'][collection]
+    started = time.perf_counter()
+    if _worker['upsert']:
+        # Re-runs converge on the same documents instead of failing on _id
+        target.bulk_write([ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs], ordered=False)
+    else:
+        try:
+            target.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything but the failed documents went in
+            failed = len(e.details.get('writeErrors', []))
+            return collection, len(docs) - failed, time.perf_counter() - started
+    return collection, len(docs), time.perf_counter() - started
+
+def blocks(collection: str, count: int, batch_size: int) -> List[Tuple[str, int, int]]:
+    return [(collection, start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+
+def load_collection(pool, collection: str, count: int, batch_size: int) -> Dict:
+    started = time.perf_counter()
+    loaded, write_seconds, last_report = 0, 0.0, started
+    for _, docs, seconds in pool.imap_unordered(load_block, blocks(collection, count, batch_size)):
+        loaded += docs
+        write_seconds += seconds
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            print(f"  {collection}: {loaded:,}/{count:,} ({loaded / (now - started):,.0f} docs/s)")
+    elapsed = time.perf_counter() - started
+    row = {
+        'docs': loaded,
+        'seconds': round(elapsed, 3),
+        'docs_per_second': round(loaded / elapsed, 1) if elapsed else 0.0,
+        'write_seconds': round(write_seconds, 3),
+    }
+    print(f"{Colors.GREEN}✓{Colors.RESET} {collection:<11}{loaded:>12,} docs in {elapsed:8.2f}s  "
+          f"{Colors.BOLD}{row['docs_per_second']:>12,.0f} docs/s{Colors.RESET}")
+    return row
+
+def drop_dataset(mongo_url: str, db_name: str, seed: int):
+    from pymongo import MongoClient
+    db = MongoClient(mongo_url)[db_name]
+    tag = dataset_tag(seed)
+    for collection in reversed(COLLECTIONS):
+        started = time.perf_counter()
+        result = db[collection].delete_many({'_id': id_range(tag, collection)})
+        print(f"  {collection}: deleted {result.deleted_count:,} in {time.perf_counter() - started:.2f}s")
+
+def scaled_counts(args) -> Dict[str, int]:
+    counts = {name: max(int(full * args.scale), 1) for name, full in FULL_SCALE.items()}
+    for name in FULL_SCALE:
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+    counts['notes'] = min(counts['notes'], counts['boards'])
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-load a synthetic FlowSpace dataset')
+    parser.add_argument('--mongo-url', default=MONGO_URL)
+    parser.add_argument('--db', default='flowspace')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on the full-scale counts')
+    for name, full in FULL_SCALE.items():
+        parser.add_argument(f'--{name}', type=int, help=f'Override the {name} count ({full:,} at scale 1)')
+    parser.add_argument('--seed', type=int, default=1, help='Dataset seed; also tags the _ids')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent for owners, boards and members')
+    parser.add_argument('--as-of', default='2024-06-01', help='Date the dataset "ends" on (YYYY-MM-DD)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Documents per insert_many')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--upsert', action='store_true', help='Unordered ReplaceOne upserts, so re-runs are idempotent')
+    parser.add_argument('--only', action='append', choices=COLLECTIONS, help='Load just these collections')
+    parser.add_argument('--drop-dataset', action='store_true', help='Delete the dataset for --seed and exit')
+    parser.add_argument('--json', help='Write the load report to this file')
+    args = parser.parse_args()
+
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}FlowSpace Synthetic Dataset - seed {args.seed}{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+
+    if args.drop_dataset:
+        drop_dataset(args.mongo_url, args.db, args.seed)
+        return True
+
+    counts = scaled_counts(args)
+    spec = DatasetSpec(counts, args.seed, datetime.strptime(args.as_of, '%Y-%m-%d'), args.skew)
+    print('  ' + ', '.join(f'{name} {counts[name]:,}' for name in COLLECTIONS))
+    print(f"  {args.workers} workers, {args.batch_size:,} docs per batch, "
+          f"{'upsert' if args.upsert else 'insert_many'} (unordered)\n")
+
+    report = {'seed': args.seed, 'counts': counts, 'collections': {}}
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker,
+                              initargs=(args.mongo_url, args.db, spec, args.upsert)) as pool:
+        for collection in COLLECTIONS:
+            if args.only and collection not in args.only:
+                continue
+            report['collections'][collection] = load_collection(pool, collection, counts[collection],
+                                                                args.batch_size)
+    elapsed = time.perf_counter() - started
+    total = sum(row['docs'] for row in report['collections'].values())
+    report['seconds'] = round(elapsed, 3)
+    report['docs_per_second'] = round(total / elapsed, 1) if elapsed else 0.0
+    print(f"\nTotal: {total:,} documents in {elapsed:.2f}s ({Colors.GREEN}{report['docs_per_second']:,.0f} docs/s{Colors.RESET})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
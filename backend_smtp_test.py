@@ -2,56 +2,67 @@
 """
 Backend SMTP Email Testing for FlowSpace Invite System
 Tests end-to-end invite flow with SMTP email sending
+
+Each scenario gets its own namespaced users and boards, so scenarios run
+concurrently (--parallel); the steps inside a scenario stay in order
+
+--smtp-sink runs a local SMTP sink and, after the scenarios, fires a burst
+of invites to measure invite API latency and mail throughput through the
+backend's mail queue. Start the backend pointed at the sink:
+  SMTP_HOST=127.0.0.1 SMTP_PORT=2525 <usual backend command>
+The burst comes from one user and one address, so it goes to Node directly
+(--bench-url, default NODE_URL) rather than through the proxy's rate
+limiter; to bench through the proxy, start it with PROXY_RATE_LIMIT=0.
 """
 
-import requests
+import argparse
+import asyncio
 import json
-import jwt
 import os
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import traceback
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
-# Configuration
-BACKEND_URL = "http://localhost:8001"
+from backend_load_test import SMTPSink
+from flowspace_client import (
+    BACKEND_URL, MONGO_URL, NODE_URL, ApiResponse, AsyncFlowSpaceClient, CallTimings, Colors, TestLog,
+    generate_jwt_token, percentile, print_timing_report,
+)
+from flowspace_fixtures import FixtureSnapshot, ResetCost, namespace_scope, summarize_costs
 
-# Load JWT secret from .env file
-def load_jwt_secret():
-    try:
-        with open('/app/.env', 'r') as f:
-            for line in f:
-                if line.startswith('JWT_ACCESS_SECRET='):
-                    secret = line.split('=', 1)[1].strip()
-                    return secret.strip('"').strip("'")
-    except Exception as e:
-        print(f"Error loading JWT secret: {e}")
-    return 'flowspace_access_secret_2024_secure'
+# Seconds to wait for the background mail queue to deliver an invite
+MAIL_TIMEOUT = 30.0
 
-JWT_SECRET = load_jwt_secret()
+_db = None
 
-class Colors:
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
+def get_db():
+    """Shared MongoDB handle; one connection pool for every scenario"""
+    global _db
+    if _db is None:
+        from pymongo import MongoClient
+        _db = MongoClient(MONGO_URL)['flowspace']
+    return _db
 
-class FlowSpaceSMTPTester:
-    def __init__(self):
-        self.base_url = BACKEND_URL
+class FlowSpaceSMTPTester(TestLog):
+    def __init__(self, api: AsyncFlowSpaceClient, namespace: str):
+        super().__init__()
+        self.api = api
+        # Plus-address tag for this scenario so concurrent scenarios never share data
+        self.namespace = namespace
         # Test users
         self.owner_token = None
         self.owner_id = None
-        self.owner_email = 'flowspace.owner@example.com'
+        self.owner_email = f'flowspace.owner+{namespace}@example.com'
         
         self.invitee_token = None
         self.invitee_id = None
-        self.invitee_email = 'testuser@example.com'
+        self.invitee_email = f'testuser+{namespace}@example.com'
         
         self.viewer_token = None
         self.viewer_id = None
-        self.viewer_email = 'viewer.user@example.com'
+        self.viewer_email = f'viewer.user+{namespace}@example.com'
         
         # Board data
         self.board_a_id = None
@@ -59,39 +70,14 @@ class FlowSpaceSMTPTester:
         self.column_id = None
         self.invite_token = None
         self.invite_link = None
-        
-        self.test_results = []
-        
-    def log_test(self, test_name: str, passed: bool, message: str = ""):
-        """Log test result"""
-        status = f"{Colors.GREEN}✓ PASS{Colors.RESET}" if passed else f"{Colors.RED}✗ FAIL{Colors.RESET}"
-        print(f"{status} - {test_name}")
-        if message:
-            print(f"  {message}")
-        self.test_results.append({
-            'test': test_name,
-            'passed': passed,
-            'message': message
-        })
-        
-    def generate_jwt_token(self, user_id: str) -> str:
-        """Generate JWT token for authentication"""
-        payload = {
-            'sub': user_id,
-            'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }
-        return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
-    
+
     def setup_test_data(self):
         """Create test users and boards"""
-        print(f"\n{Colors.BOLD}Setting up test data...{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Setting up test data...{Colors.RESET}")
         
         try:
-            from pymongo import MongoClient
             from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             # Create owner user
             owner_user = db.users.find_one({'email': self.owner_email})
@@ -106,12 +92,12 @@ class FlowSpaceSMTPTester:
                 }
                 result = db.users.insert_one(owner_data)
                 self.owner_id = str(result.inserted_id)
-                print(f"  Created owner user: {self.owner_id}")
+                self.print(f"  Created owner user: {self.owner_id}")
             else:
                 self.owner_id = str(owner_user['_id'])
-                print(f"  Using existing owner user: {self.owner_id}")
+                self.print(f"  Using existing owner user: {self.owner_id}")
             
-            self.owner_token = self.generate_jwt_token(self.owner_id)
+            self.owner_token = generate_jwt_token(self.owner_id)
             
             # Create invitee user
             invitee_user = db.users.find_one({'email': self.invitee_email})
@@ -126,12 +112,12 @@ class FlowSpaceSMTPTester:
                 }
                 result = db.users.insert_one(invitee_data)
                 self.invitee_id = str(result.inserted_id)
-                print(f"  Created invitee user: {self.invitee_id}")
+                self.print(f"  Created invitee user: {self.invitee_id}")
             else:
                 self.invitee_id = str(invitee_user['_id'])
-                print(f"  Using existing invitee user: {self.invitee_id}")
+                self.print(f"  Using existing invitee user: {self.invitee_id}")
             
-            self.invitee_token = self.generate_jwt_token(self.invitee_id)
+            self.invitee_token = generate_jwt_token(self.invitee_id)
             
             # Create viewer user
             viewer_user = db.users.find_one({'email': self.viewer_email})
@@ -146,12 +132,12 @@ class FlowSpaceSMTPTester:
                 }
                 result = db.users.insert_one(viewer_data)
                 self.viewer_id = str(result.inserted_id)
-                print(f"  Created viewer user: {self.viewer_id}")
+                self.print(f"  Created viewer user: {self.viewer_id}")
             else:
                 self.viewer_id = str(viewer_user['_id'])
-                print(f"  Using existing viewer user: {self.viewer_id}")
+                self.print(f"  Using existing viewer user: {self.viewer_id}")
             
-            self.viewer_token = self.generate_jwt_token(self.viewer_id)
+            self.viewer_token = generate_jwt_token(self.viewer_id)
             
             # Create test board A
             owner_obj_id = owner_user['_id'] if owner_user else ObjectId(self.owner_id)
@@ -173,7 +159,7 @@ class FlowSpaceSMTPTester:
             self.board_a_id = str(board_a_result.inserted_id)
             self.column_id = str(board_a_data['columns'][0]['_id'])
             
-            print(f"  Created test board A: {self.board_a_id}")
+            self.print(f"  Created test board A: {self.board_a_id}")
             
             # Create test board B
             board_b_data = {
@@ -190,79 +176,46 @@ class FlowSpaceSMTPTester:
             board_b_result = db.boards.insert_one(board_b_data)
             self.board_b_id = str(board_b_result.inserted_id)
             
-            print(f"  Created test board B: {self.board_b_id}")
+            self.print(f"  Created test board B: {self.board_b_id}")
             
             return True
             
         except Exception as e:
-            print(f"{Colors.RED}Failed to setup test data: {str(e)}{Colors.RESET}")
-            import traceback
-            traceback.print_exc()
+            self.print(f"{Colors.RED}Failed to setup test data: {str(e)}{Colors.RESET}")
+            self.print(traceback.format_exc())
             return False
     
-    def cleanup_test_data(self):
-        """Clean up test data"""
-        print(f"\n{Colors.BOLD}Cleaning up test data...{Colors.RESET}")
+    async def cleanup_test_data(self, snapshot: FixtureSnapshot):
+        """Clean up test data: one bulk delete per collection for the whole namespace"""
+        self.print(f"\n{Colors.BOLD}Cleaning up test data...{Colors.RESET}")
         try:
-            from pymongo import MongoClient
-            from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
-            
-            # Delete test invites
-            if self.board_a_id:
-                db.invites.delete_many({'boardId': ObjectId(self.board_a_id)})
-            if self.board_b_id:
-                db.invites.delete_many({'boardId': ObjectId(self.board_b_id)})
-            print(f"  Deleted test invites")
-            
-            # Delete test cards
-            if self.board_a_id:
-                db.cards.delete_many({'boardId': ObjectId(self.board_a_id)})
-            if self.board_b_id:
-                db.cards.delete_many({'boardId': ObjectId(self.board_b_id)})
-            print(f"  Deleted test cards")
-                
-            # Delete test boards
-            if self.board_a_id:
-                db.boards.delete_one({'_id': ObjectId(self.board_a_id)})
-            if self.board_b_id:
-                db.boards.delete_one({'_id': ObjectId(self.board_b_id)})
-            print(f"  Deleted test boards")
-            
-            # Delete test users
-            db.users.delete_one({'email': self.owner_email})
-            db.users.delete_one({'email': self.invitee_email})
-            db.users.delete_one({'email': self.viewer_email})
-            print(f"  Deleted test users")
-            
+            self.print(f"  Deleted test data ({await asyncio.to_thread(snapshot.discard)})")
         except Exception as e:
-            print(f"{Colors.YELLOW}Warning: Cleanup failed: {str(e)}{Colors.RESET}")
+            self.print(f"{Colors.YELLOW}Warning: Cleanup failed: {str(e)}{Colors.RESET}")
+    
+    async def wait_for_email(self, invite_token: str, timeout: float = MAIL_TIMEOUT) -> Dict:
+        """Poll the invite until the mail queue has finished with it"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            invite = await asyncio.to_thread(get_db().invites.find_one, {'token': invite_token}) or {}
+            status = invite.get('emailStatus', 'missing')
+            if status in ('sent', 'failed', 'skipped', 'missing') or time.perf_counter() > deadline:
+                return {'emailStatus': status, 'emailAttempts': invite.get('emailAttempts', 0),
+                        'emailError': invite.get('emailError')}
+            await asyncio.sleep(0.25)
     
-    def test_1_complete_invite_flow_with_email(self):
+    async def test_1_complete_invite_flow_with_email(self):
         """Test 1: Complete Invite Flow with Email"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}Test 1: Complete Invite Flow with Email{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
-        
-        url = f"{self.base_url}/api/invite"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        invite_data = {
-            'boardId': self.board_a_id,
-            'email': self.invitee_email,
-            'role': 'editor'
-        }
+        self.print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"{Colors.BOLD}Test 1: Complete Invite Flow with Email{Colors.RESET}")
+        self.print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
         
         try:
-            print(f"\n{Colors.BLUE}Sending invite request...{Colors.RESET}")
-            response = requests.post(url, json=invite_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Sending invite request...{Colors.RESET}")
+            response = await self.api.send_invite(self.board_a_id, self.invitee_email, 'editor', token=self.owner_token)
             
-            print(f"Response Status: {response.status_code}")
-            print(f"Response Body: {json.dumps(response.json(), indent=2)}")
+            self.print(f"Response Status: {response.status_code}")
+            self.print(f"Response Body: {json.dumps(response.json(), indent=2)}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -283,42 +236,40 @@ class FlowSpaceSMTPTester:
                     self.invite_token = data['token']
                     self.invite_link = data['inviteLink']
                     
-                    print(f"\n{Colors.GREEN}Invite Details:{Colors.RESET}")
-                    print(f"  Token: {self.invite_token}")
-                    print(f"  Link: {self.invite_link}")
-                    print(f"  Message: {data.get('message')}")
-                    
-                    # Check if email was sent or if there's a warning
-                    email_sent = 'email not sent' not in data.get('message', '').lower()
-                    has_warning = 'warning' in data
+                    self.print(f"\n{Colors.GREEN}Invite Details:{Colors.RESET}")
+                    self.print(f"  Token: {self.invite_token}")
+                    self.print(f"  Link: {self.invite_link}")
+                    self.print(f"  Message: {data.get('message')}")
                     
-                    if email_sent and not has_warning:
+                    # Delivery happens in the background mail queue; follow the
+                    # status persisted on the invite
+                    if 'warning' in data:
                         self.log_test(
                             "SMTP Email Sending",
-                            True,
-                            "Email sent successfully (no warning in response)"
+                            False,
+                            f"Email not sent - Warning: {data['warning']}"
                         )
                     else:
+                        email_status = await self.wait_for_email(self.invite_token)
                         self.log_test(
                             "SMTP Email Sending",
-                            False,
-                            f"Email not sent - Warning: {data.get('warning', 'Check SMTP configuration')}"
+                            email_status['emailStatus'] == 'sent',
+                            f"Email {email_status['emailStatus']} after {email_status['emailAttempts']} attempt(s)"
+                            + (f" - {email_status['emailError']}" if email_status.get('emailError') else "")
                         )
                     
                     # Verify invite in database
-                    time.sleep(0.5)
-                    from pymongo import MongoClient
-                    client = MongoClient('mongodb://localhost:27017/flowspace')
-                    db = client['flowspace']
+                    await asyncio.sleep(0.5)
+                    db = get_db()
                     
-                    invite_doc = db.invites.find_one({'token': self.invite_token})
+                    invite_doc = await asyncio.to_thread(db.invites.find_one, {'token': self.invite_token})
                     if invite_doc:
-                        print(f"\n{Colors.GREEN}Database Verification:{Colors.RESET}")
-                        print(f"  Board ID: {invite_doc['boardId']} (expected: {self.board_a_id})")
-                        print(f"  Email: {invite_doc['email']}")
-                        print(f"  Role: {invite_doc['role']}")
-                        print(f"  Status: {invite_doc['status']}")
-                        print(f"  Expires At: {invite_doc['expiresAt']}")
+                        self.print(f"\n{Colors.GREEN}Database Verification:{Colors.RESET}")
+                        self.print(f"  Board ID: {invite_doc['boardId']} (expected: {self.board_a_id})")
+                        self.print(f"  Email: {invite_doc['email']}")
+                        self.print(f"  Role: {invite_doc['role']}")
+                        self.print(f"  Status: {invite_doc['status']}")
+                        self.print(f"  Expires At: {invite_doc['expiresAt']}")
                         
                         fields_ok = (
                             str(invite_doc['boardId']) == self.board_a_id and
@@ -357,36 +308,21 @@ class FlowSpaceSMTPTester:
                 
         except Exception as e:
             self.log_test("Complete Invite Flow", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_2_invite_with_board_selection(self):
+    async def test_2_invite_with_board_selection(self):
         """Test 2: Invite with Board Selection"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}Test 2: Invite with Board Selection{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"{Colors.BOLD}Test 2: Invite with Board Selection{Colors.RESET}")
+        self.print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
         
         try:
-            from pymongo import MongoClient
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             # Send invite to Board A
-            print(f"\n{Colors.BLUE}Sending invite to Board A...{Colors.RESET}")
-            url = f"{self.base_url}/api/invite"
-            headers = {
-                'Authorization': f'Bearer {self.owner_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            invite_a_data = {
-                'boardId': self.board_a_id,
-                'email': 'board_a_user@example.com',
-                'role': 'editor'
-            }
-            
-            response_a = requests.post(url, json=invite_a_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Sending invite to Board A...{Colors.RESET}")
+            response_a = await self.api.send_invite(self.board_a_id, f'board_a_user+{self.namespace}@example.com', 'editor', token=self.owner_token)
             
             if response_a.status_code == 200:
                 data_a = response_a.json()
@@ -399,8 +335,8 @@ class FlowSpaceSMTPTester:
                 )
                 
                 # Verify in database
-                time.sleep(0.5)
-                invite_a_doc = db.invites.find_one({'token': token_a})
+                await asyncio.sleep(0.5)
+                invite_a_doc = await asyncio.to_thread(db.invites.find_one, {'token': token_a})
                 if invite_a_doc:
                     board_a_match = str(invite_a_doc['boardId']) == self.board_a_id
                     self.log_test(
@@ -412,14 +348,8 @@ class FlowSpaceSMTPTester:
                 self.log_test("Invite for Board A", False, f"Failed: {response_a.status_code}")
             
             # Send invite to Board B
-            print(f"\n{Colors.BLUE}Sending invite to Board B...{Colors.RESET}")
-            invite_b_data = {
-                'boardId': self.board_b_id,
-                'email': 'board_b_user@example.com',
-                'role': 'editor'
-            }
-            
-            response_b = requests.post(url, json=invite_b_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Sending invite to Board B...{Colors.RESET}")
+            response_b = await self.api.send_invite(self.board_b_id, f'board_b_user+{self.namespace}@example.com', 'editor', token=self.owner_token)
             
             if response_b.status_code == 200:
                 data_b = response_b.json()
@@ -432,8 +362,8 @@ class FlowSpaceSMTPTester:
                 )
                 
                 # Verify in database
-                time.sleep(0.5)
-                invite_b_doc = db.invites.find_one({'token': token_b})
+                await asyncio.sleep(0.5)
+                invite_b_doc = await asyncio.to_thread(db.invites.find_one, {'token': token_b})
                 if invite_b_doc:
                     board_b_match = str(invite_b_doc['boardId']) == self.board_b_id
                     self.log_test(
@@ -448,32 +378,25 @@ class FlowSpaceSMTPTester:
             
         except Exception as e:
             self.log_test("Invite with Board Selection", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_3_accept_invite_and_join_board(self):
+    async def test_3_accept_invite_and_join_board(self):
         """Test 3: Accept Invite and Join Board"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}Test 3: Accept Invite and Join Board{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"{Colors.BOLD}Test 3: Accept Invite and Join Board{Colors.RESET}")
+        self.print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
         
         if not self.invite_token:
             self.log_test("Accept Invite", False, "No invite token available from Test 1")
             return False
         
-        url = f"{self.base_url}/api/invite/{self.invite_token}/accept"
-        headers = {
-            'Authorization': f'Bearer {self.invitee_token}',
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            print(f"\n{Colors.BLUE}Accepting invite...{Colors.RESET}")
-            response = requests.post(url, headers=headers)
+            self.print(f"\n{Colors.BLUE}Accepting invite...{Colors.RESET}")
+            response = await self.api.accept_invite(self.invite_token, token=self.invitee_token)
             
-            print(f"Response Status: {response.status_code}")
-            print(f"Response Body: {json.dumps(response.json(), indent=2)}")
+            self.print(f"Response Status: {response.status_code}")
+            self.print(f"Response Body: {json.dumps(response.json(), indent=2)}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -488,18 +411,16 @@ class FlowSpaceSMTPTester:
                 )
                 
                 # Verify user added to board members
-                time.sleep(0.5)
-                from pymongo import MongoClient
+                await asyncio.sleep(0.5)
                 from bson import ObjectId
-                client = MongoClient('mongodb://localhost:27017/flowspace')
-                db = client['flowspace']
+                db = get_db()
                 
-                board = db.boards.find_one({'_id': ObjectId(self.board_a_id)})
+                board = await asyncio.to_thread(db.boards.find_one, {'_id': ObjectId(self.board_a_id)})
                 if board:
-                    print(f"\n{Colors.GREEN}Board Membership Verification:{Colors.RESET}")
+                    self.print(f"\n{Colors.GREEN}Board Membership Verification:{Colors.RESET}")
                     member_ids = [str(m['userId']) for m in board.get('members', [])]
-                    print(f"  Board members: {member_ids}")
-                    print(f"  Invitee ID: {self.invitee_id}")
+                    self.print(f"  Board members: {member_ids}")
+                    self.print(f"  Invitee ID: {self.invitee_id}")
                     
                     is_member = self.invitee_id in member_ids
                     
@@ -519,7 +440,7 @@ class FlowSpaceSMTPTester:
                     self.log_test("Board Membership Verification", False, "Board not found")
                 
                 # Verify invite status changed to 'accepted'
-                invite_doc = db.invites.find_one({'token': self.invite_token})
+                invite_doc = await asyncio.to_thread(db.invites.find_one, {'token': self.invite_token})
                 if invite_doc:
                     status_ok = invite_doc['status'] == 'accepted'
                     self.log_test(
@@ -531,7 +452,7 @@ class FlowSpaceSMTPTester:
                     self.log_test("Invite Status Update", False, "Invite not found")
                 
                 # Note: Socket.io event verification would require WebSocket client
-                print(f"\n{Colors.YELLOW}Note: Socket.io 'board:member-joined' event should be emitted (requires WebSocket client to verify){Colors.RESET}")
+                self.print(f"\n{Colors.YELLOW}Note: Socket.io 'board:member-joined' event should be emitted (requires WebSocket client to verify){Colors.RESET}")
                 
                 return success
             else:
@@ -544,40 +465,26 @@ class FlowSpaceSMTPTester:
                 
         except Exception as e:
             self.log_test("Accept Invite", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_4_verify_collaboration_after_invite(self):
+    async def test_4_verify_collaboration_after_invite(self):
         """Test 4: Verify Collaboration After Invite"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}Test 4: Verify Collaboration After Invite{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"{Colors.BOLD}Test 4: Verify Collaboration After Invite{Colors.RESET}")
+        self.print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
         
         try:
             # Second user creates a card
-            print(f"\n{Colors.BLUE}Second user (invitee) creating a card...{Colors.RESET}")
-            url = f"{self.base_url}/api/cards/{self.board_a_id}/cards"
-            headers = {
-                'Authorization': f'Bearer {self.invitee_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            card_data = {
-                'columnId': self.column_id,
-                'title': 'Collaboration Test Card',
-                'description': 'Card created by second user',
-                'tags': ['collaboration', 'test']
-            }
-            
-            response = requests.post(url, json=card_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Second user (invitee) creating a card...{Colors.RESET}")
+            response = await self.api.create_card(self.board_a_id, self.column_id, 'Collaboration Test Card', 'Card created by second user', tags=['collaboration', 'test'], token=self.invitee_token)
             
             if response.status_code != 201:
                 self.log_test("Second User Card Creation", False, f"Failed: {response.status_code}")
                 return False
             
             card_id = response.json()['card']['_id']
-            print(f"  Card created: {card_id}")
+            self.print(f"  Card created: {card_id}")
             
             self.log_test(
                 "Second User Can Create Card",
@@ -585,14 +492,11 @@ class FlowSpaceSMTPTester:
                 f"Card ID: {card_id}"
             )
             
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # First user fetches cards
-            print(f"\n{Colors.BLUE}First user (owner) fetching cards...{Colors.RESET}")
-            url = f"{self.base_url}/api/cards/{self.board_a_id}/cards"
-            headers = {'Authorization': f'Bearer {self.owner_token}'}
-            
-            response = requests.get(url, headers=headers)
+            self.print(f"\n{Colors.BLUE}First user (owner) fetching cards...{Colors.RESET}")
+            response = await self.api.list_cards(self.board_a_id, token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -606,9 +510,9 @@ class FlowSpaceSMTPTester:
                         break
                 
                 if invitee_card:
-                    print(f"\n{Colors.GREEN}Card Details:{Colors.RESET}")
-                    print(f"  Title: {invitee_card.get('title')}")
-                    print(f"  Created By: {invitee_card.get('createdBy')}")
+                    self.print(f"\n{Colors.GREEN}Card Details:{Colors.RESET}")
+                    self.print(f"  Title: {invitee_card.get('title')}")
+                    self.print(f"  Created By: {invitee_card.get('createdBy')}")
                     
                     # Verify card has createdBy field
                     has_created_by = 'createdBy' in invitee_card
@@ -653,51 +557,33 @@ class FlowSpaceSMTPTester:
                 
         except Exception as e:
             self.log_test("Verify Collaboration", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_5_test_permissions(self):
+    async def test_5_test_permissions(self):
         """Test 5: Test Permissions"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}Test 5: Test Permissions{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+        self.print(f"{Colors.BOLD}Test 5: Test Permissions{Colors.RESET}")
+        self.print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
         
         try:
-            from pymongo import MongoClient
             from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             # Send invite with role='viewer'
-            print(f"\n{Colors.BLUE}Sending invite with role='viewer'...{Colors.RESET}")
-            url = f"{self.base_url}/api/invite"
-            headers = {
-                'Authorization': f'Bearer {self.owner_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            invite_data = {
-                'boardId': self.board_a_id,
-                'email': self.viewer_email,
-                'role': 'viewer'
-            }
-            
-            response = requests.post(url, json=invite_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Sending invite with role='viewer'...{Colors.RESET}")
+            response = await self.api.send_invite(self.board_a_id, self.viewer_email, 'viewer', token=self.owner_token)
             
             if response.status_code != 200:
                 self.log_test("Create Viewer Invite", False, f"Failed: {response.status_code}")
                 return False
             
             viewer_token = response.json().get('token')
-            print(f"  Viewer invite token: {viewer_token}")
+            self.print(f"  Viewer invite token: {viewer_token}")
             
             # Viewer accepts invite
-            print(f"\n{Colors.BLUE}Viewer accepting invite...{Colors.RESET}")
-            url = f"{self.base_url}/api/invite/{viewer_token}/accept"
-            headers = {'Authorization': f'Bearer {self.viewer_token}'}
-            
-            response = requests.post(url, headers=headers)
+            self.print(f"\n{Colors.BLUE}Viewer accepting invite...{Colors.RESET}")
+            response = await self.api.accept_invite(viewer_token, token=self.viewer_token)
             
             if response.status_code != 200:
                 self.log_test("Viewer Accept Invite", False, f"Failed: {response.status_code}")
@@ -709,23 +595,11 @@ class FlowSpaceSMTPTester:
                 "Viewer successfully joined board"
             )
             
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # Test: Viewer CANNOT send invites (should get 403)
-            print(f"\n{Colors.BLUE}Testing viewer cannot send invites...{Colors.RESET}")
-            url = f"{self.base_url}/api/invite"
-            headers = {
-                'Authorization': f'Bearer {self.viewer_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            invite_data = {
-                'boardId': self.board_a_id,
-                'email': 'another@example.com',
-                'role': 'editor'
-            }
-            
-            response = requests.post(url, json=invite_data, headers=headers)
+            self.print(f"\n{Colors.BLUE}Testing viewer cannot send invites...{Colors.RESET}")
+            response = await self.api.send_invite(self.board_a_id, 'another@example.com', 'editor', token=self.viewer_token)
             
             viewer_blocked = response.status_code == 403
             
@@ -736,11 +610,8 @@ class FlowSpaceSMTPTester:
             )
             
             # Test: Viewer CAN view cards
-            print(f"\n{Colors.BLUE}Testing viewer can view cards...{Colors.RESET}")
-            url = f"{self.base_url}/api/cards/{self.board_a_id}/cards"
-            headers = {'Authorization': f'Bearer {self.viewer_token}'}
-            
-            response = requests.get(url, headers=headers)
+            self.print(f"\n{Colors.BLUE}Testing viewer can view cards...{Colors.RESET}")
+            response = await self.api.list_cards(self.board_a_id, token=self.viewer_token)
             
             viewer_can_view = response.status_code == 200
             
@@ -754,36 +625,219 @@ class FlowSpaceSMTPTester:
             
         except Exception as e:
             self.log_test("Test Permissions", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
+
+# Scenarios run concurrently, each on its own fixtures; steps within one
+# scenario run in order because later steps build on earlier ones
+SCENARIOS = {
+    'invite_flow': [
+        'test_1_complete_invite_flow_with_email',
+        'test_3_accept_invite_and_join_board',
+        'test_4_verify_collaboration_after_invite',
+    ],
+    'board_selection': ['test_2_invite_with_board_selection'],
+    'permissions': ['test_5_test_permissions'],
+}
+
+async def run_scenario(name: str, steps: List[str], api: AsyncFlowSpaceClient,
+                       semaphore: asyncio.Semaphore, run_id: str, repeat: int) -> Tuple[List[Dict], List[ResetCost]]:
+    """Seed one scenario's fixtures, run its steps in order (restoring the
+    fixture snapshot between repeats), clean up"""
+    async with semaphore:
+        started = time.perf_counter()
+        tester = FlowSpaceSMTPTester(api, f'{name}.{run_id}')
+        snapshot = FixtureSnapshot(get_db(), namespace_scope(tester.namespace))
+        tester.print(f"\n{Colors.BOLD}{Colors.BLUE}Scenario: {name}{Colors.RESET}")
+        labels: List[str] = []
+        try:
+            # pymongo blocks, so fixture work runs in a thread to keep the
+            # other scenarios' requests moving
+            if not await asyncio.to_thread(tester.setup_test_data):
+                tester.log_test(f"{name} setup", False, "Failed to setup test data")
+                return tester.test_results, snapshot.costs
+            tester.print(f"  Fixture snapshot ({await asyncio.to_thread(snapshot.capture)})")
+            # Ids and tokens from setup; steps overwrite the rest (invite token, card id...)
+            fixture_state = {k: v for k, v in vars(tester).items() if k not in ('api', 'output', 'test_results')}
+            for run in range(repeat):
+                if run:
+                    cost = await asyncio.to_thread(snapshot.restore)
+                    vars(tester).update(fixture_state)
+                    tester.print(f"\n{Colors.BOLD}Run {run + 1}/{repeat}{Colors.RESET} (fixture {cost})")
+                for step in steps:
+                    await getattr(tester, step)()
+                label = name if repeat == 1 else f'{name}#{run + 1}'
+                labels += [label] * (len(tester.test_results) - len(labels))
+        finally:
+            await tester.cleanup_test_data(snapshot)
+            tester.print(f"{Colors.BOLD}Scenario {name} finished in {time.perf_counter() - started:.2f}s{Colors.RESET}")
+            print('\n'.join(tester.output))
+            for i, result in enumerate(tester.test_results):
+                result['scenario'] = labels[i] if i < len(labels) else name
+        return tester.test_results, snapshot.costs
+
+def print_reset_costs(costs: List[ResetCost]):
+    print(f"\n{Colors.BOLD}Fixture reset cost{Colors.RESET}")
+    for kind, row in summarize_costs(costs).items():
+        print(f"  {kind:<8} {row['count']:>4}x  {row['docs']:>6} docs  "
+              f"mean {row['mean_ms']}ms  max {row['max_ms']}ms  total {row['total_ms']}ms")
+
+async def run_mail_bench(api: AsyncFlowSpaceClient, sink: SMTPSink, run_id: str,
+                         invites: int, concurrency: int) -> Tuple[List[Dict], Dict]:
+    """Fire a burst of invites and follow them through the mail queue into the sink"""
+    tester = FlowSpaceSMTPTester(api, f'mail_bench.{run_id}')
+    snapshot = FixtureSnapshot(get_db(), namespace_scope(tester.namespace))
+    tester.print(f"\n{Colors.BOLD}{Colors.BLUE}Mail benchmark: {invites} invites at concurrency {concurrency}{Colors.RESET}")
+    report: Dict = {}
+    try:
+        if not await asyncio.to_thread(tester.setup_test_data):
+            tester.log_test("mail_bench setup", False, "Failed to setup test data")
+            return tester.test_results, report
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def invite(i: int) -> ApiResponse:
+            async with semaphore:
+                return await api.send_invite(tester.board_a_id, f'bench{i}+{tester.namespace}@example.com',
+                                             'editor', token=tester.owner_token)
+
+        sink.reset()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(invite(i) for i in range(invites)), return_exceptions=True)
+        api_seconds = time.perf_counter() - started
+        ok = [r for r in responses if isinstance(r, ApiResponse) and r.status_code == 200]
+        latencies = [r.elapsed_ms for r in ok]
+
+        deadline = time.perf_counter() + MAIL_TIMEOUT
+        while sink.messages < len(ok) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        delivered_seconds = time.perf_counter() - started
+
+        # The queue records a batch as sent only after the whole batch has
+        # gone out, so wait for the statuses to settle as well
+        from bson import ObjectId
+        pipeline = [
+            {'$match': {'boardId': ObjectId(tester.board_a_id), 'email': {'$regex': '^bench'}}},
+            {'$group': {'_id': '$emailStatus', 'count': {'$sum': 1}}},
+        ]
+        while True:
+            statuses = await asyncio.to_thread(
+                lambda: {row['_id']: row['count'] for row in get_db().invites.aggregate(pipeline)})
+            if not (statuses.get('queued') or statuses.get('sending')) or time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(0.1)
+        report = {
+            'invites': invites,
+            'concurrency': concurrency,
+            'api': {
+                'accepted': len(ok),
+                'seconds': round(api_seconds, 3),
+                'rps': round(len(ok) / api_seconds, 1) if api_seconds else 0.0,
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+            },
+            'mail': dict(sink.stats(), delivered_after_seconds=round(delivered_seconds, 3)),
+            'email_status': statuses,
+        }
+        tester.log_test("Invite API Under Load", len(ok) == invites, f"{len(ok)}/{invites} invites accepted")
+        tester.log_test("Invite Mail Delivered to Sink", sink.messages >= len(ok),
+                        f"{sink.messages}/{len(ok)} messages in {delivered_seconds:.2f}s")
+        tester.log_test("Invite Email Status Persisted", statuses.get('sent', 0) == len(ok), f"Statuses: {statuses}")
+    finally:
+        await tester.cleanup_test_data(snapshot)
+        print('\n'.join(tester.output))
+        for result in tester.test_results:
+            result['scenario'] = 'mail_bench'
+    return tester.test_results, report
+
+def print_mail_bench(report: Dict):
+    if not report:
+        return
+    api, mail = report['api'], report['mail']
+    print(f"\n{Colors.BOLD}Invite mail benchmark (local SMTP sink){Colors.RESET}")
+    print(f"  Invite API: {api['accepted']}/{report['invites']} in {api['seconds']}s "
+          f"({Colors.GREEN}{api['rps']} req/s{Colors.RESET}), "
+          f"p50/p95/p99 {api['p50_ms']} / {api['p95_ms']} / {api['p99_ms']} ms")
+    print(f"  Mail: {mail['messages']} messages, {Colors.GREEN}{mail['messages_per_second'] or '-'} msg/s{Colors.RESET}, "
+          f"last delivered {mail['delivered_after_seconds']}s after the first request")
+    print(f"  Email status: {report['email_status']}")
+
+def print_summary(results: List[Dict], elapsed: float) -> bool:
+    """Print test summary"""
+    print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}TEST SUMMARY{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
     
-    def print_summary(self):
-        """Print test summary"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}TEST SUMMARY{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
-        
-        passed = sum(1 for r in self.test_results if r['passed'])
-        total = len(self.test_results)
-        
-        print(f"\nTotal Tests: {total}")
-        print(f"{Colors.GREEN}Passed: {passed}{Colors.RESET}")
-        print(f"{Colors.RED}Failed: {total - passed}{Colors.RESET}")
-        
-        if total - passed > 0:
-            print(f"\n{Colors.RED}Failed Tests:{Colors.RESET}")
-            for result in self.test_results:
-                if not result['passed']:
-                    print(f"  ✗ {result['test']}")
-                    if result['message']:
-                        print(f"    {result['message']}")
-        
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}\n")
-        
-        return passed == total
+    passed = sum(1 for r in results if r['passed'])
+    total = len(results)
+    
+    print(f"\nTotal Tests: {total} in {elapsed:.2f}s")
+    print(f"{Colors.GREEN}Passed: {passed}{Colors.RESET}")
+    print(f"{Colors.RED}Failed: {total - passed}{Colors.RESET}")
+    
+    if total - passed > 0:
+        print(f"\n{Colors.RED}Failed Tests:{Colors.RESET}")
+        for result in results:
+            if not result['passed']:
+                print(f"  ✗ [{result['scenario']}] {result['test']}")
+                if result['message']:
+                    print(f"    {result['message']}")
+    
+    print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}\n")
+    
+    return passed == total
+
+async def run_all(scenarios: Dict[str, List[str]], parallel: int, base_url: str, timings: bool,
+                  repeat: int, smtp_sink: Optional[str] = None, bench_invites: int = 0,
+                  bench_concurrency: int = 16, bench_url: str = NODE_URL) -> bool:
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(parallel)
+    sink = None
+    if smtp_sink:
+        host, port = smtp_sink.rsplit(':', 1)
+        sink = SMTPSink(host, int(port))
+        await sink.start()
+        print(f"  SMTP sink listening on {smtp_sink}")
+    started = time.perf_counter()
+    mail_report: Dict = {}
+    try:
+        async with AsyncFlowSpaceClient(base_url, connections=parallel * 4, timings=CallTimings()) as api:
+            batches = await asyncio.gather(*(
+                run_scenario(name, steps, api, semaphore, run_id, repeat) for name, steps in scenarios.items()
+            ))
+            if sink is not None and bench_invites:
+                # Same timings report, but straight to Node (see the module docstring)
+                async with AsyncFlowSpaceClient(bench_url, connections=bench_concurrency,
+                                                timings=api.timings) as bench_api:
+                    bench_results, mail_report = await run_mail_bench(bench_api, sink, run_id, bench_invites,
+                                                                      bench_concurrency)
+                batches.append((bench_results, []))
+    finally:
+        if sink is not None:
+            await sink.close()
+    elapsed = time.perf_counter() - started
+    if timings:
+        print_timing_report(api.timings, elapsed)
+    print_reset_costs([cost for _, costs in batches for cost in costs])
+    print_mail_bench(mail_report)
+    return print_summary([r for results, _ in batches for r in results], elapsed)
 
 def main():
+    parser = argparse.ArgumentParser(description='FlowSpace SMTP invite backend tests')
+    parser.add_argument('--parallel', type=int, default=len(SCENARIOS), help='Scenarios to run at once')
+    parser.add_argument('--only', action='append', choices=sorted(SCENARIOS), help='Run just these scenarios')
+    parser.add_argument('--base-url', default=BACKEND_URL, help='FlowSpace backend (or proxy) URL')
+    parser.add_argument('--timings', action='store_true', help='Print per-endpoint latency after the run')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run each scenario this many times, restoring its fixture snapshot in between')
+    parser.add_argument('--smtp-sink', help='host:port for a local SMTP sink, e.g. 127.0.0.1:2525')
+    parser.add_argument('--bench-invites', type=int, default=200, help='Invites to fire in the sink benchmark (0 = skip)')
+    parser.add_argument('--bench-concurrency', type=int, default=16)
+    parser.add_argument('--bench-url', default=NODE_URL,
+                        help='Where the sink benchmark sends invites (Node, bypassing the proxy rate limiter)')
+    parser.add_argument('--bench-only', action='store_true', help='Skip the scenarios, run only the sink benchmark')
+    args = parser.parse_args()
+
     print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
     print(f"{Colors.BOLD}FlowSpace SMTP Email Testing - Invite System{Colors.RESET}")
     print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
@@ -794,29 +848,14 @@ def main():
     print(f"  Frontend URL: {os.getenv('FRONTEND_URL', 'Not configured')}")
     print(f"  App URL: {os.getenv('APP_URL', 'Not configured')}")
     
-    tester = FlowSpaceSMTPTester()
-    
-    # Setup
-    if not tester.setup_test_data():
-        print(f"\n{Colors.RED}Failed to setup test data. Exiting.{Colors.RESET}")
-        return False
-    
-    try:
-        # Run all tests
-        tester.test_1_complete_invite_flow_with_email()
-        tester.test_2_invite_with_board_selection()
-        tester.test_3_accept_invite_and_join_board()
-        tester.test_4_verify_collaboration_after_invite()
-        tester.test_5_test_permissions()
-        
-        # Print summary
-        all_passed = tester.print_summary()
-        
-        return all_passed
-        
-    finally:
-        # Cleanup
-        tester.cleanup_test_data()
+    scenarios = {name: SCENARIOS[name] for name in (args.only or SCENARIOS)}
+    if args.bench_only:
+        if not args.smtp_sink:
+            parser.error('--bench-only needs --smtp-sink')
+        scenarios = {}
+    return asyncio.run(run_all(scenarios, max(args.parallel, 1), args.base_url, args.timings,
+                               max(args.repeat, 1), args.smtp_sink, args.bench_invites,
+                               max(args.bench_concurrency, 1), args.bench_url))
 
 if __name__ == "__main__":
     success = main()
@@ -2,96 +2,69 @@
 """
 Backend API Testing for FlowSpace Collaboration Features
 Tests avatars, activity tracking, and user collaboration
+
+Each scenario gets its own namespaced users and board, so scenarios run
+concurrently (--parallel); the steps inside a scenario stay in order
 """
 
-import requests
-import json
-import jwt
-import os
+import argparse
+import asyncio
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional
-
-# Configuration
-BACKEND_URL = "http://localhost:8001"
+import traceback
+import uuid
+from datetime import datetime
+from typing import Dict, List, Tuple
 
-# Load JWT secret from .env file
-def load_jwt_secret():
-    try:
-        with open('/app/.env', 'r') as f:
-            for line in f:
-                if line.startswith('JWT_ACCESS_SECRET='):
-                    secret = line.split('=', 1)[1].strip()
-                    # Remove quotes if present
-                    return secret.strip('"').strip("'")
-    except Exception as e:
-        print(f"Error loading JWT secret: {e}")
-    return 'flowspace_access_secret_2024_secure'
+from flowspace_client import (
+    BACKEND_URL, JWT_SECRET, MONGO_URL, AsyncFlowSpaceClient, CallTimings, Colors, TestLog,
+    generate_jwt_token, print_timing_report,
+)
+from flowspace_fixtures import FixtureSnapshot, ResetCost, namespace_scope, summarize_costs
 
-JWT_SECRET = load_jwt_secret()
 print(f"Using JWT Secret: {JWT_SECRET[:20]}...")
 
-class Colors:
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
+_db = None
+
+def get_db():
+    """Shared MongoDB handle; one connection pool for every scenario"""
+    global _db
+    if _db is None:
+        from pymongo import MongoClient
+        _db = MongoClient(MONGO_URL)['flowspace']
+    return _db
 
-class FlowSpaceInviteTester:
-    def __init__(self):
-        self.base_url = BACKEND_URL
+class FlowSpaceInviteTester(TestLog):
+    def __init__(self, api: AsyncFlowSpaceClient, namespace: str):
+        super().__init__()
+        self.api = api
+        # Suffix for this scenario's emails so concurrent scenarios never share data
+        self.namespace = namespace
         # Owner user
         self.owner_token = None
         self.owner_id = None
-        self.owner_email = 'owner@flowspace.com'
+        self.owner_email = f'owner.{namespace}@flowspace.com'
         # Invitee user
         self.invitee_token = None
         self.invitee_id = None
-        self.invitee_email = 'invitee@flowspace.com'
+        self.invitee_email = f'invitee.{namespace}@flowspace.com'
         # Viewer user (for permission tests)
         self.viewer_token = None
         self.viewer_id = None
-        self.viewer_email = 'viewer@flowspace.com'
+        self.viewer_email = f'viewer.{namespace}@flowspace.com'
         # Board and invite data
         self.board_id = None
         self.column_id = None
         self.card_id = None
         self.invite_token = None
         self.invite_link = None
-        self.test_results = []
-        
-    def log_test(self, test_name: str, passed: bool, message: str = ""):
-        """Log test result"""
-        status = f"{Colors.GREEN}✓ PASS{Colors.RESET}" if passed else f"{Colors.RED}✗ FAIL{Colors.RESET}"
-        print(f"{status} - {test_name}")
-        if message:
-            print(f"  {message}")
-        self.test_results.append({
-            'test': test_name,
-            'passed': passed,
-            'message': message
-        })
-        
-    def generate_jwt_token(self, user_id: str) -> str:
-        """Generate JWT token for authentication"""
-        payload = {
-            'sub': user_id,
-            'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }
-        return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
-    
+
     def setup_test_data(self):
         """Create test users and board"""
-        print(f"\n{Colors.BOLD}Setting up test data...{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Setting up test data...{Colors.RESET}")
         
         try:
-            from pymongo import MongoClient
             from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             # Create owner user
             owner_user = db.users.find_one({'email': self.owner_email})
@@ -106,7 +79,7 @@ class FlowSpaceInviteTester:
                 }
                 result = db.users.insert_one(owner_data)
                 self.owner_id = str(result.inserted_id)
-                print(f"  Created owner user: {self.owner_id}")
+                self.print(f"  Created owner user: {self.owner_id}")
             else:
                 self.owner_id = str(owner_user['_id'])
                 # Update with avatarUrl if missing
@@ -115,9 +88,9 @@ class FlowSpaceInviteTester:
                         {'_id': owner_user['_id']},
                         {'$set': {'avatarUrl': 'https://api.dicebear.com/7.x/avataaars/svg?seed=owner'}}
                     )
-                print(f"  Using existing owner user: {self.owner_id}")
+                self.print(f"  Using existing owner user: {self.owner_id}")
             
-            self.owner_token = self.generate_jwt_token(self.owner_id)
+            self.owner_token = generate_jwt_token(self.owner_id)
             
             # Create invitee user
             invitee_user = db.users.find_one({'email': self.invitee_email})
@@ -132,7 +105,7 @@ class FlowSpaceInviteTester:
                 }
                 result = db.users.insert_one(invitee_data)
                 self.invitee_id = str(result.inserted_id)
-                print(f"  Created invitee user: {self.invitee_id}")
+                self.print(f"  Created invitee user: {self.invitee_id}")
             else:
                 self.invitee_id = str(invitee_user['_id'])
                 # Update with avatarUrl if missing
@@ -141,9 +114,9 @@ class FlowSpaceInviteTester:
                         {'_id': invitee_user['_id']},
                         {'$set': {'avatarUrl': 'https://api.dicebear.com/7.x/avataaars/svg?seed=invitee'}}
                     )
-                print(f"  Using existing invitee user: {self.invitee_id}")
+                self.print(f"  Using existing invitee user: {self.invitee_id}")
             
-            self.invitee_token = self.generate_jwt_token(self.invitee_id)
+            self.invitee_token = generate_jwt_token(self.invitee_id)
             
             # Create viewer user (for permission tests)
             viewer_user = db.users.find_one({'email': self.viewer_email})
@@ -158,7 +131,7 @@ class FlowSpaceInviteTester:
                 }
                 result = db.users.insert_one(viewer_data)
                 self.viewer_id = str(result.inserted_id)
-                print(f"  Created viewer user: {self.viewer_id}")
+                self.print(f"  Created viewer user: {self.viewer_id}")
             else:
                 self.viewer_id = str(viewer_user['_id'])
                 # Update with avatarUrl if missing
@@ -167,9 +140,9 @@ class FlowSpaceInviteTester:
                         {'_id': viewer_user['_id']},
                         {'$set': {'avatarUrl': 'https://api.dicebear.com/7.x/avataaars/svg?seed=viewer'}}
                     )
-                print(f"  Using existing viewer user: {self.viewer_id}")
+                self.print(f"  Using existing viewer user: {self.viewer_id}")
             
-            self.viewer_token = self.generate_jwt_token(self.viewer_id)
+            self.viewer_token = generate_jwt_token(self.viewer_id)
             
             # Create test board owned by owner
             owner_obj_id = owner_user['_id'] if owner_user else ObjectId(self.owner_id)
@@ -191,67 +164,30 @@ class FlowSpaceInviteTester:
             self.board_id = str(board_result.inserted_id)
             self.column_id = str(board_data['columns'][0]['_id'])
             
-            print(f"  Created test board: {self.board_id}")
-            print(f"  Column ID: {self.column_id}")
+            self.print(f"  Created test board: {self.board_id}")
+            self.print(f"  Column ID: {self.column_id}")
             
             return True
             
         except Exception as e:
-            print(f"{Colors.RED}Failed to setup test data: {str(e)}{Colors.RESET}")
-            import traceback
-            traceback.print_exc()
+            self.print(f"{Colors.RED}Failed to setup test data: {str(e)}{Colors.RESET}")
+            self.print(traceback.format_exc())
             return False
     
-    def cleanup_test_data(self):
-        """Clean up test data"""
-        print(f"\n{Colors.BOLD}Cleaning up test data...{Colors.RESET}")
+    async def cleanup_test_data(self, snapshot: FixtureSnapshot):
+        """Clean up test data: one bulk delete per collection for the whole namespace"""
+        self.print(f"\n{Colors.BOLD}Cleaning up test data...{Colors.RESET}")
         try:
-            from pymongo import MongoClient
-            from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
-            
-            # Delete test invites
-            if self.board_id:
-                db.invites.delete_many({'boardId': ObjectId(self.board_id)})
-                print(f"  Deleted test invites")
-            
-            # Delete test cards
-            if self.board_id:
-                db.cards.delete_many({'boardId': ObjectId(self.board_id)})
-                print(f"  Deleted test cards")
-                
-                # Delete test board
-                db.boards.delete_one({'_id': ObjectId(self.board_id)})
-                print(f"  Deleted test board")
-            
-            # Delete test users
-            db.users.delete_one({'email': self.owner_email})
-            db.users.delete_one({'email': self.invitee_email})
-            db.users.delete_one({'email': self.viewer_email})
-            print(f"  Deleted test users")
-            
+            self.print(f"  Deleted test data ({await asyncio.to_thread(snapshot.discard)})")
         except Exception as e:
-            print(f"{Colors.YELLOW}Warning: Cleanup failed: {str(e)}{Colors.RESET}")
+            self.print(f"{Colors.YELLOW}Warning: Cleanup failed: {str(e)}{Colors.RESET}")
     
-    def test_create_invite(self):
+    async def test_create_invite(self):
         """Test POST /api/invite - Create invite link"""
-        print(f"\n{Colors.BOLD}Test 1: Create Invite Link{Colors.RESET}")
-        
-        url = f"{self.base_url}/api/invite"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        invite_data = {
-            'boardId': self.board_id,
-            'email': self.invitee_email,
-            'role': 'editor'
-        }
+        self.print(f"\n{Colors.BOLD}Test 1: Create Invite Link{Colors.RESET}")
         
         try:
-            response = requests.post(url, json=invite_data, headers=headers)
+            response = await self.api.send_invite(self.board_id, self.invitee_email, 'editor', token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -270,16 +206,14 @@ class FlowSpaceInviteTester:
                 if has_token:
                     self.invite_token = data['token']
                     self.invite_link = data.get('inviteLink', '')
-                    print(f"  Invite token: {self.invite_token}")
-                    print(f"  Invite link: {self.invite_link}")
+                    self.print(f"  Invite token: {self.invite_token}")
+                    self.print(f"  Invite link: {self.invite_link}")
                     
                     # Verify invite in database
-                    time.sleep(0.5)
-                    from pymongo import MongoClient
-                    client = MongoClient('mongodb://localhost:27017/flowspace')
-                    db = client['flowspace']
+                    await asyncio.sleep(0.5)
+                    db = get_db()
                     
-                    invite_doc = db.invites.find_one({'token': self.invite_token})
+                    invite_doc = await asyncio.to_thread(db.invites.find_one, {'token': self.invite_token})
                     if invite_doc:
                         # Check fields
                         fields_ok = (
@@ -314,26 +248,19 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Invite Creation API", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_accept_invite(self):
+    async def test_accept_invite(self):
         """Test POST /api/invite/:token/accept - Accept invite"""
-        print(f"\n{Colors.BOLD}Test 2: Accept Invite{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 2: Accept Invite{Colors.RESET}")
         
         if not self.invite_token:
             self.log_test("Accept Invite API", False, "No invite token available")
             return False
         
-        url = f"{self.base_url}/api/invite/{self.invite_token}/accept"
-        headers = {
-            'Authorization': f'Bearer {self.invitee_token}',
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            response = requests.post(url, headers=headers)
+            response = await self.api.accept_invite(self.invite_token, token=self.invitee_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -348,13 +275,11 @@ class FlowSpaceInviteTester:
                 )
                 
                 # Verify user added to board members
-                time.sleep(0.5)
-                from pymongo import MongoClient
+                await asyncio.sleep(0.5)
                 from bson import ObjectId
-                client = MongoClient('mongodb://localhost:27017/flowspace')
-                db = client['flowspace']
+                db = get_db()
                 
-                board = db.boards.find_one({'_id': ObjectId(self.board_id)})
+                board = await asyncio.to_thread(db.boards.find_one, {'_id': ObjectId(self.board_id)})
                 if board:
                     member_ids = [str(m['userId']) for m in board.get('members', [])]
                     is_member = self.invitee_id in member_ids
@@ -375,7 +300,7 @@ class FlowSpaceInviteTester:
                     self.log_test("Board Membership Verification", False, "Board not found")
                 
                 # Verify invite status changed to 'accepted'
-                invite_doc = db.invites.find_one({'token': self.invite_token})
+                invite_doc = await asyncio.to_thread(db.invites.find_one, {'token': self.invite_token})
                 if invite_doc:
                     status_ok = invite_doc['status'] == 'accepted'
                     self.log_test(
@@ -397,19 +322,15 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Accept Invite API", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_list_invites(self):
+    async def test_list_invites(self):
         """Test GET /api/invite/board/:boardId - List invites"""
-        print(f"\n{Colors.BOLD}Test 3: List Invites{Colors.RESET}")
-        
-        url = f"{self.base_url}/api/invite/board/{self.board_id}"
-        headers = {'Authorization': f'Bearer {self.owner_token}'}
+        self.print(f"\n{Colors.BOLD}Test 3: List Invites{Colors.RESET}")
         
         try:
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_invites(self.board_id, token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -464,20 +385,16 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("List Invites API", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_member_board_access(self):
+    async def test_member_board_access(self):
         """Test board member can access board and see it in their board list"""
-        print(f"\n{Colors.BOLD}Test 4: Board Member Access{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 4: Board Member Access{Colors.RESET}")
         
         # Test 4a: GET /api/boards - verify member sees boards they're a member of
-        url = f"{self.base_url}/api/boards"
-        headers = {'Authorization': f'Bearer {self.invitee_token}'}
-        
         try:
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_boards(token=self.invitee_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -504,8 +421,7 @@ class FlowSpaceInviteTester:
                 return False
             
             # Test 4b: GET /api/boards/:id - verify member can access board details
-            url = f"{self.base_url}/api/boards/{self.board_id}"
-            response = requests.get(url, headers=headers)
+            response = await self.api.get_board(self.board_id, token=self.invitee_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -533,37 +449,23 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Member Board Access", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_member_card_access(self):
+    async def test_member_card_access(self):
         """Test board member can see cards"""
-        print(f"\n{Colors.BOLD}Test 5: Member Card Access{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 5: Member Card Access{Colors.RESET}")
         
         # First create a test card as owner
-        url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        card_data = {
-            'columnId': self.column_id,
-            'title': 'Collaboration Test Card',
-            'description': 'Testing member access to cards',
-            'tags': ['test', 'collaboration']
-        }
-        
         try:
             # Create card as owner
-            response = requests.post(url, json=card_data, headers=headers)
+            response = await self.api.create_card(self.board_id, self.column_id, 'Collaboration Test Card', 'Testing member access to cards', tags=['test', 'collaboration'], token=self.owner_token)
             
             if response.status_code == 201:
                 data = response.json()
                 if 'card' in data:
                     self.card_id = data['card']['_id']
-                    print(f"  Created test card: {self.card_id}")
+                    self.print(f"  Created test card: {self.card_id}")
                 else:
                     self.log_test("Member Card Access - Setup", False, "Failed to create test card")
                     return False
@@ -572,11 +474,9 @@ class FlowSpaceInviteTester:
                 return False
             
             # Now test if member can see the card
-            time.sleep(0.5)
-            url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-            headers = {'Authorization': f'Bearer {self.invitee_token}'}
+            await asyncio.sleep(0.5)
             
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_cards(self.board_id, token=self.invitee_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -605,44 +505,30 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Member Card Access", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_permissions(self):
+    async def test_permissions(self):
         """Test permission restrictions"""
-        print(f"\n{Colors.BOLD}Test 6: Permission Testing{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 6: Permission Testing{Colors.RESET}")
         
         # First, add viewer to board
         try:
-            from pymongo import MongoClient
             from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             # Add viewer as a viewer member
-            db.boards.update_one(
+            await asyncio.to_thread(
+                db.boards.update_one,
                 {'_id': ObjectId(self.board_id)},
                 {'$push': {'members': {'userId': ObjectId(self.viewer_id), 'role': 'viewer'}}}
             )
-            print(f"  Added viewer user to board")
+            self.print(f"  Added viewer user to board")
             
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # Test: Viewer cannot send invites
-            url = f"{self.base_url}/api/invite"
-            headers = {
-                'Authorization': f'Bearer {self.viewer_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            invite_data = {
-                'boardId': self.board_id,
-                'email': 'another@test.com',
-                'role': 'editor'
-            }
-            
-            response = requests.post(url, json=invite_data, headers=headers)
+            response = await self.api.send_invite(self.board_id, 'another@test.com', 'editor', token=self.viewer_token)
             
             # Viewer should get 403 Forbidden
             viewer_blocked = response.status_code == 403
@@ -657,25 +543,21 @@ class FlowSpaceInviteTester:
             # Create a new user who is not a member
             non_member_data = {
                 'name': 'Non Member',
-                'email': 'nonmember@test.com',
+                'email': f'nonmember.{self.namespace}@test.com',
                 'password': 'test123',
                 'createdAt': datetime.utcnow(),
                 'updatedAt': datetime.utcnow()
             }
-            result = db.users.insert_one(non_member_data)
+            result = await asyncio.to_thread(db.users.insert_one, non_member_data)
             non_member_id = str(result.inserted_id)
-            non_member_token = self.generate_jwt_token(non_member_id)
+            non_member_token = generate_jwt_token(non_member_id)
             
             # Try to access board as non-member
-            url = f"{self.base_url}/api/boards/{self.board_id}"
-            headers = {'Authorization': f'Bearer {non_member_token}'}
-            
-            response = requests.get(url, headers=headers)
+            response = await self.api.get_board(self.board_id, token=non_member_token)
             
             # Non-member should still be able to GET board (no permission check in getBoard)
             # But they shouldn't see it in their board list
-            url = f"{self.base_url}/api/boards"
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_boards(token=non_member_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -692,35 +574,21 @@ class FlowSpaceInviteTester:
                 self.log_test("Non-Member Board Access", False, f"Unexpected status: {response.status_code}")
             
             # Cleanup non-member
-            db.users.delete_one({'_id': ObjectId(non_member_id)})
+            await asyncio.to_thread(db.users.delete_one, {'_id': ObjectId(non_member_id)})
             
             return viewer_blocked
             
         except Exception as e:
             self.log_test("Permission Testing", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_card_creation_with_user_tracking(self):
+    async def test_card_creation_with_user_tracking(self):
         """Test card creation includes createdBy and updatedBy fields"""
-        print(f"\n{Colors.BOLD}Test 7: Card Creation with User Tracking{Colors.RESET}")
-        
-        url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        card_data = {
-            'columnId': self.column_id,
-            'title': 'Avatar Test Card',
-            'description': 'Testing user tracking with avatars',
-            'tags': ['test', 'avatars']
-        }
+        self.print(f"\n{Colors.BOLD}Test 7: Card Creation with User Tracking{Colors.RESET}")
         
         try:
-            response = requests.post(url, json=card_data, headers=headers)
+            response = await self.api.create_card(self.board_id, self.column_id, 'Avatar Test Card', 'Testing user tracking with avatars', tags=['test', 'avatars'], token=self.owner_token)
             
             if response.status_code == 201:
                 data = response.json()
@@ -739,9 +607,8 @@ class FlowSpaceInviteTester:
                     )
                     
                     # Now fetch the card to verify population
-                    time.sleep(0.5)
-                    url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-                    response = requests.get(url, headers=headers)
+                    await asyncio.sleep(0.5)
+                    response = await self.api.list_cards(self.board_id, token=self.owner_token)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -797,51 +664,26 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Card Creation with User Tracking", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_card_update_with_user_tracking(self):
+    async def test_card_update_with_user_tracking(self):
         """Test card update updates updatedBy field"""
-        print(f"\n{Colors.BOLD}Test 8: Card Update with User Tracking{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 8: Card Update with User Tracking{Colors.RESET}")
         
         # First create a card as owner
-        url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        card_data = {
-            'columnId': self.column_id,
-            'title': 'Update Test Card',
-            'description': 'Testing update tracking',
-            'tags': ['test']
-        }
-        
         try:
-            response = requests.post(url, json=card_data, headers=headers)
+            response = await self.api.create_card(self.board_id, self.column_id, 'Update Test Card', 'Testing update tracking', tags=['test'], token=self.owner_token)
             
             if response.status_code != 201:
                 self.log_test("Card Update Test - Setup", False, "Failed to create test card")
                 return False
             
             card_id = response.json()['card']['_id']
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # Now update the card as invitee (different user)
-            url = f"{self.base_url}/api/cards/{card_id}"
-            headers = {
-                'Authorization': f'Bearer {self.invitee_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            update_data = {
-                'title': 'Updated by Invitee',
-                'description': 'Updated description'
-            }
-            
-            response = requests.put(url, json=update_data, headers=headers)
+            response = await self.api.update_card(card_id, token=self.invitee_token, title='Updated by Invitee', description='Updated description')
             
             if response.status_code == 200:
                 data = response.json()
@@ -859,10 +701,8 @@ class FlowSpaceInviteTester:
                     )
                     
                     # Fetch the card again to verify population
-                    time.sleep(0.5)
-                    url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-                    headers = {'Authorization': f'Bearer {self.owner_token}'}
-                    response = requests.get(url, headers=headers)
+                    await asyncio.sleep(0.5)
+                    response = await self.api.list_cards(self.board_id, token=self.owner_token)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -921,42 +761,25 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Card Update with User Tracking", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_activity_feed_with_avatars(self):
+    async def test_activity_feed_with_avatars(self):
         """Test activity feed includes user avatars"""
-        print(f"\n{Colors.BOLD}Test 9: Activity Feed with Avatars{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 9: Activity Feed with Avatars{Colors.RESET}")
         
         # Create a card to generate activity
-        url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-        headers = {
-            'Authorization': f'Bearer {self.owner_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        card_data = {
-            'columnId': self.column_id,
-            'title': 'Activity Test Card',
-            'description': 'Testing activity logging',
-            'tags': ['activity']
-        }
-        
         try:
-            response = requests.post(url, json=card_data, headers=headers)
+            response = await self.api.create_card(self.board_id, self.column_id, 'Activity Test Card', 'Testing activity logging', tags=['activity'], token=self.owner_token)
             
             if response.status_code != 201:
                 self.log_test("Activity Test - Setup", False, "Failed to create test card")
                 return False
             
-            time.sleep(1)  # Wait for activity to be logged
+            await asyncio.sleep(1)  # Wait for activity to be logged
             
             # Fetch activity feed
-            url = f"{self.base_url}/api/activity"
-            headers = {'Authorization': f'Bearer {self.owner_token}'}
-            
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_activity(token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1018,20 +841,17 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Activity Feed with Avatars", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_invite_with_board_selection(self):
+    async def test_invite_with_board_selection(self):
         """Test invite creation with specific board selection"""
-        print(f"\n{Colors.BOLD}Test 10: Invite with Board Selection{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 10: Invite with Board Selection{Colors.RESET}")
         
         # Create a second board
         try:
-            from pymongo import MongoClient
             from bson import ObjectId
-            client = MongoClient('mongodb://localhost:27017/flowspace')
-            db = client['flowspace']
+            db = get_db()
             
             owner_obj_id = ObjectId(self.owner_id)
             
@@ -1046,25 +866,13 @@ class FlowSpaceInviteTester:
                 'createdAt': datetime.utcnow(),
                 'updatedAt': datetime.utcnow()
             }
-            board2_result = db.boards.insert_one(board2_data)
+            board2_result = await asyncio.to_thread(db.boards.insert_one, board2_data)
             board2_id = str(board2_result.inserted_id)
             
-            print(f"  Created second test board: {board2_id}")
+            self.print(f"  Created second test board: {board2_id}")
             
             # Create invite for board2
-            url = f"{self.base_url}/api/invite"
-            headers = {
-                'Authorization': f'Bearer {self.owner_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            invite_data = {
-                'boardId': board2_id,
-                'email': 'board2invite@test.com',
-                'role': 'editor'
-            }
-            
-            response = requests.post(url, json=invite_data, headers=headers)
+            response = await self.api.send_invite(board2_id, f'board2invite.{self.namespace}@test.com', 'editor', token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1082,8 +890,8 @@ class FlowSpaceInviteTester:
                     token = data['token']
                     
                     # Verify invite in database has correct boardId
-                    time.sleep(0.5)
-                    invite_doc = db.invites.find_one({'token': token})
+                    await asyncio.sleep(0.5)
+                    invite_doc = await asyncio.to_thread(db.invites.find_one, {'token': token})
                     
                     if invite_doc:
                         correct_board = str(invite_doc['boardId']) == board2_id
@@ -1095,16 +903,16 @@ class FlowSpaceInviteTester:
                         )
                         
                         # Cleanup
-                        db.boards.delete_one({'_id': ObjectId(board2_id)})
-                        db.invites.delete_one({'token': token})
+                        await asyncio.to_thread(db.boards.delete_one, {'_id': ObjectId(board2_id)})
+                        await asyncio.to_thread(db.invites.delete_one, {'token': token})
                         
                         return correct_board
                     else:
                         self.log_test("Invite Board Selection", False, "Invite not found in database")
-                        db.boards.delete_one({'_id': ObjectId(board2_id)})
+                        await asyncio.to_thread(db.boards.delete_one, {'_id': ObjectId(board2_id)})
                         return False
                 else:
-                    db.boards.delete_one({'_id': ObjectId(board2_id)})
+                    await asyncio.to_thread(db.boards.delete_one, {'_id': ObjectId(board2_id)})
                     return False
             else:
                 self.log_test(
@@ -1112,48 +920,31 @@ class FlowSpaceInviteTester:
                     False,
                     f"Expected status 200, got {response.status_code}: {response.text}"
                 )
-                db.boards.delete_one({'_id': ObjectId(board2_id)})
+                await asyncio.to_thread(db.boards.delete_one, {'_id': ObjectId(board2_id)})
                 return False
                 
         except Exception as e:
             self.log_test("Invite with Board Selection", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
     
-    def test_multiple_users_collaboration(self):
+    async def test_multiple_users_collaboration(self):
         """Test multiple users collaborating with visible avatars"""
-        print(f"\n{Colors.BOLD}Test 11: Multiple Users Collaboration{Colors.RESET}")
+        self.print(f"\n{Colors.BOLD}Test 11: Multiple Users Collaboration{Colors.RESET}")
         
         try:
             # Invitee creates a card
-            url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-            headers = {
-                'Authorization': f'Bearer {self.invitee_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            card_data = {
-                'columnId': self.column_id,
-                'title': 'Invitee Created Card',
-                'description': 'Card created by second user',
-                'tags': ['collaboration']
-            }
-            
-            response = requests.post(url, json=card_data, headers=headers)
+            response = await self.api.create_card(self.board_id, self.column_id, 'Invitee Created Card', 'Card created by second user', tags=['collaboration'], token=self.invitee_token)
             
             if response.status_code != 201:
                 self.log_test("Multi-User Collaboration - Setup", False, "Invitee failed to create card")
                 return False
             
             card_id = response.json()['card']['_id']
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # Owner fetches cards and verifies they can see invitee's card with avatar
-            url = f"{self.base_url}/api/cards/{self.board_id}/cards"
-            headers = {'Authorization': f'Bearer {self.owner_token}'}
-            
-            response = requests.get(url, headers=headers)
+            response = await self.api.list_cards(self.board_id, token=self.owner_token)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1190,9 +981,8 @@ class FlowSpaceInviteTester:
                     )
                     
                     # Check activity feed for invitee's action
-                    time.sleep(0.5)
-                    url = f"{self.base_url}/api/activity"
-                    response = requests.get(url, headers=headers)
+                    await asyncio.sleep(0.5)
+                    response = await self.api.list_activity(token=self.owner_token)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -1237,71 +1027,126 @@ class FlowSpaceInviteTester:
                 
         except Exception as e:
             self.log_test("Multiple Users Collaboration", False, f"Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.print(traceback.format_exc())
             return False
+
+# Scenarios run concurrently, each on its own fixtures; steps within one
+# scenario run in order because later steps build on earlier ones
+SCENARIOS = {
+    'invite_flow': [
+        'test_create_invite',
+        'test_accept_invite',
+        'test_list_invites',
+        'test_member_board_access',
+        'test_member_card_access',
+        'test_card_update_with_user_tracking',
+        'test_multiple_users_collaboration',
+    ],
+    'permissions': ['test_permissions'],
+    'card_tracking': ['test_card_creation_with_user_tracking'],
+    'activity_feed': ['test_activity_feed_with_avatars'],
+    'board_selection': ['test_invite_with_board_selection'],
+}
+
+async def run_scenario(name: str, steps: List[str], api: AsyncFlowSpaceClient,
+                       semaphore: asyncio.Semaphore, run_id: str, repeat: int) -> Tuple[List[Dict], List[ResetCost]]:
+    """Seed one scenario's fixtures, run its steps in order (restoring the
+    fixture snapshot between repeats), clean up"""
+    async with semaphore:
+        started = time.perf_counter()
+        tester = FlowSpaceInviteTester(api, f'{name}.{run_id}')
+        snapshot = FixtureSnapshot(get_db(), namespace_scope(tester.namespace))
+        tester.print(f"\n{Colors.BOLD}{Colors.BLUE}Scenario: {name}{Colors.RESET}")
+        labels: List[str] = []
+        try:
+            # pymongo blocks, so fixture work runs in a thread to keep the
+            # other scenarios' requests moving
+            if not await asyncio.to_thread(tester.setup_test_data):
+                tester.log_test(f"{name} setup", False, "Failed to setup test data")
+                return tester.test_results, snapshot.costs
+            tester.print(f"  Fixture snapshot ({await asyncio.to_thread(snapshot.capture)})")
+            # Ids and tokens from setup; steps overwrite the rest (invite token, card id...)
+            fixture_state = {k: v for k, v in vars(tester).items() if k not in ('api', 'output', 'test_results')}
+            for run in range(repeat):
+                if run:
+                    cost = await asyncio.to_thread(snapshot.restore)
+                    vars(tester).update(fixture_state)
+                    tester.print(f"\n{Colors.BOLD}Run {run + 1}/{repeat}{Colors.RESET} (fixture {cost})")
+                for step in steps:
+                    await getattr(tester, step)()
+                label = name if repeat == 1 else f'{name}#{run + 1}'
+                labels += [label] * (len(tester.test_results) - len(labels))
+        finally:
+            await tester.cleanup_test_data(snapshot)
+            tester.print(f"{Colors.BOLD}Scenario {name} finished in {time.perf_counter() - started:.2f}s{Colors.RESET}")
+            print('\n'.join(tester.output))
+            for i, result in enumerate(tester.test_results):
+                result['scenario'] = labels[i] if i < len(labels) else name
+        return tester.test_results, snapshot.costs
+
+def print_reset_costs(costs: List[ResetCost]):
+    print(f"\n{Colors.BOLD}Fixture reset cost{Colors.RESET}")
+    for kind, row in summarize_costs(costs).items():
+        print(f"  {kind:<8} {row['count']:>4}x  {row['docs']:>6} docs  "
+              f"mean {row['mean_ms']}ms  max {row['max_ms']}ms  total {row['total_ms']}ms")
+
+def print_summary(results: List[Dict], elapsed: float) -> bool:
+    """Print test summary"""
+    print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}TEST SUMMARY{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
     
-    def print_summary(self):
-        """Print test summary"""
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BOLD}TEST SUMMARY{Colors.RESET}")
-        print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
-        
-        passed = sum(1 for r in self.test_results if r['passed'])
-        total = len(self.test_results)
-        
-        print(f"\nTotal Tests: {total}")
-        print(f"{Colors.GREEN}Passed: {passed}{Colors.RESET}")
-        print(f"{Colors.RED}Failed: {total - passed}{Colors.RESET}")
-        
-        if total - passed > 0:
-            print(f"\n{Colors.RED}Failed Tests:{Colors.RESET}")
-            for result in self.test_results:
-                if not result['passed']:
-                    print(f"  ✗ {result['test']}")
-                    if result['message']:
-                        print(f"    {result['message']}")
-        
-        print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}\n")
-        
-        return passed == total
+    passed = sum(1 for r in results if r['passed'])
+    total = len(results)
+    
+    print(f"\nTotal Tests: {total} in {elapsed:.2f}s")
+    print(f"{Colors.GREEN}Passed: {passed}{Colors.RESET}")
+    print(f"{Colors.RED}Failed: {total - passed}{Colors.RESET}")
+    
+    if total - passed > 0:
+        print(f"\n{Colors.RED}Failed Tests:{Colors.RESET}")
+        for result in results:
+            if not result['passed']:
+                print(f"  ✗ [{result['scenario']}] {result['test']}")
+                if result['message']:
+                    print(f"    {result['message']}")
+    
+    print(f"\n{Colors.BOLD}{'='*60}{Colors.RESET}\n")
+    
+    return passed == total
+
+async def run_all(scenarios: Dict[str, List[str]], parallel: int, base_url: str, timings: bool,
+                  repeat: int) -> bool:
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(parallel)
+    started = time.perf_counter()
+    async with AsyncFlowSpaceClient(base_url, connections=parallel * 4, timings=CallTimings()) as api:
+        batches = await asyncio.gather(*(
+            run_scenario(name, steps, api, semaphore, run_id, repeat) for name, steps in scenarios.items()
+        ))
+    elapsed = time.perf_counter() - started
+    if timings:
+        print_timing_report(api.timings, elapsed)
+    print_reset_costs([cost for _, costs in batches for cost in costs])
+    return print_summary([r for results, _ in batches for r in results], elapsed)
 
 def main():
+    parser = argparse.ArgumentParser(description='FlowSpace collaboration backend tests')
+    parser.add_argument('--parallel', type=int, default=len(SCENARIOS), help='Scenarios to run at once')
+    parser.add_argument('--only', action='append', choices=sorted(SCENARIOS), help='Run just these scenarios')
+    parser.add_argument('--base-url', default=BACKEND_URL, help='FlowSpace backend (or proxy) URL')
+    parser.add_argument('--timings', action='store_true', help='Print per-endpoint latency after the run')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run each scenario this many times, restoring its fixture snapshot in between')
+    args = parser.parse_args()
+
     print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
     print(f"{Colors.BOLD}FlowSpace Backend Testing - Collaboration Features with Avatars{Colors.RESET}")
     print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
     
-    tester = FlowSpaceInviteTester()
-    
-    # Setup
-    if not tester.setup_test_data():
-        print(f"\n{Colors.RED}Failed to setup test data. Exiting.{Colors.RESET}")
-        return False
-    
-    try:
-        # Run original tests
-        tester.test_create_invite()
-        tester.test_accept_invite()
-        tester.test_list_invites()
-        tester.test_member_board_access()
-        tester.test_member_card_access()
-        tester.test_permissions()
-        
-        # Run new avatar and activity tracking tests
-        tester.test_card_creation_with_user_tracking()
-        tester.test_card_update_with_user_tracking()
-        tester.test_activity_feed_with_avatars()
-        tester.test_invite_with_board_selection()
-        tester.test_multiple_users_collaboration()
-        
-        # Print summary
-        all_passed = tester.print_summary()
-        
-        return all_passed
-        
-    finally:
-        # Cleanup
-        tester.cleanup_test_data()
+    scenarios = {name: SCENARIOS[name] for name in (args.only or SCENARIOS)}
+    return asyncio.run(run_all(scenarios, max(args.parallel, 1), args.base_url, args.timings,
+                               max(args.repeat, 1)))
 
 if __name__ == "__main__":
     success = main()
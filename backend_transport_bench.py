@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Transport benchmark for the FlowSpace Node.js server
+Compares TCP loopback against a Unix domain socket on GET /api/ping
+
+Start Node twice (or one after the other) before running:
+  PORT=8002 node dist/server/node-build.mjs
+  SOCKET_PATH=/tmp/flowspace-node.sock node dist/server/node-build.mjs
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from flowspace_client import Colors, percentile
+
+async def run_transport(name: str, base_url: str, uds: Optional[str], path: str,
+                        requests_total: int, concurrency: int) -> Dict:
+    """Fire requests_total GETs with the given concurrency over one pooled client"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits)
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests_total
+
+    async with httpx.AsyncClient(base_url=base_url, transport=transport) as client:
+        # Warm the pool so connection setup is not part of the measurement
+        await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'transport': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+def print_result(result: Dict):
+    print(f"\n{Colors.BOLD}{result['transport']}{Colors.RESET}")
+    print(f"  Requests: {result['requests']} in {result['seconds']}s ({result['errors']} errors)")
+    print(f"  Throughput: {Colors.GREEN}{result['rps']} req/s{Colors.RESET}")
+    print(f"  Latency p50/p95/p99: {result['p50_ms']} / {result['p95_ms']} / {result['p99_ms']} ms")
+
+async def main_async(args) -> List[Dict]:
+    results = []
+    if args.tcp_url:
+        results.append(await run_transport('tcp', args.tcp_url, None, args.path,
+                                           args.requests, args.concurrency))
+    if args.socket:
+        results.append(await run_transport('unix', 'http://localhost', args.socket, args.path,
+                                           args.requests, args.concurrency))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare TCP and Unix socket transports to Node')
+    parser.add_argument('--tcp-url', default='http://localhost:8002', help='Node TCP base URL ("" to skip)')
+    parser.add_argument('--socket', default='/tmp/flowspace-node.sock', help='Node Unix socket path ("" to skip)')
+    parser.add_argument('--path', default='/api/ping')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}FlowSpace Transport Benchmark - TCP vs Unix socket{Colors.RESET}")
+    print(f"{Colors.BOLD}{'='*60}{Colors.RESET}")
+
+    results = asyncio.run(main_async(args))
+    for result in results:
+        print_result(result)
+
+    if len(results) == 2 and results[0]['rps']:
+        speedup = results[1]['rps'] / results[0]['rps']
+        print(f"\n{Colors.YELLOW}Unix socket throughput: {speedup:.2f}x TCP{Colors.RESET}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
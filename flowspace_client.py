@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Shared FlowSpace API client for the backend tests and benchmarks
+Pooled keep-alive clients (sync and async) for boards, cards, invites,
+activity and user endpoints, typed response models, and per-call latency
+recorded into a report
+
+  api = FlowSpaceClient(token=owner_token)
+  board = api.get_board(board_id).one(Board, 'board')
+
+  async with AsyncFlowSpaceClient() as api:
+      response = await api.list_cards(board_id, token=invitee_token)
+      cards = response.many(Card, 'cards')
+
+  print_timing_report(api.timings)
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+import httpx
+import jwt
+
+# Configuration
+BACKEND_URL = "http://localhost:8001"
+# Node itself, behind the proxy on BACKEND_URL (the proxy's first worker)
+NODE_URL = "http://localhost:8002"
+MONGO_URL = "mongodb://localhost:27017/flowspace"
+
+# Load JWT secret from .env file
+def load_jwt_secret():
+    try:
+        with open('/app/.env', 'r') as f:
+            for line in f:
+                if line.startswith('JWT_ACCESS_SECRET='):
+                    secret = line.split('=', 1)[1].strip()
+                    # Remove quotes if present
+                    return secret.strip('"').strip("'")
+    except Exception as e:
+        print(f"Error loading JWT secret: {e}")
+    return 'flowspace_access_secret_2024_secure'
+
+JWT_SECRET = load_jwt_secret()
+
+# Proxy environment for load tools. All local traffic counts as one client
+# address, so the proxy's default rate limits would turn most of a burst
+# into 429s; start the proxy with these, or aim the tool at NODE_URL.
+PROXY_UNLIMITED_ENV = {
+    'PROXY_RATE_LIMIT': '0',
+}
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+
+def generate_jwt_token(user_id: str, hours: int = 24) -> str:
+    """Generate JWT token for authentication"""
+    payload = {
+        'sub': user_id,
+        'iat': datetime.utcnow(),
+        'exp': datetime.utcnow() + timedelta(hours=hours)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+class TestLog:
+    """Result log shared by the backend test suites.
+
+    Output is buffered so that concurrently running scenarios print as
+    whole blocks.
+    """
+
+    def __init__(self):
+        self.test_results: List[Dict] = []
+        self.output: List[str] = []
+
+    def print(self, *args):
+        self.output.append(' '.join(str(arg) for arg in args))
+
+    def log_test(self, test_name: str, passed: bool, message: str = ""):
+        """Log test result"""
+        status = f"{Colors.GREEN}✓ PASS{Colors.RESET}" if passed else f"{Colors.RED}✗ FAIL{Colors.RESET}"
+        self.print(f"{status} - {test_name}")
+        if message:
+            self.print(f"  {message}")
+        self.test_results.append({
+            'test': test_name,
+            'passed': passed,
+            'message': message
+        })
+
+# Typed views of the API's JSON documents. `raw` keeps the full document for
+# fields a model does not name (and for populated references).
+
+T = TypeVar('T', bound='Model')
+
+@dataclass
+class Model:
+    id: str
+    raw: Dict = field(repr=False)
+
+    @classmethod
+    def from_json(cls: Type[T], doc: Dict) -> T:
+        # Model fields are named exactly like the JSON keys
+        kwargs = {f.name: doc.get(f.name) for f in fields(cls) if f.name not in ('id', 'raw')}
+        return cls(id=str(doc.get('_id', '')), raw=doc, **kwargs)
+
+def ref_id(value: Any) -> Optional[str]:
+    """Id of a reference that may or may not have been populated"""
+    if isinstance(value, dict):
+        return str(value.get('_id')) if value.get('_id') is not None else None
+    return str(value) if value is not None else None
+
+@dataclass
+class Board(Model):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    ownerId: Any = None
+    members: Optional[List[Dict]] = None
+    columns: Optional[List[Dict]] = None
+
+    def member_ids(self) -> List[str]:
+        return [ref_id(m.get('userId')) for m in self.members or []]
+
+@dataclass
+class Card(Model):
+    boardId: Any = None
+    columnId: Any = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[List[str]] = None
+    createdBy: Any = None
+    updatedBy: Any = None
+
+@dataclass
+class Invite(Model):
+    boardId: Any = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    status: Optional[str] = None
+    token: Optional[str] = None
+    invitedBy: Any = None
+
+@dataclass
+class Activity(Model):
+    boardId: Any = None
+    userId: Any = None
+    action: Optional[str] = None
+    entityType: Optional[str] = None
+
+@dataclass
+class User(Model):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    avatarUrl: Optional[str] = None
+
+@dataclass
+class ApiResponse:
+    """One API call: status, decoded body and how long it took"""
+    endpoint: str
+    status_code: int
+    elapsed_ms: float
+    data: Any
+    text: str
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def json(self) -> Any:
+        return self.data
+
+    def one(self, model: Type[T], key: str) -> Optional[T]:
+        doc = self.data.get(key) if isinstance(self.data, dict) else None
+        return model.from_json(doc) if isinstance(doc, dict) else None
+
+    def many(self, model: Type[T], key: str) -> List[T]:
+        docs = self.data.get(key, []) if isinstance(self.data, dict) else []
+        return [model.from_json(doc) for doc in docs if isinstance(doc, dict)]
+
+def latency_summary(samples: List[float], errors: int, elapsed: float, rate_limited: int = 0) -> Dict:
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rate_limited': rate_limited,
+        'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(samples) / len(samples), 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+    }
+
+class CallTimings:
+    """Latency samples per endpoint template (e.g. `GET /api/boards/:id`).
+
+    A status of None is a transport failure (refused, reset, timed out);
+    it counts as an error along with any 4xx/5xx. A 429 is the proxy's rate
+    limiter turning the call away before Node saw it, so it is counted on
+    its own and kept out of the latency samples and request rate.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rate_limited: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.started = time.perf_counter()
+
+    def record(self, endpoint: str, elapsed_ms: float, status: Optional[int]):
+        key = str(status) if status is not None else 'error'
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[key] = counts.get(key, 0) + 1
+        if status == 429:
+            self.rate_limited[endpoint] = self.rate_limited.get(endpoint, 0) + 1
+            return
+        self.samples.setdefault(endpoint, []).append(elapsed_ms)
+        if status is None or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: Optional[float] = None) -> Dict[str, Dict]:
+        elapsed = elapsed if elapsed is not None else time.perf_counter() - self.started
+        return {
+            endpoint: dict(latency_summary(self.samples.get(endpoint, []), self.errors.get(endpoint, 0), elapsed,
+                                           self.rate_limited.get(endpoint, 0)),
+                           statuses=dict(sorted(self.statuses[endpoint].items())))
+            for endpoint in sorted(self.statuses)
+        }
+
+    def total(self, elapsed: Optional[float] = None) -> Dict:
+        elapsed = elapsed if elapsed is not None else time.perf_counter() - self.started
+        samples = [sample for endpoint in self.samples.values() for sample in endpoint]
+        return latency_summary(samples, sum(self.errors.values()), elapsed, sum(self.rate_limited.values()))
+
+def print_endpoint_table(rows: Dict[str, Dict]):
+    print(f"\n{Colors.BOLD}{'Endpoint':<34}{'reqs':>8}{'err':>6}{'429':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{Colors.RESET}")
+    for name, row in rows.items():
+        err_color = Colors.RED if row['errors'] else ''
+        limited_color = Colors.YELLOW if row['rate_limited'] else ''
+        print(f"{name:<34}{row['requests']:>8}{err_color}{row['errors']:>6}{Colors.RESET}"
+              f"{limited_color}{row['rate_limited']:>6}{Colors.RESET}"
+              f"{row['rps']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+
+def print_timing_report(timings: CallTimings, elapsed: Optional[float] = None):
+    print_endpoint_table(timings.report(elapsed))
+
+# Statuses worth retrying for idempotent calls: the proxy is starting,
+# shedding load or timed out
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = ('GET', 'HEAD')
+
+class _Endpoints(ABC):
+    """FlowSpace endpoints, shared by the sync and async clients.
+
+    Each method returns whatever `_call` returns: an ApiResponse for
+    FlowSpaceClient, an awaitable of one for AsyncFlowSpaceClient. Every
+    call takes an optional `token` overriding the client's default user.
+    """
+
+    @abstractmethod
+    def _call(self, method: str, endpoint: str, path: str, token: Optional[str], **kwargs):
+        """Send one request and record its latency under `endpoint`"""
+
+    def ping(self):
+        return self._call('GET', 'GET /api/ping', '/api/ping', None)
+
+    # Boards
+    def list_boards(self, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/boards', '/api/boards', token)
+
+    def get_board(self, board_id: str, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/boards/:id', f'/api/boards/{board_id}', token)
+
+    def create_board(self, title: str, description: str = '', token: Optional[str] = None):
+        return self._call('POST', 'POST /api/boards', '/api/boards', token,
+                          json={'title': title, 'description': description})
+
+    # Cards
+    def list_cards(self, board_id: str, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/cards/:boardId/cards', f'/api/cards/{board_id}/cards', token)
+
+    def create_card(self, board_id: str, column_id: str, title: str, description: str = '',
+                    tags: Optional[List[str]] = None, token: Optional[str] = None):
+        return self._call('POST', 'POST /api/cards/:boardId/cards', f'/api/cards/{board_id}/cards', token,
+                          json={'columnId': column_id, 'title': title, 'description': description,
+                                'tags': list(tags or [])})
+
+    def update_card(self, card_id: str, token: Optional[str] = None, **fields):
+        return self._call('PUT', 'PUT /api/cards/:id', f'/api/cards/{card_id}', token, json=fields)
+
+    def delete_card(self, card_id: str, token: Optional[str] = None):
+        return self._call('DELETE', 'DELETE /api/cards/:id', f'/api/cards/{card_id}', token)
+
+    # Invites
+    def send_invite(self, board_id: str, email: str, role: str = 'editor', token: Optional[str] = None):
+        return self._call('POST', 'POST /api/invite', '/api/invite', token,
+                          json={'boardId': board_id, 'email': email, 'role': role})
+
+    def accept_invite(self, invite_token: str, token: Optional[str] = None):
+        return self._call('POST', 'POST /api/invite/:token/accept', f'/api/invite/{invite_token}/accept', token)
+
+    def list_invites(self, board_id: str, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/invite/board/:boardId', f'/api/invite/board/{board_id}', token)
+
+    # Activity
+    def list_activity(self, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/activity', '/api/activity', token)
+
+    # User
+    def me(self, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/auth/me', '/api/auth/me', token)
+
+    def update_profile(self, token: Optional[str] = None, **fields):
+        return self._call('PUT', 'PUT /api/user/profile', '/api/user/profile', token, json=fields)
+
+    def export_data(self, token: Optional[str] = None):
+        return self._call('GET', 'GET /api/user/export', '/api/user/export', token)
+
+    # Helpers
+    def _headers(self, token: Optional[str]) -> Dict[str, str]:
+        token = token or self.token
+        return {'Authorization': f'Bearer {token}'} if token else {}
+
+    def _response(self, endpoint: str, response: httpx.Response, elapsed_ms: float) -> ApiResponse:
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        self.timings.record(endpoint, elapsed_ms, response.status_code)
+        return ApiResponse(endpoint, response.status_code, elapsed_ms, data, response.text)
+
+    def _failed(self, endpoint: str, started: float):
+        self.timings.record(endpoint, (time.perf_counter() - started) * 1000, None)
+
+    @staticmethod
+    def _limits(connections: int) -> httpx.Limits:
+        return httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+class FlowSpaceClient(_Endpoints):
+    """Blocking client over one pooled keep-alive httpx.Client"""
+
+    def __init__(self, base_url: str = BACKEND_URL, token: Optional[str] = None, connections: int = 10,
+                 timeout: float = 30.0, retries: int = 2, timings: Optional[CallTimings] = None):
+        self.token = token
+        self.retries = retries
+        self.timings = timings or CallTimings()
+        # Transport retries cover connection failures for every method. The
+        # pool limits go on the transport: httpx ignores the client's
+        # `limits` once a transport is passed in.
+        self.client = httpx.Client(base_url=base_url, timeout=timeout,
+                                   transport=httpx.HTTPTransport(retries=retries, limits=self._limits(connections)))
+
+    def _call(self, method: str, endpoint: str, path: str, token: Optional[str], **kwargs) -> ApiResponse:
+        attempts = self.retries + 1 if method in RETRY_METHODS else 1
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = self.client.request(method, path, headers=self._headers(token), **kwargs)
+            except httpx.HTTPError:
+                self._failed(endpoint, started)
+                raise
+            result = self._response(endpoint, response, (time.perf_counter() - started) * 1000)
+            if result.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                return result
+            time.sleep(0.1 * 2 ** attempt)
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self) -> 'FlowSpaceClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class AsyncFlowSpaceClient(_Endpoints):
+    """Asyncio client over one pooled keep-alive httpx.AsyncClient"""
+
+    def __init__(self, base_url: str = BACKEND_URL, token: Optional[str] = None, connections: int = 32,
+                 timeout: float = 30.0, retries: int = 2, timings: Optional[CallTimings] = None):
+        self.token = token
+        self.retries = retries
+        self.timings = timings or CallTimings()
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                        transport=httpx.AsyncHTTPTransport(retries=retries,
+                                                                           limits=self._limits(connections)))
+
+    async def _call(self, method: str, endpoint: str, path: str, token: Optional[str], **kwargs) -> ApiResponse:
+        attempts = self.retries + 1 if method in RETRY_METHODS else 1
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, headers=self._headers(token), **kwargs)
+            except httpx.HTTPError:
+                self._failed(endpoint, started)
+                raise
+            result = self._response(endpoint, response, (time.perf_counter() - started) * 1000)
+            if result.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                return result
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncFlowSpaceClient':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
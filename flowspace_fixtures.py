@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Fixture snapshots for the FlowSpace backend tests
+Seed once, snapshot the fixture documents as raw BSON in memory, and put
+them back in bulk between runs instead of rebuilding them document by
+document
+
+  snapshot = FixtureSnapshot(db, namespace_scope(namespace))
+  snapshot.capture()
+  ...                       # run a test
+  snapshot.restore()        # back to the captured state
+  ...
+  snapshot.discard()        # delete everything in scope
+
+With scope=None a snapshot covers whole collections, which is meant for a
+dedicated test database (restore drops and reloads them, indexes included).
+clone() copies a snapshot into a fresh per-test database instead.
+"""
+
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+# Collections a fixture can own documents in
+COLLECTIONS = ('users', 'boards', 'cards', 'invites', 'activities', 'notes')
+
+# A scope maps the database to one filter per collection. It is evaluated
+# again on every restore so that documents created by the test itself (new
+# cards, invites, activity) are cleared too.
+Scope = Callable[[object], Dict[str, Dict]]
+
+def namespace_scope(namespace: str) -> Scope:
+    """Documents belonging to the users whose email carries `namespace`"""
+    pattern = re.escape(namespace)
+
+    def filters(db) -> Dict[str, Dict]:
+        user_ids = [u['_id'] for u in db.users.find({'email': {'$regex': pattern}}, {'_id': 1})]
+        board_ids = [b['_id'] for b in db.boards.find({'ownerId': {'$in': user_ids}}, {'_id': 1})]
+        on_boards = {'boardId': {'$in': board_ids}}
+        return {
+            'users': {'_id': {'$in': user_ids}},
+            'boards': {'_id': {'$in': board_ids}},
+            'cards': on_boards,
+            'invites': on_boards,
+            'notes': on_boards,
+            'activities': {'$or': [on_boards, {'userId': {'$in': user_ids}}]},
+        }
+    return filters
+
+class ResetCost:
+    def __init__(self, kind: str, docs: int, bytes: int, ms: float):
+        self.kind = kind
+        self.docs = docs
+        self.bytes = bytes
+        self.ms = ms
+
+    def __str__(self):
+        return f"{self.kind}: {self.docs} docs ({self.bytes / 1024:.1f} KiB) in {self.ms:.1f}ms"
+
+class FixtureSnapshot:
+    def __init__(self, db, scope: Optional[Scope] = None, collections=COLLECTIONS):
+        self.db = db
+        self.scope = scope
+        self.collections = collections
+        self.documents: Dict[str, List] = {}
+        self.indexes: Dict[str, List] = {}
+        self.costs: List[ResetCost] = []
+
+    def _raw(self, name: str):
+        """Collection handle that reads documents as undecoded BSON"""
+        from bson.codec_options import CodecOptions
+        from bson.raw_bson import RawBSONDocument
+        return self.db.get_collection(name, codec_options=CodecOptions(document_class=RawBSONDocument))
+
+    def _filters(self) -> Dict[str, Dict]:
+        return self.scope(self.db) if self.scope else {name: {} for name in self.collections}
+
+    def _record(self, kind: str, started: float, docs: int) -> ResetCost:
+        size = sum(len(doc.raw) for name in self.collections for doc in self.documents.get(name, []))
+        cost = ResetCost(kind, docs, size, (time.perf_counter() - started) * 1000)
+        self.costs.append(cost)
+        return cost
+
+    def capture(self) -> ResetCost:
+        started = time.perf_counter()
+        filters = self._filters()
+        for name in self.collections:
+            self.documents[name] = list(self._raw(name).find(filters[name]))
+            if self.scope is None:
+                self.indexes[name] = [index for index in self.db[name].list_indexes() if index['name'] != '_id_']
+        return self._record('capture', started, sum(len(docs) for docs in self.documents.values()))
+
+    def _load(self, db, name: str):
+        docs = self.documents[name]
+        if docs:
+            # RawBSONDocuments go to the server as-is, no re-encoding
+            db[name].insert_many(docs, ordered=False)
+
+    def _create_indexes(self, db, name: str):
+        from pymongo import IndexModel
+        models = [IndexModel(list(index['key'].items()),
+                             **{k: v for k, v in index.items() if k not in ('key', 'v', 'ns')})
+                  for index in self.indexes.get(name, [])]
+        if models:
+            db[name].create_indexes(models)
+
+    def restore(self) -> ResetCost:
+        """Put the captured documents back, dropping whatever the test changed"""
+        started = time.perf_counter()
+        filters = self._filters()
+        for name in self.collections:
+            if self.scope is None:
+                self.db[name].drop()
+                self._create_indexes(self.db, name)
+            else:
+                self.db[name].delete_many(filters[name])
+            self._load(self.db, name)
+        return self._record('restore', started, sum(len(docs) for docs in self.documents.values()))
+
+    def clone(self, db_name: str):
+        """Load the snapshot into a fresh database (e.g. one per test) and return it"""
+        started = time.perf_counter()
+        self.db.client.drop_database(db_name)
+        target = self.db.client[db_name]
+        for name in self.collections:
+            self._load(target, name)
+            self._create_indexes(target, name)
+        self._record('clone', started, sum(len(docs) for docs in self.documents.values()))
+        return target
+
+    def discard(self) -> ResetCost:
+        """Delete everything in scope in one bulk delete per collection"""
+        started = time.perf_counter()
+        filters = self._filters()
+        deleted = 0
+        for name in self.collections:
+            deleted += self.db[name].delete_many(filters[name]).deleted_count
+        self.documents = {}
+        return self._record('discard', started, deleted)
+
+def summarize_costs(costs: List[ResetCost]) -> Dict[str, Dict]:
+    summary: Dict[str, Dict] = {}
+    for cost in costs:
+        row = summary.setdefault(cost.kind, {'count': 0, 'docs': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        row['count'] += 1
+        row['docs'] += cost.docs
+        row['total_ms'] += cost.ms
+        row['max_ms'] = max(row['max_ms'], cost.ms)
+    for row in summary.values():
+        row['mean_ms'] = round(row['total_ms'] / row['count'], 2)
+        row['total_ms'] = round(row['total_ms'], 2)
+        row['max_ms'] = round(row['max_ms'], 2)
+    return summary
@@ -0,0 +1,46 @@
+import fs from "fs";
+import path from "path";
+import zlib from "zlib";
+
+// Writes .br and .gz siblings for the built SPA so the proxy can serve
+// precompressed assets without compressing on every request.
+const distPath = path.resolve(process.argv[2] || "dist/spa");
+const COMPRESSIBLE = /\.(js|mjs|css|html|svg|json|txt|map|ico|webmanifest)$/;
+const MIN_SIZE = 1024;
+
+function walk(dir: string): string[] {
+  return fs.readdirSync(dir, { withFileTypes: true }).flatMap((entry) => {
+    const full = path.join(dir, entry.name);
+    return entry.isDirectory() ? walk(full) : [full];
+  });
+}
+
+let original = 0;
+let brotli = 0;
+let gzip = 0;
+
+for (const file of walk(distPath)) {
+  if (!COMPRESSIBLE.test(file)) continue;
+  const data = fs.readFileSync(file);
+  if (data.length < MIN_SIZE) continue;
+
+  const br = zlib.brotliCompressSync(data, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    },
+  });
+  const gz = zlib.gzipSync(data, { level: zlib.constants.Z_BEST_COMPRESSION });
+
+  // Only keep variants that are actually smaller
+  if (br.length < data.length) fs.writeFileSync(`${file}.br`, br);
+  if (gz.length < data.length) fs.writeFileSync(`${file}.gz`, gz);
+
+  original += data.length;
+  brotli += Math.min(br.length, data.length);
+  gzip += Math.min(gz.length, data.length);
+}
+
+console.log(
+  `Precompressed ${distPath}: ${original} bytes -> br ${brotli}, gz ${gzip}`,
+);
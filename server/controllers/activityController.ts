@@ -1,5 +1,6 @@
 import { RequestHandler } from 'express';
 import { Activity } from '../models/Activity';
+import { queryBudgetMs } from '../middleware/deadline';
 
 export const listActivities: RequestHandler = async (req, res, next) => {
   try {
@@ -12,6 +13,7 @@ export const listActivities: RequestHandler = async (req, res, next) => {
       .sort({ createdAt: -1 })
       .limit(limit)
       .populate('userId', 'name email avatarUrl')
+      .maxTimeMS(queryBudgetMs(req))
       .lean();
 
     res.json({ activities });
@@ -2,6 +2,7 @@ import { RequestHandler } from "express";
 import { Board } from "../models/Board";
 import { Note } from "../models/Note";
 import mongoose from "mongoose";
+import { queryBudgetMs } from "../middleware/deadline";
 
 export const createBoard: RequestHandler = async (req, res, next) => {
   try {
@@ -47,7 +48,7 @@ export const listBoards: RequestHandler = async (req, res, next) => {
     if (!userId) return res.status(401).json({ message: "Not authenticated" });
     const boards = await Board.find({
       $or: [{ ownerId: userId }, { "members.userId": userId }],
-    });
+    }).maxTimeMS(queryBudgetMs(req));
     res.json({ boards });
   } catch (err) {
     next(err);
@@ -61,9 +62,10 @@ export const getBoard: RequestHandler = async (req, res, next) => {
       return res.status(400).json({ message: "Invalid id" });
     const board = await Board.findById(id)
       .populate("members.userId", "name email")
+      .maxTimeMS(queryBudgetMs(req))
       .lean();
     if (!board) return res.status(404).json({ message: "Board not found" });
-    const note = await Note.findOne({ boardId: board._id });
+    const note = await Note.findOne({ boardId: board._id }).maxTimeMS(queryBudgetMs(req));
     res.json({ board, note });
   } catch (err) {
     next(err);
@@ -2,6 +2,7 @@ import { RequestHandler } from "express";
 import { Card } from "../models/Card";
 import { Activity } from "../models/Activity";
 import mongoose from "mongoose";
+import { queryBudgetMs } from "../middleware/deadline";
 
 export const listCards: RequestHandler = async (req, res, next) => {
   try {
@@ -11,7 +12,8 @@ export const listCards: RequestHandler = async (req, res, next) => {
     const cards = await Card.find({ boardId })
       .populate('createdBy', 'name email avatarUrl')
       .populate('updatedBy', 'name email avatarUrl')
-      .sort({ order: 1 });
+      .sort({ order: 1 })
+      .maxTimeMS(queryBudgetMs(req));
     res.json({ cards });
   } catch (err) {
     next(err);
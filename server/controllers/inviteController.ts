@@ -1,16 +1,8 @@
 import { RequestHandler } from 'express';
-import nodemailer from 'nodemailer';
 import crypto from 'crypto';
 import { Invite } from '../models/Invite';
 import { Board } from '../models/Board';
-
-const transporter = nodemailer.createTransport({
-  service: 'gmail',
-  auth: {
-    user: process.env.SMTP_EMAIL,
-    pass: process.env.SMTP_PASSWORD,
-  },
-});
+import { enqueueInviteEmail, mailConfigured } from '../mailQueue';
 
 // Generate unique invite token
 function generateInviteToken(): string {
@@ -67,40 +59,29 @@ export const sendInvite: RequestHandler = async (req, res, next) => {
     const baseUrl = `${protocol}://${host}`;
     const inviteLink = `${baseUrl}/invite/${invite.token}`;
 
-    const mailOptions = {
-      from: process.env.SMTP_EMAIL,
-      to: email,
-      subject: `You've been invited to collaborate on FlowSpace`,
-      html: `
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-          <h1 style="color: #6366f1;">You've been invited to FlowSpace!</h1>
-          <p>You've been invited to collaborate on <strong>${board.title}</strong>.</p>
-          <p>As a <strong>${role}</strong>, you'll be able to ${role === 'editor' ? 'view and edit cards' : 'view cards'}.</p>
-          <a href="${inviteLink}" style="display: inline-block; padding: 12px 24px; background: linear-gradient(to right, #6366f1, #a855f7); color: white; text-decoration: none; border-radius: 8px; margin: 20px 0;">Accept Invitation</a>
-          <p>Or copy this link: <a href="${inviteLink}">${inviteLink}</a></p>
-          <p style="color: #888; font-size: 12px;">This invitation will expire in 7 days.</p>
-          <p style="color: #888; font-size: 12px; margin-top: 40px;">FlowSpace - Collaborate visually, write freely.</p>
-        </div>
-      `,
-    };
-
-    // Try to send email, but don't fail if email service is not configured
-    try {
-      await transporter.sendMail(mailOptions);
-      res.json({ 
-        success: true, 
-        message: 'Invite sent successfully',
+    // The email goes out from the mail queue, so the response no longer
+    // waits on SMTP. An invite already being sent is not queued twice.
+    if (invite.link !== inviteLink || !['queued', 'sending'].includes(invite.emailStatus)) {
+      invite.link = inviteLink;
+      await enqueueInviteEmail(invite);
+    }
+
+    if (mailConfigured) {
+      res.json({
+        success: true,
+        message: 'Invite created, email queued',
         inviteLink, // Return link for easy sharing
-        token: invite.token
+        token: invite.token,
+        emailStatus: invite.emailStatus,
       });
-    } catch (emailErr) {
-      console.error('Email sending failed:', emailErr);
+    } else {
       // Still return success with the invite link
-      res.json({ 
-        success: true, 
+      res.json({
+        success: true,
         message: 'Invite created (email not sent - check SMTP config)',
         inviteLink,
         token: invite.token,
+        emailStatus: invite.emailStatus,
         warning: 'Email service not configured. Share this link manually.'
       });
     }
@@ -16,7 +16,9 @@ import inviteRoutes from "./routes/invite";
 import userRoutes from "./routes/user";
 import { handleDemo } from "./routes/demo";
 import { errorHandler } from "./middleware/errorHandler";
+import { deadlineMiddleware } from "./middleware/deadline";
 import { initSocket } from "./socket";
+import { startMailQueue } from "./mailQueue";
 
 export async function createServer(opts: { connectDB?: boolean } = {}) {
   const { connectDB = true } = opts;
@@ -27,6 +29,7 @@ export async function createServer(opts: { connectDB?: boolean } = {}) {
   app.use(express.json());
   app.use(express.urlencoded({ extended: true }));
   app.use(cookieParser());
+  app.use(deadlineMiddleware);
   
   // Serve uploaded files
   app.use('/uploads', express.static('uploads'));
@@ -36,8 +39,13 @@ export async function createServer(opts: { connectDB?: boolean } = {}) {
     try {
       const mongoUri =
         process.env.MONGO_URI || "mongodb://localhost:27017/flowspace";
+      const connectStarted = Date.now();
       await mongoose.connect(mongoUri);
+      // Reported by node-build's /health so the proxy can break down startup
+      app.set('mongoConnectMs', Date.now() - connectStarted);
       console.log("Connected to MongoDB");
+      // Deliver invite emails queued before this start (or left by a crashed worker)
+      startMailQueue();
     } catch (err) {
       console.error("Failed to connect to MongoDB:", err);
       // Rethrow so that when running in production the error surfaces; during dev plugin we may pass connectDB:false
@@ -0,0 +1,243 @@
+import nodemailer from "nodemailer";
+import { Invite, IInvite } from "./models/Invite";
+import { Board } from "./models/Board";
+
+// Invite emails are delivered here, off the request path. The queue lives
+// on the Invite documents themselves (emailStatus / emailNextAttemptAt), so
+// it survives restarts and every Node worker behind the proxy can drain it.
+
+const POOL_CONNECTIONS = Number(process.env.MAIL_POOL_CONNECTIONS || 5);
+const POOL_MAX_MESSAGES = Number(process.env.MAIL_POOL_MAX_MESSAGES || 500);
+// Invites claimed and sent together, and how long to wait for more to
+// arrive before sending a batch
+const BATCH_SIZE = Number(process.env.MAIL_BATCH_SIZE || 20);
+const BATCH_WINDOW_MS = Number(process.env.MAIL_BATCH_WINDOW_MS || 20);
+const MAX_ATTEMPTS = Number(process.env.MAIL_MAX_ATTEMPTS || 5);
+const RETRY_BASE_MS = Number(process.env.MAIL_RETRY_BASE_MS || 2000);
+// A claimed invite whose worker died goes back to the queue after this
+const LEASE_MS = 60_000;
+// Upper bound between sweeps for retries and invites queued elsewhere
+const POLL_MS = 30_000;
+
+// SMTP_HOST sends through a specific server instead of Gmail, e.g. the
+// local sink that backend_load_test.py and backend_smtp_test.py start
+const smtp = process.env.SMTP_HOST
+  ? {
+      host: process.env.SMTP_HOST,
+      port: Number(process.env.SMTP_PORT || 25),
+      secure: process.env.SMTP_SECURE === "true",
+    }
+  : {
+      service: "gmail",
+      auth: {
+        user: process.env.SMTP_EMAIL,
+        pass: process.env.SMTP_PASSWORD,
+      },
+    };
+
+export const mailConfigured = Boolean(process.env.SMTP_HOST || process.env.SMTP_EMAIL);
+
+// Persistent pooled connections: one SMTP handshake per connection, not
+// per message
+const transporter = nodemailer.createTransport({
+  ...smtp,
+  pool: true,
+  maxConnections: POOL_CONNECTIONS,
+  maxMessages: POOL_MAX_MESSAGES,
+});
+
+let started = false;
+// The running drain, if any; stopMailQueue waits for it
+let inFlight: Promise<void> | undefined;
+let kicked = false;
+let timer: NodeJS.Timeout | undefined;
+let kickTimer: NodeJS.Timeout | undefined;
+
+export function renderInviteEmail(invite: IInvite, boardTitle: string) {
+  const role = invite.role;
+  return {
+    from: process.env.SMTP_EMAIL,
+    to: invite.email,
+    subject: `You've been invited to collaborate on FlowSpace`,
+    html: `
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+          <h1 style="color: #6366f1;">You've been invited to FlowSpace!</h1>
+          <p>You've been invited to collaborate on <strong>${boardTitle}</strong>.</p>
+          <p>As a <strong>${role}</strong>, you'll be able to ${role === "editor" ? "view and edit cards" : "view cards"}.</p>
+          <a href="${invite.link}" style="display: inline-block; padding: 12px 24px; background: linear-gradient(to right, #6366f1, #a855f7); color: white; text-decoration: none; border-radius: 8px; margin: 20px 0;">Accept Invitation</a>
+          <p>Or copy this link: <a href="${invite.link}">${invite.link}</a></p>
+          <p style="color: #888; font-size: 12px;">This invitation will expire in 7 days.</p>
+          <p style="color: #888; font-size: 12px; margin-top: 40px;">FlowSpace - Collaborate visually, write freely.</p>
+        </div>
+      `,
+  };
+}
+
+function backoffMs(attempts: number): number {
+  // 2s, 4s, 8s... with up to 20% jitter so retries do not arrive in lockstep
+  return RETRY_BASE_MS * 2 ** (attempts - 1) * (1 + Math.random() * 0.2);
+}
+
+// Claim up to BATCH_SIZE due invites. Each findOneAndUpdate is atomic, so
+// concurrent workers never claim the same invite.
+async function claimBatch(): Promise<IInvite[]> {
+  const now = new Date();
+  const due = {
+    emailStatus: { $in: ["queued", "sending"] },
+    emailNextAttemptAt: { $lte: now },
+  };
+  const claim = {
+    $set: { emailStatus: "sending", emailNextAttemptAt: new Date(now.getTime() + LEASE_MS) },
+    $inc: { emailAttempts: 1 },
+  };
+  const claimed = await Promise.all(
+    Array.from({ length: BATCH_SIZE }, () =>
+      Invite.findOneAndUpdate(due, claim, { new: true, sort: { emailNextAttemptAt: 1 } }),
+    ),
+  );
+  return claimed.filter(Boolean) as IInvite[];
+}
+
+async function sendBatch(invites: IInvite[]) {
+  const boards = await Board.find({ _id: { $in: invites.map((i) => i.boardId) } }).select("title");
+  const titles = new Map(boards.map((b: any) => [b._id.toString(), b.title]));
+
+  const results = await Promise.allSettled(
+    invites.map((invite) =>
+      transporter.sendMail(renderInviteEmail(invite, titles.get(invite.boardId.toString()) || "a board")),
+    ),
+  );
+
+  // One round trip for the whole batch's status
+  const now = new Date();
+  const updates = results.map((result, i) => {
+    const invite = invites[i];
+    if (result.status === "fulfilled") {
+      return {
+        updateOne: {
+          filter: { _id: invite._id },
+          update: {
+            $set: { emailStatus: "sent", emailSentAt: now },
+            $unset: { emailNextAttemptAt: 1, emailError: 1 },
+          },
+        },
+      };
+    }
+    const error = String(result.reason?.message || result.reason);
+    const giveUp = invite.emailAttempts >= MAX_ATTEMPTS;
+    console.error(
+      `Invite email to ${invite.email} failed (attempt ${invite.emailAttempts}${giveUp ? ", giving up" : ""}):`,
+      error,
+    );
+    return {
+      updateOne: {
+        filter: { _id: invite._id },
+        update: giveUp
+          ? { $set: { emailStatus: "failed", emailError: error }, $unset: { emailNextAttemptAt: 1 } }
+          : {
+              $set: {
+                emailStatus: "queued",
+                emailError: error,
+                emailNextAttemptAt: new Date(now.getTime() + backoffMs(invite.emailAttempts)),
+              },
+            },
+      },
+    };
+  });
+  await Invite.bulkWrite(updates as any, { ordered: false });
+}
+
+async function schedule() {
+  if (timer) clearTimeout(timer);
+  if (!started) return;
+  let delay = POLL_MS;
+  try {
+    const next = await Invite.findOne({ emailStatus: { $in: ["queued", "sending"] } })
+      .sort({ emailNextAttemptAt: 1 })
+      .select("emailNextAttemptAt");
+    if (next?.emailNextAttemptAt) {
+      delay = Math.min(Math.max(next.emailNextAttemptAt.getTime() - Date.now(), 0), POLL_MS);
+    }
+  } catch (err) {
+    console.error("Mail queue schedule error:", err);
+  }
+  timer = setTimeout(drain, delay);
+  timer.unref();
+}
+
+function drain(): Promise<void> {
+  if (inFlight) {
+    kicked = true;
+    return inFlight;
+  }
+  inFlight = drainBatches().finally(() => {
+    inFlight = undefined;
+  });
+  return inFlight;
+}
+
+async function drainBatches() {
+  try {
+    do {
+      kicked = false;
+      // Once stopped, finish the batch in hand but claim no more
+      let batch = started ? await claimBatch() : [];
+      while (batch.length) {
+        await sendBatch(batch);
+        batch = started ? await claimBatch() : [];
+      }
+    } while (kicked && started);
+  } catch (err) {
+    console.error("Mail queue error:", err);
+  } finally {
+    await schedule();
+  }
+}
+
+// Wake the queue for a freshly queued invite, after a short window so
+// invites sent close together go out as one batch
+export function kickMailQueue() {
+  if (!started) return;
+  if (inFlight) {
+    kicked = true;
+    return;
+  }
+  if (kickTimer) return;
+  kickTimer = setTimeout(() => {
+    kickTimer = undefined;
+    drain();
+  }, BATCH_WINDOW_MS);
+  kickTimer.unref();
+}
+
+// Queue the invite's email (saves the invite)
+export async function enqueueInviteEmail(invite: IInvite) {
+  if (!mailConfigured) {
+    invite.emailStatus = "skipped";
+    await invite.save();
+    return;
+  }
+  invite.emailStatus = "queued";
+  invite.emailAttempts = 0;
+  invite.emailNextAttemptAt = new Date();
+  invite.emailError = undefined;
+  await invite.save();
+  kickMailQueue();
+}
+
+export function startMailQueue() {
+  if (started || !mailConfigured) return;
+  started = true;
+  // Pick up anything left queued (or claimed by a worker that died)
+  drain();
+}
+
+// Stop polling, let a batch already claimed go out and record its status
+// (rather than leaving its lease to expire), then close the SMTP pool
+export async function stopMailQueue() {
+  started = false;
+  if (timer) clearTimeout(timer);
+  if (kickTimer) clearTimeout(kickTimer);
+  await inFlight;
+  transporter.close();
+}
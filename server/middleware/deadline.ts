@@ -0,0 +1,26 @@
+import { Request, RequestHandler } from "express";
+
+// Absolute deadline (epoch ms) set by the Python proxy. Past it the proxy
+// has already answered 504, so nobody is waiting for this response.
+const DEADLINE_HEADER = "x-flowspace-deadline";
+// Left out of a query's budget for building and sending the response
+const RESPONSE_MARGIN_MS = 50;
+
+export const deadlineMiddleware: RequestHandler = (req, res, next) => {
+  const deadline = Number(req.headers[DEADLINE_HEADER]);
+  if (Number.isFinite(deadline) && deadline > 0) {
+    // Sat in a queue until the proxy gave up on it; skip the work
+    if (deadline <= Date.now())
+      return res.status(504).json({ message: "Request deadline exceeded" });
+    (req as any).deadline = deadline;
+  }
+  next();
+};
+
+// maxTimeMS for a Mongo query so it stops with the proxy's deadline;
+// undefined (no limit) without one. Never 0, which Mongo reads as no limit.
+export function queryBudgetMs(req: Request): number | undefined {
+  const deadline = (req as any).deadline;
+  if (!deadline) return undefined;
+  return Math.max(deadline - Date.now() - RESPONSE_MARGIN_MS, 1);
+}
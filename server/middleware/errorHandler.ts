@@ -2,6 +2,7 @@ import { RequestHandler } from "express";
 
 export const errorHandler: RequestHandler = (err, _req, res, _next) => {
   console.error(err);
-  const status = err.status || 500;
+  // Mongo's MaxTimeMSExpired: a query ran out of the proxy's deadline
+  const status = err.status || (err.code === 50 ? 504 : 500);
   res.status(status).json({ message: err.message || "Internal error" });
 };
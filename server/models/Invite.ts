@@ -1,5 +1,8 @@
 import mongoose, { Schema, Document, Types } from 'mongoose';
 
+// Delivery of the invite email, driven by the mail queue (server/mailQueue.ts)
+export type EmailStatus = 'queued' | 'sending' | 'sent' | 'failed' | 'skipped';
+
 export interface IInvite extends Document {
   boardId: Types.ObjectId;
   invitedBy: Types.ObjectId;
@@ -8,6 +11,12 @@ export interface IInvite extends Document {
   role: 'editor' | 'viewer';
   status: 'pending' | 'accepted' | 'expired';
   expiresAt: Date;
+  link?: string;
+  emailStatus: EmailStatus;
+  emailAttempts: number;
+  emailNextAttemptAt?: Date;
+  emailSentAt?: Date;
+  emailError?: string;
   createdAt: Date;
   updatedAt: Date;
 }
@@ -21,6 +30,16 @@ const InviteSchema = new Schema<IInvite>(
     role: { type: String, enum: ['editor', 'viewer'], default: 'editor' },
     status: { type: String, enum: ['pending', 'accepted', 'expired'], default: 'pending' },
     expiresAt: { type: Date, required: true },
+    link: { type: String },
+    emailStatus: {
+      type: String,
+      enum: ['queued', 'sending', 'sent', 'failed', 'skipped'],
+      default: 'queued',
+    },
+    emailAttempts: { type: Number, default: 0 },
+    emailNextAttemptAt: { type: Date },
+    emailSentAt: { type: Date },
+    emailError: { type: String },
   },
   { timestamps: true }
 );
@@ -28,6 +47,8 @@ const InviteSchema = new Schema<IInvite>(
 // Index for faster lookups
 InviteSchema.index({ token: 1 });
 InviteSchema.index({ boardId: 1, email: 1 });
+// The mail queue claims due invites by status and time
+InviteSchema.index({ emailStatus: 1, emailNextAttemptAt: 1 });
 
 export const Invite =
   mongoose.models.Invite || mongoose.model<IInvite>('Invite', InviteSchema);
@@ -1,11 +1,25 @@
+import fs from "fs";
 import path from "path";
 import { createServer } from "./index";
+import { stopMailQueue } from "./mailQueue";
 import express from "express";
 
 const port = process.env.PORT || 8001;
+// When set, listen on a Unix domain socket instead of a TCP port
+const socketPath = process.env.SOCKET_PATH;
 
 async function startServer() {
+  // Time spent loading modules before we get here
+  const bootMs = Math.round(process.uptime() * 1000);
   const { app, server } = await createServer({ connectDB: true });
+  const startup: Record<string, number> = {
+    bootMs,
+    mongoConnectMs: app.get("mongoConnectMs") ?? 0,
+  };
+
+  app.get("/health", (_req, res) => {
+    res.json({ status: "ok", uptime: process.uptime(), startup });
+  });
 
   // In production, serve the built SPA files
   const __dirname = import.meta.dirname;
@@ -24,7 +38,19 @@ async function startServer() {
     res.sendFile(path.join(distPath, "index.html"));
   });
 
+  if (socketPath) {
+    // Remove a stale socket left behind by a previous run
+    if (fs.existsSync(socketPath)) fs.unlinkSync(socketPath);
+    server.listen(socketPath, () => {
+      startup.listenMs = Math.round(process.uptime() * 1000);
+      fs.chmodSync(socketPath, 0o660);
+      console.log(`🚀 FlowSpace server listening on unix socket ${socketPath}`);
+    });
+    return;
+  }
+
   server.listen(port, () => {
+    startup.listenMs = Math.round(process.uptime() * 1000);
     console.log(`🚀 FlowSpace server running on port ${port}`);
     console.log(`📱 Frontend: http://localhost:${port}`);
     console.log(`🔧 API: http://localhost:${port}/api`);
@@ -36,13 +62,17 @@ startServer().catch((err) => {
   process.exit(1);
 });
 
-// Graceful shutdown
-process.on("SIGTERM", () => {
-  console.log("🛑 Received SIGTERM, shutting down gracefully");
-  process.exit(0);
-});
+// Graceful shutdown: give the mail queue's in-flight batch a bounded
+// chance to finish before exiting
+const SHUTDOWN_TIMEOUT_MS = 10_000;
 
-process.on("SIGINT", () => {
-  console.log("🛑 Received SIGINT, shutting down gracefully");
-  process.exit(0);
-});
+function shutdown(signal: string) {
+  console.log(`🛑 Received ${signal}, shutting down gracefully`);
+  setTimeout(() => process.exit(0), SHUTDOWN_TIMEOUT_MS).unref();
+  stopMailQueue()
+    .catch((err) => console.error("Mail queue shutdown error:", err))
+    .finally(() => process.exit(0));
+}
+
+process.on("SIGTERM", () => shutdown("SIGTERM"));
+process.on("SIGINT", () => shutdown("SIGINT"));
@@ -4,69 +4,2396 @@ FastAPI wrapper that proxies all requests to the Node.js backend.
 This allows supervisor's uvicorn command to work while using our Node.js server.
 """
 import os
+import re
+import json
+import time
+import hmac
+import base64
+import hashlib
+import math
+import secrets
+import mimetypes
 import subprocess
+from email.utils import formatdate, parsedate_to_datetime
 import signal
 import sys
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import StreamingResponse
+import zlib
+from contextlib import asynccontextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from fastapi import FastAPI, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse
 import httpx
 import asyncio
+from websockets.asyncio.client import connect as ws_connect, unix_connect as ws_unix_connect
+from collections import OrderedDict
+from typing import Optional
 
-# Start the Node.js server as a subprocess
-os.chdir('/app')
-os.environ['PORT'] = '8002'  # Node runs on 8002
-os.environ['MONGO_URL'] = 'mongodb://localhost:27017/flowspace'
+try:
+    import brotli
+except ImportError:  # optional: without it the proxy only offers gzip
+    brotli = None
 
-node_process = None
+# PROXY_SPAWN_NODE=0 proxies to upstreams that are already running (on PORT
+# or PROXY_UPSTREAM_SOCKET) instead of spawning Node, and leaves the working
+# directory and signal handlers alone, so benchmarks can import the app
+SPAWN_NODE = os.environ.get('PROXY_SPAWN_NODE', '1') == '1'
+
+if SPAWN_NODE:
+    # Start the Node.js server as a subprocess
+    os.chdir('/app')
+    os.environ['PORT'] = '8002'  # Node runs on 8002
+    os.environ['MONGO_URL'] = 'mongodb://localhost:27017/flowspace'
+
+# Node worker processes: worker i listens on NODE_BASE_PORT + i
+NODE_WORKERS = int(os.environ.get('PROXY_NODE_WORKERS', '1'))
+NODE_BASE_PORT = int(os.environ.get('PORT', '8002'))
+UPSTREAM_HOST = os.environ.get('PROXY_UPSTREAM_HOST', 'localhost')
+# Startup readiness: probe /api/ping until Node answers; meanwhile up to
+# STARTUP_QUEUE requests wait at most STARTUP_WAIT seconds for a worker
+PROBE_INTERVAL = float(os.environ.get('PROXY_PROBE_INTERVAL', '0.1'))
+PROBE_TIMEOUT = float(os.environ.get('PROXY_PROBE_TIMEOUT', '1.0'))
+STARTUP_QUEUE = int(os.environ.get('PROXY_STARTUP_QUEUE', '256'))
+STARTUP_WAIT = float(os.environ.get('PROXY_STARTUP_WAIT', '30'))
+# Crash supervision: restart a dead worker after an exponential backoff,
+# which resets once a worker has stayed up for RESTART_BACKOFF_RESET seconds
+SUPERVISE_INTERVAL = float(os.environ.get('PROXY_SUPERVISE_INTERVAL', '0.5'))
+RESTART_BACKOFF_MIN = float(os.environ.get('PROXY_RESTART_BACKOFF_MIN', '0.5'))
+RESTART_BACKOFF_MAX = float(os.environ.get('PROXY_RESTART_BACKOFF_MAX', '30'))
+RESTART_BACKOFF_RESET = float(os.environ.get('PROXY_RESTART_BACKOFF_RESET', '60'))
+# Requests that may be replayed against a restarted worker, and the errors
+# that mean the worker went away (timeouts are deliberately not retried)
+RETRYABLE_METHODS = ('GET', 'HEAD')
+WORKER_GONE_ERRORS = (httpx.ConnectError, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+# A worker is taken out of rotation after this many consecutive upstream
+# errors; after WORKER_EJECT_COOLDOWN seconds the supervisor probes
+# /api/ping and puts it back if Node answers
+WORKER_MAX_FAILURES = int(os.environ.get('PROXY_WORKER_MAX_FAILURES', '3'))
+WORKER_EJECT_COOLDOWN = float(os.environ.get('PROXY_WORKER_EJECT_COOLDOWN', '5'))
+
+# Upstream connection pool settings (overridable from the environment)
+POOL_MAX_CONNECTIONS = int(os.environ.get('PROXY_POOL_MAX_CONNECTIONS', '100'))
+POOL_MAX_KEEPALIVE = int(os.environ.get('PROXY_POOL_MAX_KEEPALIVE', '20'))
+# Kept below Node's 5s server.keepAliveTimeout so the pool never reuses a
+# connection Node is closing at the same moment
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get('PROXY_POOL_KEEPALIVE_EXPIRY', '4.0'))
+# Talk to Node over a Unix domain socket instead of TCP loopback when set;
+# with several workers each one gets the path suffixed with its index
+UPSTREAM_SOCKET = os.environ.get('PROXY_UPSTREAM_SOCKET', '')
+UPSTREAM_TIMEOUT = float(os.environ.get('PROXY_UPSTREAM_TIMEOUT', '30.0'))
+
+# Upstream time budgets in seconds. `total` runs from the moment a request
+# starts waiting for a worker until Node's response headers (or, when
+# buffered, its whole body) arrive; connect/read/write bound each socket
+# operation. Node is told the absolute deadline in DEADLINE_HEADER (epoch ms)
+# so handlers can stop early. PROXY_TIMEOUTS overrides per route, keyed like
+# PROXY_RATE_LIMITS, e.g. {"POST /api/invite": {"total": 5}}
+UPSTREAM_TIMEOUTS = {
+    'connect': float(os.environ.get('PROXY_UPSTREAM_CONNECT_TIMEOUT', '2.0')),
+    'read': UPSTREAM_TIMEOUT,
+    'write': UPSTREAM_TIMEOUT,
+    'total': UPSTREAM_TIMEOUT,
+}
+ROUTE_TIMEOUTS = {
+    'POST /api/user/avatar': {'write': 60.0, 'total': 60.0},
+    '/socket.io/': {'read': 45.0, 'total': 45.0},  # long-polling GETs
+}
+ROUTE_TIMEOUTS.update(json.loads(os.environ.get('PROXY_TIMEOUTS', '{}')))
+DEADLINE_HEADER = 'x-flowspace-deadline'
+
+# Stream request/response bodies through the proxy instead of buffering them
+STREAM_BODIES = os.environ.get('PROXY_STREAM_BODIES', '1') == '1'
+
+# WebSocket bridge to socket.io: frames buffered per direction, max frame size
+WS_MAX_QUEUE = int(os.environ.get('PROXY_WS_MAX_QUEUE', '16'))
+WS_MAX_MESSAGE = int(os.environ.get('PROXY_WS_MAX_MESSAGE', str(1024 * 1024)))
+WS_FORWARD_HEADERS = ('cookie', 'authorization', 'origin', 'user-agent', 'x-forwarded-for')
+
+# Per-user cache for hot GET endpoints; 0 seconds disables it
+CACHE_TTL = float(os.environ.get('PROXY_CACHE_TTL', '15'))
+CACHE_MAX_BYTES = int(os.environ.get('PROXY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_MAX_ENTRY_BYTES = int(os.environ.get('PROXY_CACHE_MAX_ENTRY_BYTES', str(4 * 1024 * 1024)))
+
+# ETags on buffered GET responses, answered with 304 when If-None-Match
+# matches. With board versions on, a validator stays good until a write
+# touches its board, so a matching revalidation skips Node entirely.
+ETAGS = os.environ.get('PROXY_ETAGS', '1') == '1'
+ETAG_VERSIONS = os.environ.get('PROXY_ETAG_VERSIONS', '1') == '1'
+ETAG_VALIDATOR_TTL = float(os.environ.get('PROXY_ETAG_VALIDATOR_TTL', '300'))
+ETAG_MAX_VALIDATORS = int(os.environ.get('PROXY_ETAG_MAX_VALIDATORS', '100000'))
+
+# Share one upstream call between concurrent identical GETs of the hot read
+# routes (CACHE_ROUTES). Coalesced responses are buffered, so other routes,
+# e.g. /api/user/export, keep streaming.
+COALESCE_GETS = os.environ.get('PROXY_COALESCE_GETS', '1') == '1'
+
+# Serve the built SPA from the proxy; only /api, /health, /socket.io and
+# /uploads still reach Node
+SPA_DIR = os.environ.get('PROXY_SPA_DIR', '/app/dist/spa')
+SERVE_SPA = os.environ.get('PROXY_SERVE_SPA', '1') == '1' and os.path.isdir(SPA_DIR)
+NODE_PREFIXES = ('/api/', '/health', '/socket.io/', '/uploads/')
+
+# Serve avatar uploads (written by Node's multer) from the proxy as well
+UPLOADS_DIR = os.environ.get('PROXY_UPLOADS_DIR', '/app/uploads')
+SERVE_UPLOADS = os.environ.get('PROXY_SERVE_UPLOADS', '1') == '1'
+
+# Compress proxied responses negotiated from Accept-Encoding
+COMPRESS = os.environ.get('PROXY_COMPRESS', '1') == '1'
+COMPRESS_MIN_BYTES = int(os.environ.get('PROXY_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('PROXY_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('PROXY_BROTLI_QUALITY', '4'))
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Verify access tokens at the edge and tell Node who the caller is through
+# a header it only trusts alongside the per-boot shared secret
+EDGE_AUTH = os.environ.get('PROXY_EDGE_AUTH', '1') == '1'
+TOKEN_CACHE_SIZE = int(os.environ.get('PROXY_TOKEN_CACHE_SIZE', '10000'))
+TRUSTED_USER_HEADER = 'x-flowspace-user-id'
+TRUSTED_SECRET_HEADER = 'x-flowspace-proxy-secret'
+PROXY_TRUST_SECRET = secrets.token_hex(32)
+os.environ['PROXY_TRUST_SECRET'] = PROXY_TRUST_SECRET  # inherited by the Node workers
+# Routes Node serves without authMiddleware; a stale token must not block them
+PUBLIC_API_PATHS = {
+    '/api/ping', '/api/demo',
+    '/api/auth/register', '/api/auth/login', '/api/auth/firebase-login',
+    '/api/auth/refresh', '/api/auth/logout',
+}
+
+# Token-bucket rate limits as (requests per second, burst), per verified user
+# and per client address. Users are only known with edge auth on, so with
+# PROXY_EDGE_AUTH=0 or no JWT_ACCESS_SECRET only the address limits apply.
+# PROXY_RATE_LIMITS overrides them per route, e.g.
+# {"POST /api/cards/:boardId/cards": {"user": [2, 10]}, "/api/activity": {"ip": [5, 20]}}
+# Load tools driving the proxy from one host look like a single address, so
+# they need PROXY_RATE_LIMIT=0 (flowspace_client.PROXY_UNLIMITED_ENV) or
+# they mostly measure 429s
+RATE_LIMIT = os.environ.get('PROXY_RATE_LIMIT', '1') == '1'
+RATE_LIMIT_USER = (float(os.environ.get('PROXY_RATE_LIMIT_USER_RPS', '50')),
+                   float(os.environ.get('PROXY_RATE_LIMIT_USER_BURST', '100')))
+RATE_LIMIT_IP = (float(os.environ.get('PROXY_RATE_LIMIT_IP_RPS', '100')),
+                 float(os.environ.get('PROXY_RATE_LIMIT_IP_BURST', '200')))
+RATE_LIMIT_ROUTES = json.loads(os.environ.get('PROXY_RATE_LIMITS', '{}'))
+RATE_LIMIT_BUCKETS = int(os.environ.get('PROXY_RATE_LIMIT_BUCKETS', '100000'))
+# Reverse proxies in front of this one that append to X-Forwarded-For. The
+# client address is taken this many entries from the right, since anything
+# further left was sent by the client itself; 0 ignores the header.
+TRUSTED_PROXY_HOPS = int(os.environ.get('PROXY_TRUSTED_HOPS', '1'))
+
+# Global cap on requests in flight to Node; up to UPSTREAM_QUEUE more wait
+# at most UPSTREAM_QUEUE_WAIT seconds for a slot before being shed
+MAX_UPSTREAM_CONCURRENCY = int(os.environ.get('PROXY_MAX_UPSTREAM_CONCURRENCY', '256'))
+UPSTREAM_QUEUE = int(os.environ.get('PROXY_UPSTREAM_QUEUE', '512'))
+UPSTREAM_QUEUE_WAIT = float(os.environ.get('PROXY_UPSTREAM_QUEUE_WAIT', '5'))
+# socket.io long-polling GETs park upstream for up to 45s each, so they are
+# capped separately and never hold the slots ordinary /api calls need
+MAX_SOCKETIO_CONCURRENCY = int(os.environ.get('PROXY_MAX_SOCKETIO_CONCURRENCY', '1024'))
+
+# Paths under this prefix are served by the proxy itself, never forwarded
+INTERNAL_PREFIX = '/_proxy/'
+
+
+def load_env_value(name: str, path: str = '/app/.env') -> str:
+    """Read a setting the way Node's dotenv does: process env first, then .env"""
+    if os.environ.get(name):
+        return os.environ[name]
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith(f'{name}='):
+                    return line.split('=', 1)[1].strip().strip('"').strip("'")
+    except OSError:
+        pass
+    return ''
+
+
+JWT_ACCESS_SECRET = load_env_value('JWT_ACCESS_SECRET')
+
+
+def b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class VerifiedTokenCache:
+    """LRU of tokens whose signature already checked out, kept until `exp`"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tokens: 'OrderedDict[str, dict]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        payload = self.tokens.get(token)
+        if payload is None:
+            self.misses += 1
+            return None
+        if 'exp' in payload and payload['exp'] <= time.time():
+            del self.tokens[token]
+            self.misses += 1
+            return None
+        self.tokens.move_to_end(token)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        self.tokens[token] = payload
+        while len(self.tokens) > self.size:
+            self.tokens.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'size': len(self.tokens), 'hits': self.hits, 'misses': self.misses}
+
+
+verified_tokens = VerifiedTokenCache(TOKEN_CACHE_SIZE)
+
+
+def verify_access_token(token: str) -> Optional[dict]:
+    """Check an HS256 access token the way authMiddleware.ts does.
+
+    Returns the payload when the signature and expiry are valid, else None.
+    """
+    if not JWT_ACCESS_SECRET or not token:
+        return None
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
+    try:
+        header_b64, payload_b64, signature_b64 = token.split('.')
+        signing_input = f'{header_b64}.{payload_b64}'.encode()
+        expected = hmac.new(JWT_ACCESS_SECRET.encode(), signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, b64url_decode(signature_b64)):
+            return None
+        if json.loads(b64url_decode(header_b64)).get('alg') != 'HS256':
+            return None
+        payload = json.loads(b64url_decode(payload_b64))
+        if not isinstance(payload, dict):
+            return None
+        for claim in ('exp', 'nbf'):
+            value = payload.get(claim)
+            # jsonwebtoken rejects non-numeric times too; bool is an int
+            # here, and a NaN would never compare as expired
+            if claim in payload and (isinstance(value, bool) or not isinstance(value, (int, float))
+                                     or not math.isfinite(value)):
+                return None
+        now = time.time()
+        if 'exp' in payload and payload['exp'] <= now:
+            return None
+        if 'nbf' in payload and payload['nbf'] > now:
+            return None
+    except (ValueError, TypeError, AttributeError, OverflowError):
+        return None
+    verified_tokens.put(token, payload)
+    return payload
+
+
+def bearer_token(headers) -> str:
+    parts = headers.get('authorization', '').split(' ')
+    return parts[1] if len(parts) == 2 and parts[0] == 'Bearer' else ''
+
+
+class UpstreamPool:
+    """Shared keep-alive HTTP client to the Node.js server.
+
+    Counts how many proxied requests had to open a fresh connection versus
+    reusing one from the pool, using httpcore's per-request trace hook.
+    """
+
+    def __init__(self, base_url: str, uds: str = ''):
+        self.base_url = base_url
+        self.uds = uds
+        self.client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+
+    async def start(self):
+        limits = httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        )
+        # Limits have to live on the transport once we supply our own
+        transport = httpx.AsyncHTTPTransport(uds=self.uds or None, limits=limits)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=transport,
+            timeout=UPSTREAM_TIMEOUT,
+            # The client is shared by every caller, so it must never store a
+            # Set-Cookie from Node and replay it for someone else; cookies
+            # only travel in the inbound request's own Cookie header
+            cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name.startswith('connection.connect_') and event_name.endswith('.complete'):
+            self.new_connections += 1
+
+    def build_request(self, method: str, url: str, **kwargs) -> httpx.Request:
+        extensions = kwargs.pop('extensions', {})
+        extensions['trace'] = self._trace
+        return self.client.build_request(method, url, extensions=extensions, **kwargs)
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        self.requests += 1
+        try:
+            return await self.client.send(request, **kwargs)
+        except Exception:
+            self.errors += 1
+            raise
+
+    def stats(self) -> dict:
+        return {
+            'upstream': self.base_url,
+            'transport': f'unix:{self.uds}' if self.uds else 'tcp',
+            'limits': {
+                'max_connections': POOL_MAX_CONNECTIONS,
+                'max_keepalive_connections': POOL_MAX_KEEPALIVE,
+                'keepalive_expiry': POOL_KEEPALIVE_EXPIRY,
+            },
+            'requests': self.requests,
+            'new_connections': self.new_connections,
+            'reused_connections': max(self.requests - self.errors - self.new_connections, 0),
+            'errors': self.errors,
+        }
+
+
+class UpstreamNotReady(Exception):
+    """No Node worker became ready within the startup wait budget"""
+
+
+class UpstreamOverloaded(Exception):
+    """The upstream wait queue is full, or a queued request waited too long"""
+
+
+class UpstreamTimeout(Exception):
+    """The route's time budget ran out; phase is connect, read, write, pool or total"""
+
+    def __init__(self, phase: str):
+        super().__init__(phase)
+        self.phase = phase
+
+
+TIMEOUT_PHASES = (
+    (httpx.ConnectTimeout, 'connect'),
+    (httpx.ReadTimeout, 'read'),
+    (httpx.WriteTimeout, 'write'),
+    (httpx.PoolTimeout, 'pool'),
+)
+
+
+class TimeoutPolicies:
+    """Per-route upstream time budgets, resolved once per (method, route).
+
+    A `METHOD route` entry wins over a bare route entry, which wins over
+    the defaults; each may set only some of connect/read/write/total.
+    """
+
+    def __init__(self, defaults: dict, routes: dict):
+        self.defaults = defaults
+        self.routes = routes
+        self.resolved = {}
+
+    def policy(self, method: str, route: str) -> dict:
+        policy = self.resolved.get((method, route))
+        if policy is None:
+            policy = dict(self.defaults)
+            policy.update(self.routes.get(route, {}))
+            policy.update(self.routes.get(f'{method} {route}', {}))
+            self.resolved[(method, route)] = policy
+        return policy
+
+    def timeout(self, policy: dict, remaining: float) -> httpx.Timeout:
+        """httpx timeouts for one attempt, none of them outliving the deadline"""
+        return httpx.Timeout(
+            connect=min(policy['connect'], remaining),
+            read=min(policy['read'], remaining),
+            write=min(policy['write'], remaining),
+            pool=remaining,
+        )
+
+    def stats(self) -> dict:
+        return {'defaults': self.defaults, 'routes': self.routes}
+
+
+class AdmissionControl:
+    """Caps concurrent upstream requests with a bounded, time-limited queue"""
+
+    def __init__(self, limit: int, queue_size: int, max_wait: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    async def acquire(self):
+        if self.semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self.shed += 1
+                raise UpstreamOverloaded()
+            self.waiting += 1
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise UpstreamOverloaded()
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'queue_size': self.queue_size,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'shed': self.shed,
+        }
+
+
+class NodeWorker:
+    """One `node dist/server/node-build.mjs` child and its upstream pool"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.port = NODE_BASE_PORT + index
+        if UPSTREAM_SOCKET and NODE_WORKERS > 1:
+            self.socket_path = f'{UPSTREAM_SOCKET}.{index}'
+        else:
+            self.socket_path = UPSTREAM_SOCKET
+        self.base_url = f'http://{UPSTREAM_HOST}:{self.port}'
+        self.pool = UpstreamPool(self.base_url, uds=self.socket_path)
+        self.process: Optional[subprocess.Popen] = None
+        self.outstanding = 0
+        self.served = 0
+        self.consecutive_failures = 0
+        self.ejected_at = 0.0
+        self.ejections = 0
+        self.ready = asyncio.Event()
+        self.spawned_at = 0.0
+        self.startup: dict = {}
+        self.stopping = False
+        self.restarts = 0
+        self.last_exit_code: Optional[int] = None
+
+    def start(self):
+        if not SPAWN_NODE:
+            self.spawned_at = time.monotonic()
+            print(f"Using external upstream {self.socket_path or self.base_url} as worker {self.index}")
+            return
+        env = dict(os.environ, PORT=str(self.port))
+        if self.socket_path:
+            env['SOCKET_PATH'] = self.socket_path  # node-build listens here instead of PORT
+        self.ready.clear()
+        self.spawned_at = time.monotonic()
+        self.process = subprocess.Popen(
+            ['node', 'dist/server/node-build.mjs'],
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+            cwd='/app',
+            env=env,
+        )
+        self.startup = {'spawn_ms': round((time.monotonic() - self.spawned_at) * 1000, 1)}
+        print(f"Started Node.js worker {self.index} with PID: {self.process.pid}")
+
+    async def probe_until_ready(self) -> bool:
+        """Poll /api/ping until Node answers, then record the startup breakdown"""
+        while self.alive:
+            try:
+                response = await self.pool.client.get('/api/ping', timeout=PROBE_TIMEOUT)
+                if response.status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(PROBE_INTERVAL)
+        else:
+            return False
+
+        self.startup['ready_ms'] = round((time.monotonic() - self.spawned_at) * 1000, 1)
+        try:
+            # Node's own view: module load, Mongo connect and listen times
+            response = await self.pool.client.get('/health', timeout=PROBE_TIMEOUT)
+            self.startup['node'] = response.json().get('startup')
+        except (httpx.HTTPError, ValueError):
+            pass
+        self.ready.set()
+        print(f"Node.js worker {self.index} ready after {self.startup['ready_ms']}ms")
+        return True
+
+    async def supervise(self):
+        """Keep the child running: wait for readiness, watch it, restart on exit"""
+        backoff = RESTART_BACKOFF_MIN
+        while not self.stopping:
+            await self.probe_until_ready()
+            while self.alive:
+                await asyncio.sleep(SUPERVISE_INTERVAL)
+                if self.ejected and time.monotonic() - self.ejected_at >= WORKER_EJECT_COOLDOWN:
+                    await self.probe_ejected()
+            if self.stopping:
+                return
+
+            self.ready.clear()
+            self.last_exit_code = self.process.returncode
+            if time.monotonic() - self.spawned_at > RESTART_BACKOFF_RESET:
+                backoff = RESTART_BACKOFF_MIN
+            print(f"Node.js worker {self.index} exited with code {self.last_exit_code}, "
+                  f"restarting in {backoff}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+            if self.stopping:
+                return
+            self.restarts += 1
+            self.consecutive_failures = 0
+            self.start()
+
+    async def probe_ejected(self):
+        """Half-open check of an ejected worker: one ping decides whether it
+        rejoins the rotation or sits out another cooldown"""
+        try:
+            response = await self.pool.client.get('/api/ping', timeout=PROBE_TIMEOUT)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok and self.ejected:
+            self.consecutive_failures = 0
+            print(f"Node.js worker {self.index} answered its probe, back in rotation")
+        elif not ok:
+            self.ejected_at = time.monotonic()
+
+    def stop(self):
+        self.stopping = True
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+
+    @property
+    def alive(self) -> bool:
+        if not SPAWN_NODE:
+            return not self.stopping  # external upstreams are never restarted
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def ejected(self) -> bool:
+        return self.consecutive_failures >= WORKER_MAX_FAILURES
+
+    @property
+    def healthy(self) -> bool:
+        return self.alive and self.ready.is_set() and not self.ejected
+
+    @property
+    def ws_url(self) -> str:
+        return self.base_url.replace('http', 'ws', 1)
+
+    def acquire(self):
+        self.outstanding += 1
+
+    def release(self, ok: Optional[bool] = True):
+        """ok=None for calls that ended for reasons that say nothing about
+        the worker (the client went away, the task was cancelled)"""
+        self.outstanding -= 1
+        self.served += 1
+        if ok:
+            self.consecutive_failures = 0
+        elif ok is False:
+            self.consecutive_failures += 1
+            if self.consecutive_failures == WORKER_MAX_FAILURES:
+                self.ejected_at = time.monotonic()
+                self.ejections += 1
+        if ok is False and not self.alive:
+            # Do not wait for the supervisor tick to stop routing here
+            self.ready.clear()
+
+    def stats(self) -> dict:
+        return {
+            'index': self.index,
+            'pid': self.process.pid if self.process else None,
+            'alive': self.alive,
+            'ready': self.ready.is_set(),
+            'healthy': self.healthy,
+            'startup': self.startup,
+            'restarts': self.restarts,
+            'last_exit_code': self.last_exit_code,
+            'outstanding': self.outstanding,
+            'served': self.served,
+            'consecutive_failures': self.consecutive_failures,
+            'ejections': self.ejections,
+            'pool': self.pool.stats(),
+        }
+
+
+class WorkerPool:
+    """Least-outstanding-requests balancing over the Node workers.
+
+    socket.io traffic is routed by a hash of the client address instead, so
+    the polling handshake, later polls and the WebSocket upgrade of one
+    client all land on the worker that holds its session.
+    """
+
+    def __init__(self, size: int):
+        self.workers = [NodeWorker(i) for i in range(size)]
+        self._next = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.retries = 0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def supervise(self) -> list:
+        return [asyncio.create_task(worker.supervise()) for worker in self.workers]
+
+    @property
+    def ready(self) -> bool:
+        return any(w.alive and w.ready.is_set() for w in self.workers)
+
+    async def wait_ready(self, worker: Optional[NodeWorker] = None):
+        """Hold a request until a worker (or the given one) is ready.
+
+        At most STARTUP_QUEUE requests wait at once; the rest, and any that
+        wait longer than STARTUP_WAIT, get UpstreamNotReady.
+        """
+        candidates = [worker] if worker else self.workers
+        for w in candidates:
+            if w.ready.is_set() and not w.alive:
+                w.ready.clear()  # died since its last supervisor tick
+        if any(w.ready.is_set() for w in candidates):
+            return
+        if self.waiting >= STARTUP_QUEUE:
+            self.rejected += 1
+            raise UpstreamNotReady()
+        self.waiting += 1
+        waiters = [asyncio.create_task(w.ready.wait()) for w in candidates]
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=STARTUP_WAIT, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.waiting -= 1
+            for task in waiters:
+                task.cancel()
+        if not done:
+            self.rejected += 1
+            raise UpstreamNotReady()
+
+    def pick(self) -> NodeWorker:
+        candidates = [w for w in self.workers if w.healthy] or self.workers
+        # Rotate the starting point so ties do not always favour worker 0
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next:] + candidates[:self._next]
+        return min(rotated, key=lambda w: w.outstanding)
+
+    def sticky(self, key: str) -> NodeWorker:
+        return self.workers[zlib.crc32(key.encode()) % len(self.workers)]
+
+    def stats(self) -> list:
+        return [worker.stats() for worker in self.workers]
+
+
+OBJECT_ID = r'([0-9a-fA-F]{24})'
+
+# Cacheable GET routes and the invalidation tags their entries carry
+CACHE_ROUTES = [
+    (re.compile(r'^/api/boards/?$'), lambda m: ('boards',)),
+    (re.compile(rf'^/api/boards/{OBJECT_ID}$'), lambda m: (f'board:{m[1]}',)),
+    (re.compile(rf'^/api/cards/{OBJECT_ID}/cards$'), lambda m: (f'board:{m[1]}', 'cards')),
+    (re.compile(r'^/api/activity/?$'), lambda m: ('activity',)),
+]
+
+
+def route_tags(path: str) -> Optional[tuple]:
+    """Invalidation tags of a CACHE_ROUTES path, or None for other paths"""
+    for pattern, tags_for in CACHE_ROUTES:
+        match = pattern.match(path)
+        if match:
+            return tags_for(match)
+    return None
+
+
+# Writes and the tags they invalidate. Writes that match nothing here clear
+# the whole cache, since e.g. a profile change shows up in every card list.
+CARD_WRITE = re.compile(rf'^/api/cards/{OBJECT_ID}$')
+WRITE_RULES = [
+    ('POST', re.compile(r'^/api/boards/?$'), lambda m: ('boards', 'activity')),
+    ('POST', re.compile(rf'^/api/boards/{OBJECT_ID}/invite$'), lambda m: ('boards', f'board:{m[1]}')),
+    ('POST', re.compile(rf'^/api/cards/{OBJECT_ID}/cards$'), lambda m: (f'board:{m[1]}', 'activity')),
+    ('PUT', re.compile(rf'^/api/{OBJECT_ID}/notes$'), lambda m: (f'board:{m[1]}',)),
+    ('POST', re.compile(r'^/api/activity/?$'), lambda m: ('activity',)),
+    ('POST', re.compile(r'^/api/invite/?$'), lambda m: ()),
+    ('POST', re.compile(r'^/api/auth/'), lambda m: ()),
+]
+
+
+class CachedResponse:
+    __slots__ = ('status_code', 'headers', 'body', 'expires', 'tags', 'size')
+
+    def __init__(self, status_code: int, headers: httpx.Headers, body: bytes, expires: float, tags: tuple):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+        self.tags = tags
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers.items())
+
+
+class ResponseCache:
+    """Byte-bounded LRU of GET responses keyed by route and verified user.
+
+    Entries carry tags such as `board:<id>` so that a successful write can
+    drop just the responses it affects. Card ids seen in cached card lists
+    are remembered so PUT/DELETE /api/cards/:id can be traced to a board.
+
+    Every invalidation also bumps a version per tag (and `clear` bumps a
+    global epoch). The ETag last sent for a key is kept with the versions it
+    was computed under, which outlives the cached body itself.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entry_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries: 'OrderedDict[tuple, CachedResponse]' = OrderedDict()
+        self.by_tag: dict = {}
+        self.card_boards: 'OrderedDict[str, str]' = OrderedDict()
+        self.versions: dict = {}
+        self.epoch = 0
+        self.validators: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self.revalidated = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and bool(JWT_ACCESS_SECRET)
+
+    def lookup(self, method: str, path: str, query: str, headers):
+        """Return (key, tags) for a cacheable request, or None"""
+        if not self.enabled or method != 'GET':
+            return None
+        tags = route_tags(path)
+        if tags is None:
+            return None
+        # Only cache for callers whose token we verified ourselves, so a
+        # forged token can never read another user's entry
+        payload = verify_access_token(bearer_token(headers))
+        if not payload or 'sub' not in payload:
+            return None
+        return (method, path, query, str(payload['sub'])), tags
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None or entry.expires <= time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, tags: tuple, status_code: int, headers: httpx.Headers, body: bytes):
+        entry = CachedResponse(status_code, headers, body, time.monotonic() + self.ttl, tags)
+        if entry.size > self.max_entry_bytes:
+            return
+        if key in self.entries:
+            self._drop(key)
+        self.entries[key] = entry
+        self.bytes += entry.size
+        for tag in tags:
+            self.by_tag.setdefault(tag, set()).add(key)
+        self.stores += 1
+        if 'cards' in tags:
+            self._remember_cards(tags, body)
+        while self.bytes > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remember_cards(self, tags: tuple, body: bytes):
+        board_id = tags[0].split(':', 1)[1]
+        try:
+            cards = json.loads(body).get('cards', [])
+        except (ValueError, AttributeError):
+            return
+        for card in cards:
+            if isinstance(card, dict) and '_id' in card:
+                self.card_boards[str(card['_id'])] = board_id
+        while len(self.card_boards) > 100000:
+            self.card_boards.popitem(last=False)
+
+    def _drop(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self.by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_tag[tag]
+
+    def invalidate(self, tags):
+        for tag in tags:
+            self.versions[tag] = self.versions.get(tag, 0) + 1
+            for key in list(self.by_tag.get(tag, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.epoch += 1
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.by_tag.clear()
+        self.bytes = 0
+
+    def stamp(self, tags: tuple) -> tuple:
+        return (self.epoch,) + tuple(self.versions.get(tag, 0) for tag in tags)
+
+    def remember_etag(self, key: tuple, tags: tuple, etag: str, stamp: tuple):
+        """Record the ETag sent for key, valid while stamp still matches.
+
+        The stamp must be taken before the upstream call, so a write racing
+        with it leaves the validator stale rather than wrongly current.
+        """
+        if not ETAG_VERSIONS or stamp != self.stamp(tags):
+            return
+        self.validators[key] = (etag, stamp, time.monotonic() + ETAG_VALIDATOR_TTL)
+        self.validators.move_to_end(key)
+        while len(self.validators) > ETAG_MAX_VALIDATORS:
+            self.validators.popitem(last=False)
+
+    def current_etag(self, key: tuple, tags: tuple) -> Optional[str]:
+        """The ETag still known to be current for key, if any"""
+        validator = self.validators.get(key)
+        if validator is None:
+            return None
+        etag, stamp, expires = validator
+        if stamp != self.stamp(tags) or expires <= time.monotonic():
+            del self.validators[key]
+            return None
+        return etag
+
+    def card_tags(self, card_id: Optional[str]) -> tuple:
+        board_id = self.card_boards.get(card_id) if card_id else None
+        return (f'board:{board_id}', 'activity') if board_id else ('cards', 'activity')
+
+    def invalidate_write(self, method: str, path: str):
+        """Drop the entries a successful POST/PUT/DELETE may have changed.
+
+        The tag versions are bumped even when nothing is cached, since a
+        read still in flight was stamped with the old ones.
+        """
+        match = CARD_WRITE.match(path)
+        if match and method in ('PUT', 'DELETE'):
+            self.invalidate(self.card_tags(match[1]))
+            return
+        for rule_method, pattern, tags_for in WRITE_RULES:
+            match = pattern.match(path)
+            if match and method == rule_method:
+                self.invalidate(tags_for(match))
+                return
+        self.clear()
+
+    @staticmethod
+    def socket_event(frame: str) -> Optional[tuple]:
+        """(event, data) of a socket.io event frame (`42["card:update", {...}]`)"""
+        if not frame.startswith('42'):
+            return None
+        try:
+            event, data = json.loads(frame[frame.index('['):])[:2]
+        except (ValueError, TypeError):
+            return None
+        return (event, data) if isinstance(data, dict) else None
+
+    def invalidate_socket_event(self, frame: str):
+        """Invalidate for writes a client sends over socket.io.
+
+        This runs before Node has written anything, so a read racing with
+        the write can still be stamped with the new versions;
+        invalidate_socket_ack bumps them again once the write is done.
+        Like invalidate_write it bumps even with nothing cached.
+        """
+        parsed = self.socket_event(frame)
+        if parsed is None:
+            return
+        event, data = parsed
+        if event == 'card:create':
+            self.invalidate((f"board:{data.get('boardId')}", 'activity'))
+        elif event in ('card:update', 'card:delete'):
+            self.invalidate(self.card_tags(data.get('id')))
+        elif event == 'note:update':
+            self.invalidate((f"board:{data.get('boardId')}",))
+
+    def invalidate_polling_payload(self, payload: bytes):
+        """invalidate_socket_event for each packet of a long-polling POST
+        (the same frames as over WebSocket, separated by \\x1e)"""
+        for packet in payload.decode('utf-8', 'replace').split('\x1e'):
+            self.invalidate_socket_event(packet)
+
+    def invalidate_polling_acks(self, payload: bytes):
+        """invalidate_socket_ack for each packet of a long-polling GET response"""
+        for packet in payload.decode('utf-8', 'replace').split('\x1e'):
+            self.invalidate_socket_ack(packet)
+
+    def invalidate_socket_ack(self, frame: str):
+        """Invalidate again when Node acknowledges a socket.io write
+        (`card:update:ok` etc.) or announces the activity it logged"""
+        parsed = self.socket_event(frame)
+        if parsed is None:
+            return
+        event, data = parsed
+        if event in ('card:create:ok', 'card:update:ok'):
+            board_id = data.get('boardId')
+            self.invalidate((f'board:{board_id}', 'activity') if board_id else self.card_tags(data.get('_id')))
+        elif event == 'card:delete:ok':
+            self.invalidate(self.card_tags(data.get('id')))
+        elif event == 'note:update:ok':
+            self.invalidate((f"board:{data.get('boardId')}",))
+        elif event == 'activity:new':
+            self.invalidate(('activity',))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'ttl': self.ttl,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'validators': len(self.validators),
+            'revalidated': self.revalidated,
+        }
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls onto one in-flight task.
+
+    The shared task is shielded, so a leader whose client disconnects does
+    not cancel the upstream call the followers are still waiting on.
+    """
+
+    def __init__(self):
+        self.calls: dict = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key, fn):
+        task = self.calls.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Future):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here if every waiter went away
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self.calls),
+            'leaders': self.leaders,
+            'collapsed': self.collapsed,
+        }
+
+
+def request_identity(headers) -> str:
+    """Who a request acts as, for sharing responses between requests"""
+    payload = verify_access_token(bearer_token(headers))
+    if payload and 'sub' in payload:
+        return f"user:{payload['sub']}"
+    raw = f"{headers.get('authorization', '')}\0{headers.get('cookie', '')}"
+    return 'raw:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+# Route templates reported in metrics; anything else is folded into a
+# catch-all so label cardinality stays bounded
+ROUTE_TEMPLATES = {
+    '/api/ping', '/api/demo',
+    '/api/auth/register', '/api/auth/login', '/api/auth/firebase-login',
+    '/api/auth/me', '/api/auth/refresh', '/api/auth/logout',
+    '/api/boards', '/api/boards/:id', '/api/boards/:id/invite',
+    '/api/cards/:boardId/cards', '/api/cards/:id',
+    '/api/:boardId/notes',
+    '/api/activity',
+    '/api/teams', '/api/teams/:id', '/api/teams/:id/members',
+    '/api/invite', '/api/invite/:token/accept', '/api/invite/board/:boardId',
+    '/api/user/profile', '/api/user/avatar', '/api/user/account', '/api/user/export',
+    '/health', '/socket.io/',
+}
+ROUTE_PARAM_NAMES = {
+    '/api/cards/:id/cards': '/api/cards/:boardId/cards',
+    '/api/:id/notes': '/api/:boardId/notes',
+    '/api/invite/board/:id': '/api/invite/board/:boardId',
+}
+OBJECT_ID_SEGMENT = re.compile(r'^[0-9a-fA-F]{24}$')
+INVITE_TOKEN_SEGMENT = re.compile(r'^[0-9a-f]{64}$')
+
+
+def route_template(path: str) -> str:
+    """Map a request path to its Express route, e.g. /api/cards/:id"""
+    if path.startswith('/uploads/'):
+        return '/uploads/*'
+    segments = []
+    for segment in path.rstrip('/').split('/'):
+        if OBJECT_ID_SEGMENT.match(segment):
+            segment = ':id'
+        elif INVITE_TOKEN_SEGMENT.match(segment):
+            segment = ':token'
+        segments.append(segment)
+    template = '/'.join(segments) or '/'
+    if path == '/socket.io/':
+        template = path
+    template = ROUTE_PARAM_NAMES.get(template, template)
+    if template in ROUTE_TEMPLATES:
+        return template
+    return '/api/*' if path.startswith('/api/') else '/*'
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+def format_labels(labels: dict) -> str:
+    return ','.join(f'{k}="{v}"' for k, v in labels.items())
+
+
+class ProxyMetrics:
+    """Request metrics rendered in the Prometheus text exposition format.
+
+    Latency is split into the time spent waiting on Node (upstream) and the
+    rest of the time the proxy spent on the request (overhead); both are
+    measured up to the point where response headers are ready.
+    """
+
+    def __init__(self):
+        self.total = {}
+        self.upstream = {}
+        self.overhead = {}
+        self.responses = {}
+        self.request_bytes = {}
+        self.response_bytes = {}
+        self.timeouts = {}
+        self.in_flight = 0
+
+    def observe(self, route: str, method: str, status_code: int,
+                total: float, upstream_seconds: float, request_bytes: int):
+        key = (route, method)
+        for series, value in ((self.total, total),
+                              (self.upstream, upstream_seconds),
+                              (self.overhead, max(total - upstream_seconds, 0.0))):
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+        status_key = (route, method, str(status_code))
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+        self.request_bytes[route] = self.request_bytes.get(route, 0) + request_bytes
+
+    def add_response_bytes(self, route: str, size: int):
+        self.response_bytes[route] = self.response_bytes.get(route, 0) + size
+
+    def add_timeout(self, route: str, method: str, phase: str):
+        key = (route, method, phase)
+        self.timeouts[key] = self.timeouts.get(key, 0) + 1
+
+    def _histogram_lines(self, name: str, help_text: str, series: dict) -> list:
+        lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (route, method), histogram in sorted(series.items()):
+            labels = format_labels({'route': route, 'method': method})
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        lines += self._histogram_lines(
+            'flowspace_proxy_request_duration_seconds',
+            'Time from request arrival to response headers', self.total)
+        lines += self._histogram_lines(
+            'flowspace_proxy_upstream_duration_seconds',
+            'Time spent waiting on Node, including startup queueing', self.upstream)
+        lines += self._histogram_lines(
+            'flowspace_proxy_overhead_seconds',
+            'Request time not spent waiting on Node', self.overhead)
+
+        lines += ['# HELP flowspace_proxy_responses_total Responses by route and status code',
+                  '# TYPE flowspace_proxy_responses_total counter']
+        for (route, method, status), count in sorted(self.responses.items()):
+            labels = format_labels({'route': route, 'method': method, 'status': status})
+            lines.append(f'flowspace_proxy_responses_total{{{labels}}} {count}')
+
+        lines += ['# HELP flowspace_proxy_upstream_timeouts_total Upstream calls that ran out of time, by phase',
+                  '# TYPE flowspace_proxy_upstream_timeouts_total counter']
+        for (route, method, phase), count in sorted(self.timeouts.items()):
+            labels = format_labels({'route': route, 'method': method, 'phase': phase})
+            lines.append(f'flowspace_proxy_upstream_timeouts_total{{{labels}}} {count}')
+
+        for name, series, help_text in (
+            ('flowspace_proxy_request_bytes_total', self.request_bytes, 'Request body bytes received'),
+            ('flowspace_proxy_response_bytes_total', self.response_bytes, 'Response body bytes sent'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for route, size in sorted(series.items()):
+                lines.append(f'{name}{{route="{route}"}} {size}')
+
+        lines += ['# HELP flowspace_proxy_in_flight Requests currently being proxied',
+                  '# TYPE flowspace_proxy_in_flight gauge',
+                  f'flowspace_proxy_in_flight {self.in_flight}']
+
+        lines += ['# HELP flowspace_proxy_worker_outstanding Requests outstanding per Node worker',
+                  '# TYPE flowspace_proxy_worker_outstanding gauge']
+        lines += [f'flowspace_proxy_worker_outstanding{{worker="{w.index}"}} {w.outstanding}'
+                  for w in workers.workers]
+        lines += ['# HELP flowspace_proxy_pool_utilisation Outstanding requests over pool max connections',
+                  '# TYPE flowspace_proxy_pool_utilisation gauge']
+        lines += [f'flowspace_proxy_pool_utilisation{{worker="{w.index}"}} '
+                  f'{w.outstanding / POOL_MAX_CONNECTIONS:.4f}'
+                  for w in workers.workers]
+        lines += ['# HELP flowspace_proxy_pool_connections_total Upstream connections by outcome',
+                  '# TYPE flowspace_proxy_pool_connections_total counter']
+        for w in workers.workers:
+            pool = w.pool.stats()
+            for outcome in ('new', 'reused'):
+                lines.append(f'flowspace_proxy_pool_connections_total{{worker="{w.index}",outcome="{outcome}"}} '
+                             f'{pool[outcome + "_connections"]}')
+        lines += ['# HELP flowspace_proxy_worker_restarts_total Node worker restarts',
+                  '# TYPE flowspace_proxy_worker_restarts_total counter']
+        lines += [f'flowspace_proxy_worker_restarts_total{{worker="{w.index}"}} {w.restarts}'
+                  for w in workers.workers]
+
+        lines += ['# HELP flowspace_proxy_compression_bytes_total Bytes through the response compressor',
+                  '# TYPE flowspace_proxy_compression_bytes_total counter']
+        compression = compression_stats.stats()
+        for encoding, entry in sorted(compression.items()):
+            for direction in ('in', 'out'):
+                lines.append(f'flowspace_proxy_compression_bytes_total{{encoding="{encoding}",direction="{direction}"}} '
+                             f'{entry["bytes_" + direction]}')
+        lines += ['# HELP flowspace_proxy_compression_cpu_seconds_total CPU time spent compressing',
+                  '# TYPE flowspace_proxy_compression_cpu_seconds_total counter']
+        lines += [f'flowspace_proxy_compression_cpu_seconds_total{{encoding="{encoding}"}} {entry["cpu_seconds"]}'
+                  for encoding, entry in sorted(compression.items())]
+
+        cache = response_cache.stats()
+        coalescing = single_flight.stats()
+        for name, kind, value in (
+            ('flowspace_proxy_cache_hits_total', 'counter', cache['hits']),
+            ('flowspace_proxy_cache_misses_total', 'counter', cache['misses']),
+            ('flowspace_proxy_cache_bytes', 'gauge', cache['bytes']),
+            ('flowspace_proxy_not_modified_total', 'counter', etag_stats['not_modified']),
+            ('flowspace_proxy_revalidated_total', 'counter', cache['revalidated']),
+            ('flowspace_proxy_coalesced_total', 'counter', coalescing['collapsed']),
+            ('flowspace_proxy_websockets_active', 'gauge', ws_stats['active']),
+            ('flowspace_proxy_rate_limited_total', 'counter', sum(rate_limiter.limited.values())),
+            ('flowspace_proxy_upstream_active', 'gauge', admission.active),
+            ('flowspace_proxy_upstream_waiting', 'gauge', admission.waiting),
+            ('flowspace_proxy_upstream_shed_total', 'counter', admission.shed),
+            ('flowspace_proxy_socketio_active', 'gauge', socketio_admission.active),
+            ('flowspace_proxy_socketio_shed_total', 'counter', socketio_admission.shed),
+        ):
+            lines += [f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+def accepted_encodings(header: str) -> set:
+    """Content codings from an Accept-Encoding header, dropping q=0 entries"""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+class StaticFile:
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'last_modified', 'content_type', 'variants', 'checked_at')
+
+    def __init__(self, path: str, stat: os.stat_result, etag: str, content_type: str):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = etag
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = content_type
+        self.variants: dict = {}
+        self.checked_at = time.monotonic()
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stat_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[tuple]:
+    """Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (absent, malformed or
+    multi-range, which we answer with the full body).
+    """
+    if not header.startswith('bytes='):
+        return None
+    spec = header[6:].strip()
+    if ',' in spec:
+        return None
+    first, _, last = spec.partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """Send [start, end] of a file.
+
+    Uses the ASGI zero-copy send extension when the server offers it, so
+    the kernel copies the file straight to the socket; otherwise the file
+    is read in chunks off the event loop.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, start: int, end: int, status_code: int,
+                 headers: dict, media_type: str, method: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.count = end - start + 1
+        self.send_body = method != 'HEAD'
+        self.headers['content-length'] = str(self.count)
+
+    async def __call__(self, scope, receive, send):
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        with open(self.path, 'rb') as f:
+            if 'http.response.zerocopysend' in scope.get('extensions', {}):
+                await send({
+                    'type': 'http.response.zerocopysend',
+                    'file': f.fileno(),
+                    'offset': self.start,
+                    'count': self.count,
+                    'more_body': False,
+                })
+                return
+            f.seek(self.start)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                # File shrank under us; end the response rather than hang
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+class StaticAssets:
+    """Files under a root directory with an in-memory metadata cache.
+
+    The first request for a file stats it, derives a strong ETag (a content
+    hash, or inode/size/mtime when hashing is off) and looks for
+    precompressed `.br`/`.gz` siblings. Cached entries are trusted for
+    `recheck` seconds before the file is stat'ed again to notice changes.
+    Conditional requests and single byte ranges are handled here.
+    """
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, root: str, immutable_prefix: str = '', fallback: str = '',
+                 cache_control: str = 'no-cache', hash_content: bool = True,
+                 recheck: float = 1.0, max_files: int = 10000):
+        self.root = os.path.realpath(root)
+        self.immutable_prefix = immutable_prefix
+        self.fallback = fallback
+        self.default_cache_control = cache_control
+        self.hash_content = hash_content
+        self.recheck = recheck
+        self.max_files = max_files
+        self.files: 'OrderedDict[str, StaticFile]' = OrderedDict()
+        self.served = 0
+        self.not_modified = 0
+        self.partial = 0
+        self.compressed = 0
+
+    def _local_path(self, url_path: str) -> Optional[str]:
+        path = os.path.realpath(os.path.join(self.root, url_path.lstrip('/')))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None  # escapes the root
+        return path
+
+    async def lookup(self, url_path: str) -> Optional[StaticFile]:
+        info = self.files.get(url_path)
+        now = time.monotonic()
+        if info is not None and now - info.checked_at < self.recheck:
+            self.files.move_to_end(url_path)
+            return info
+
+        path = self._local_path(url_path)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None or not os.path.isfile(path):
+            self.files.pop(url_path, None)
+            return None
+        if info is not None and info.mtime == stat.st_mtime and info.size == stat.st_size:
+            info.checked_at = now
+            self.files.move_to_end(url_path)
+            return info
+
+        if self.hash_content:
+            digest = await asyncio.to_thread(file_digest, path)
+            etag = f'"{digest}"'
+        else:
+            etag = stat_etag(stat)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        info = StaticFile(path, stat, etag, content_type)
+        for encoding, suffix in self.ENCODINGS:
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            info.variants[encoding] = (path + suffix, variant_stat.st_size, f'{etag[:-1]}-{encoding}"')
+        self.files[url_path] = info
+        while len(self.files) > self.max_files:
+            self.files.popitem(last=False)
+        return info
+
+    def cache_control(self, url_path: str) -> str:
+        if self.immutable_prefix and url_path.startswith(self.immutable_prefix):
+            return 'public, max-age=31536000, immutable'
+        return self.default_cache_control
+
+    def is_fresh(self, request: Request, etag: str, info: StaticFile) -> bool:
+        """True when the client's conditional headers say its copy is current"""
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            return if_none_match.strip() == '*' or etag in if_none_match
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(info.mtime) <= since
+        return False
+
+    async def serve(self, request: Request, url_path: str = '') -> Optional[Response]:
+        """Answer from disk, or None if there is no such file (and no fallback)"""
+        url_path = url_path or request.url.path
+        info = await self.lookup(url_path)
+        is_immutable = bool(self.immutable_prefix) and url_path.startswith(self.immutable_prefix)
+        if info is None and self.fallback and not is_immutable:
+            url_path = self.fallback  # history-API routes get index.html
+            info = await self.lookup(url_path)
+        if info is None:
+            return None
+
+        path, size, etag = info.path, info.size, info.etag
+        headers = {
+            'cache-control': self.cache_control(url_path),
+            'last-modified': info.last_modified,
+            'accept-ranges': 'bytes',
+        }
+        if info.variants:
+            headers['vary'] = 'Accept-Encoding'
+            accepted = accepted_encodings(request.headers.get('accept-encoding', ''))
+            for encoding, _ in self.ENCODINGS:
+                if encoding in accepted and encoding in info.variants:
+                    path, size, etag = info.variants[encoding]
+                    headers['content-encoding'] = encoding
+                    self.compressed += 1
+                    break
+        headers['etag'] = etag
+
+        if self.is_fresh(request, etag, info):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        start, end, status_code = 0, size - 1, 200
+        range_header = request.headers.get('range')
+        if_range = request.headers.get('if-range')
+        if range_header and (if_range is None or if_range in (etag, info.last_modified)):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                headers['content-range'] = f'bytes */{size}'
+                return Response(status_code=416, headers=headers)
+            if byte_range is not None:
+                start, end = byte_range
+                status_code = 206
+                headers['content-range'] = f'bytes {start}-{end}/{size}'
+                self.partial += 1
+
+        self.served += 1
+        return FileRangeResponse(path, start, end, status_code, headers,
+                                 info.content_type, request.method)
+
+    def stats(self) -> dict:
+        return {
+            'root': self.root,
+            'files': len(self.files),
+            'served': self.served,
+            'not_modified': self.not_modified,
+            'partial': self.partial,
+            'compressed': self.compressed,
+        }
+
+
+class Compressor:
+    """Incremental gzip or brotli encoder with CPU-time accounting"""
+
+    def __init__(self, encoding: str, stats: 'CompressionStats'):
+        self.encoding = encoding
+        self.stats = stats
+        if encoding == 'br':
+            self._encoder = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._process = self._encoder.process
+        else:
+            self._encoder = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+            self._process = self._encoder.compress
+
+    def compress(self, data: bytes) -> bytes:
+        started = time.thread_time()
+        out = self._process(data)
+        self.stats.record(self.encoding, len(data), len(out), time.thread_time() - started)
+        return out
+
+    def finish(self) -> bytes:
+        started = time.thread_time()
+        out = self._encoder.finish() if self.encoding == 'br' else self._encoder.flush()
+        self.stats.record(self.encoding, 0, len(out), time.thread_time() - started, finished=True)
+        return out
+
+
+class CompressionStats:
+    def __init__(self):
+        self.by_encoding = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu: float, finished: bool = False):
+        entry = self.by_encoding.setdefault(
+            encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0})
+        entry['bytes_in'] += bytes_in
+        entry['bytes_out'] += bytes_out
+        entry['cpu_seconds'] += cpu
+        if finished:
+            entry['responses'] += 1
+
+    def stats(self) -> dict:
+        result = {}
+        for encoding, entry in self.by_encoding.items():
+            result[encoding] = dict(entry)
+            result[encoding]['cpu_seconds'] = round(entry['cpu_seconds'], 6)
+            result[encoding]['ratio'] = round(entry['bytes_out'] / entry['bytes_in'], 4) if entry['bytes_in'] else None
+        return result
+
+
+def choose_encoding(request: Request, status_code: int, headers: httpx.Headers, size: Optional[int]) -> Optional[str]:
+    """Pick br/gzip for a response, or None when it should go out as-is"""
+    if not COMPRESS or request.method == 'HEAD' or status_code in (204, 206, 304):
+        return None
+    if 'content-encoding' in headers or request.scope['path'].startswith('/socket.io/'):
+        return None  # already encoded, or latency-sensitive long-poll frames
+    if not headers.get('content-type', '').startswith(COMPRESSIBLE_TYPES):
+        return None  # images and other binary payloads are compressed already
+    if size is not None and size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = accepted_encodings(request.headers.get('accept-encoding', ''))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def mark_encoded(headers: httpx.Headers, encoding: str):
+    headers.pop('content-length', None)
+    headers['content-encoding'] = encoding
+    vary = headers.get('vary')
+    headers['vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+
+class RateLimiter:
+    """Token buckets per (scope, identity, rule), bounded as an LRU.
+
+    A route with its own entry in PROXY_RATE_LIMITS draws from buckets for
+    that route only; every other route shares the default buckets.
+    """
+
+    def __init__(self, defaults: dict, routes: dict, max_buckets: int):
+        self.defaults = defaults
+        self.routes = routes
+        self.max_buckets = max_buckets
+        self.buckets: 'OrderedDict[tuple, list]' = OrderedDict()
+        self.allowed = 0
+        self.limited = {'user': 0, 'ip': 0}
+
+    def rule(self, method: str, route: str) -> tuple:
+        for key in (f'{method} {route}', route):
+            if key in self.routes:
+                return key, self.routes[key]
+        return '*', {}
+
+    def _refill(self, key: tuple, rate: float, burst: float, now: float) -> list:
+        """The [tokens, updated_at] bucket for key, topped up to now"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [burst, now]
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    def check(self, method: str, route: str, user_id: Optional[str], address: str) -> Optional[tuple]:
+        """Returns None if allowed, else (scope, retry_after_seconds).
+
+        A token is only taken once every bucket has one, so a request
+        refused for its address does not use up the user's quota.
+        """
+        rule_key, overrides = self.rule(method, route)
+        now = time.monotonic()
+        buckets = []
+        for scope, identity in (('user', user_id), ('ip', address)):
+            if not identity:
+                continue
+            rate, burst = overrides.get(scope, self.defaults[scope])
+            bucket = self._refill((scope, identity, rule_key), rate, burst, now)
+            if bucket[0] < 1:
+                self.limited[scope] += 1
+                return scope, (1 - bucket[0]) / rate if rate > 0 else 60.0
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket[0] -= 1
+        self.allowed += 1
+        return None
+
+    def stats(self) -> dict:
+        return {
+            'buckets': len(self.buckets),
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'defaults': self.defaults,
+            'routes': self.routes,
+        }
+
+
+def client_address(headers, client) -> str:
+    """Best guess at the real client address, looking through the ingress"""
+    forwarded = headers.get('x-forwarded-for') if TRUSTED_PROXY_HOPS else None
+    if forwarded:
+        entries = [entry.strip() for entry in forwarded.split(',') if entry.strip()]
+        if entries:
+            return entries[max(len(entries) - TRUSTED_PROXY_HOPS, 0)]
+    return client.host if client else ''
+
+
+workers = WorkerPool(NODE_WORKERS)
+response_cache = ResponseCache(CACHE_TTL, CACHE_MAX_BYTES, CACHE_MAX_ENTRY_BYTES)
+single_flight = SingleFlight()
+edge_auth_stats = {'verified': 0, 'rejected': 0}
+etag_stats = {'issued': 0, 'not_modified': 0}
+timeout_policies = TimeoutPolicies(UPSTREAM_TIMEOUTS, ROUTE_TIMEOUTS)
+rate_limiter = RateLimiter({'user': RATE_LIMIT_USER, 'ip': RATE_LIMIT_IP}, RATE_LIMIT_ROUTES, RATE_LIMIT_BUCKETS)
+admission = AdmissionControl(MAX_UPSTREAM_CONCURRENCY, UPSTREAM_QUEUE, UPSTREAM_QUEUE_WAIT)
+socketio_admission = AdmissionControl(MAX_SOCKETIO_CONCURRENCY, UPSTREAM_QUEUE, UPSTREAM_QUEUE_WAIT)
+metrics = ProxyMetrics()
+compression_stats = CompressionStats()
+# Vite puts content-hashed bundles under /assets/
+spa_assets = StaticAssets(SPA_DIR, immutable_prefix='/assets/', fallback='/index.html')
+# Upload file names are unique per upload, so they never change in place;
+# ETags come from inode/size/mtime so serving never has to read the file
+upload_assets = StaticAssets(
+    UPLOADS_DIR,
+    cache_control='public, max-age=86400',
+    hash_content=False,
+)
+ws_stats = {'active': 0, 'opened': 0, 'failed': 0, 'frames_in': 0, 'frames_out': 0}
 
-def start_node_server():
-    global node_process
-    node_process = subprocess.Popen(
-        ['node', 'dist/server/node-build.mjs'],
-        stdout=sys.stdout,
-        stderr=sys.stderr,
-        cwd='/app'
-    )
-    print(f"Started Node.js server with PID: {node_process.pid}")
 
 def cleanup(signum, frame):
-    global node_process
-    if node_process:
-        node_process.terminate()
-        node_process.wait()
+    workers.stop()
     sys.exit(0)
 
-signal.signal(signal.SIGTERM, cleanup)
-signal.signal(signal.SIGINT, cleanup)
+if SPAWN_NODE:
+    signal.signal(signal.SIGTERM, cleanup)
+    signal.signal(signal.SIGINT, cleanup)
+
+# Start Node.js workers
+workers.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RATE_LIMIT and not (EDGE_AUTH and JWT_ACCESS_SECRET):
+        print("Per-user rate limits are off without edge auth; only per-address limits apply")
+    for worker in workers.workers:
+        await worker.pool.start()
+    supervisors = workers.supervise()
+    try:
+        yield
+    finally:
+        for task in supervisors:
+            task.cancel()
+        workers.stop()
+        for worker in workers.workers:
+            await worker.pool.close()
+
+
+# FastAPI only serves lifespan, the /_proxy/ endpoints and the WebSocket
+# bridge; proxied HTTP is handled by ProxyApp below without its routing.
+control_app = FastAPI(lifespan=lifespan)
 
-# Start Node.js server
-start_node_server()
 
-# Create FastAPI app that proxies to Node
-app = FastAPI()
+@control_app.get(INTERNAL_PREFIX + 'stats')
+async def proxy_stats():
+    """Per-worker health, load and connection pool statistics"""
+    return JSONResponse({
+        'workers': workers.stats(),
+        'websockets': ws_stats,
+        'cache': response_cache.stats(),
+        'coalescing': single_flight.stats(),
+        'spa': spa_assets.stats() if SERVE_SPA else None,
+        'uploads': upload_assets.stats() if SERVE_UPLOADS else None,
+        'compression': compression_stats.stats(),
+        'rate_limits': dict(rate_limiter.stats(), enabled=RATE_LIMIT,
+                            per_user=RATE_LIMIT and EDGE_AUTH and bool(JWT_ACCESS_SECRET)),
+        'timeouts': timeout_policies.stats(),
+        'admission': admission.stats(),
+        'socketio_admission': socketio_admission.stats(),
+        'etags': dict(etag_stats, enabled=ETAGS, versions=ETAG_VERSIONS),
+        'edge_auth': dict(edge_auth_stats, enabled=EDGE_AUTH and bool(JWT_ACCESS_SECRET),
+                          token_cache=verified_tokens.stats()),
+    })
 
-@app.middleware("http")
-async def proxy_to_node(request: Request, call_next):
-    """Proxy all requests to the Node.js server"""
-    async with httpx.AsyncClient() as client:
-        url = f"http://localhost:8002{request.url.path}"
-        if request.url.query:
-            url += f"?{request.url.query}"
-        
+
+@control_app.get(INTERNAL_PREFIX + 'metrics')
+async def proxy_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@control_app.get(INTERNAL_PREFIX + 'ready')
+async def proxy_ready():
+    """Readiness probe: 200 once at least one Node worker answers /api/ping"""
+    body = {
+        'ready': workers.ready,
+        'waiting': workers.waiting,
+        'rejected': workers.rejected,
+        'retries': workers.retries,
+        'workers': [
+            {'index': w.index, 'ready': w.ready.is_set(), 'restarts': w.restarts, 'startup': w.startup}
+            for w in workers.workers
+        ],
+    }
+    return JSONResponse(body, status_code=200 if workers.ready else 503)
+
+
+def not_ready_response() -> Response:
+    return Response(
+        content="Upstream starting, retry shortly",
+        status_code=503,
+        headers={'Retry-After': '1'},
+    )
+
+
+@control_app.websocket('/socket.io/')
+async def proxy_socketio(websocket: WebSocket):
+    """Bridge socket.io WebSocket connections to the Node.js server.
+
+    The long-polling transport is plain HTTP and goes through ProxyApp
+    like any other request; only the upgraded transport needs this bridge.
+    """
+    worker = workers.sticky(client_address(websocket.headers, websocket.client))
+    try:
+        await workers.wait_ready(worker)
+    except UpstreamNotReady:
+        await websocket.close(code=1013)  # try again later
+        return
+    url = worker.ws_url + '/socket.io/'
+    if websocket.url.query:
+        url += f"?{websocket.url.query}"
+    headers = [(k, v) for k, v in websocket.headers.items() if k in WS_FORWARD_HEADERS]
+
+    try:
+        # socket.io runs its own ping/pong, so the library keepalive is off
+        options = dict(
+            additional_headers=headers,
+            max_queue=WS_MAX_QUEUE,
+            max_size=WS_MAX_MESSAGE,
+            ping_interval=None,
+            open_timeout=UPSTREAM_TIMEOUT,
+        )
+        if worker.socket_path:
+            upstream_ws = await ws_unix_connect(worker.socket_path, url, **options)
+        else:
+            upstream_ws = await ws_connect(url, **options)
+    except Exception:
+        ws_stats['failed'] += 1
+        await websocket.close(code=1011)
+        return
+
+    await websocket.accept()
+    ws_stats['opened'] += 1
+    ws_stats['active'] += 1
+
+    async def client_to_upstream():
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            data = message.get('text')
+            if data is None:
+                data = message.get('bytes')
+            if isinstance(data, str):
+                response_cache.invalidate_socket_event(data)
+            if data is not None:
+                # Waits while the upstream write buffer is full
+                await upstream_ws.send(data)
+                ws_stats['frames_in'] += 1
+
+    async def upstream_to_client():
+        async for data in upstream_ws:
+            if isinstance(data, str):
+                response_cache.invalidate_socket_ack(data)
+                await websocket.send_text(data)
+            else:
+                await websocket.send_bytes(data)
+            ws_stats['frames_out'] += 1
+
+    pumps = [asyncio.create_task(client_to_upstream()), asyncio.create_task(upstream_to_client())]
+    try:
+        await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pumps:
+            task.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+        await upstream_ws.close()
         try:
-            # Forward the request to Node.js server
-            response = await client.request(
-                method=request.method,
-                url=url,
-                headers=dict(request.headers),
-                content=await request.body(),
-                timeout=30.0
-            )
-            
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=dict(response.headers)
+            await websocket.close()
+        except RuntimeError:
+            pass  # client already gone
+        ws_stats['active'] -= 1
+
+
+class UpstreamBody:
+    """A streamed upstream response and the worker slot and admission
+    permit it holds until released.
+
+    release() is idempotent: relay_body calls it when the body has been
+    relayed, and error paths call it when the relay never started (an
+    async generator that was never iterated skips its `finally`). Without
+    `ok` the worker's failure count is left alone.
+    """
+    __slots__ = ('response', 'worker', 'gate', 'released')
+
+    def __init__(self, response: httpx.Response, worker: NodeWorker, gate: AdmissionControl):
+        self.response = response
+        self.worker = worker
+        self.gate = gate
+        self.released = False
+
+    async def release(self, ok: Optional[bool] = None):
+        if self.released:
+            return
+        self.released = True
+        try:
+            await self.response.aclose()
+        finally:
+            finish_upstream(self.worker, self.gate, ok)
+
+
+async def relay_body(upstream: UpstreamBody):
+    """Yield upstream body chunks as they arrive, releasing the connection at the end.
+
+    Raw (still-encoded) bytes are relayed so the upstream content-encoding and
+    content-length headers stay valid. Each chunk is only pulled after the
+    previous one has been sent, so a slow client throttles the upstream read.
+    Only the worker's connection breaking counts against the worker; a
+    client that goes away mid-body (GeneratorExit, cancellation) does not.
+    """
+    ok = None
+    try:
+        async for chunk in upstream.response.aiter_raw():
+            yield chunk
+        ok = True
+    except WORKER_GONE_ERRORS:
+        ok = False
+        raise
+    finally:
+        await upstream.release(ok)
+
+
+def has_request_body(request: Request) -> bool:
+    return 'content-length' in request.headers or 'transfer-encoding' in request.headers
+
+
+async def compress_stream(chunks, compressor: Compressor):
+    try:
+        async for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+    finally:
+        await chunks.aclose()
+
+
+async def count_bytes(chunks, route: str):
+    try:
+        async for chunk in chunks:
+            metrics.add_response_bytes(route, len(chunk))
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+
+# Per-connection headers that must not be relayed (RFC 9110 section 7.6.1)
+HOP_BY_HOP = frozenset((
+    b'connection', b'keep-alive', b'proxy-authenticate', b'proxy-authorization',
+    b'te', b'trailer', b'transfer-encoding', b'upgrade',
+))
+# Headers only the proxy may set on the way to Node
+PROXY_ONLY_HEADERS = frozenset((TRUSTED_USER_HEADER.encode(), TRUSTED_SECRET_HEADER.encode(),
+                                DEADLINE_HEADER.encode()))
+ENCODING_HEADERS = (b'content-encoding', b'content-length')
+
+
+def relayable(raw, drop=frozenset()) -> list:
+    """Raw header pairs minus hop-by-hop ones, including any named in Connection"""
+    drop = HOP_BY_HOP | drop
+    for name, value in raw:
+        if name.lower() == b'connection':
+            drop = drop.union(token.strip().lower() for token in value.split(b','))
+    return [(name, value) for name, value in raw if name.lower() not in drop]
+
+
+def response_headers(response: httpx.Response, decoded: bool) -> httpx.Headers:
+    """Upstream response headers to relay; repeats such as Set-Cookie are kept.
+
+    When the body is relayed decoded (response.content), the upstream
+    content-encoding and its content-length no longer apply.
+    """
+    drop = frozenset()
+    if decoded and 'content-encoding' in response.headers:
+        drop = frozenset(ENCODING_HEADERS)
+    return httpx.Headers(relayable(response.headers.raw, drop))
+
+
+class ProxyResponse:
+    """Minimal ASGI response for proxied traffic.
+
+    Sends the header list as-is, so repeated headers survive, and skips the
+    per-response setup of Starlette's Response classes. Either `body` holds
+    the whole payload or `chunks` is an async iterator relayed as it arrives;
+    `upstream`, if given, is released however sending the chunks ends.
+    """
+    __slots__ = ('status_code', 'headers', 'body', 'chunks', 'upstream')
+
+    def __init__(self, status_code: int, headers: httpx.Headers, body: bytes = b'', chunks=None,
+                 upstream: Optional[UpstreamBody] = None):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.chunks = chunks
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send):
+        raw = [(name.lower(), value) for name, value in self.headers.raw]
+        if self.chunks is None:
+            if self.status_code >= 200 and self.status_code not in (204, 304) and 'content-length' not in self.headers:
+                raw.append((b'content-length', str(len(self.body)).encode()))
+            await send({'type': 'http.response.start', 'status': self.status_code, 'headers': raw})
+            await send({'type': 'http.response.body', 'body': self.body})
+            return
+        try:
+            await send({'type': 'http.response.start', 'status': self.status_code, 'headers': raw})
+            async for chunk in self.chunks:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await self.chunks.aclose()
+            if self.upstream is not None:
+                # Only does anything when the chunks were never pulled
+                await self.upstream.release()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match list against our ETag"""
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def ensure_etag(request: Request, status_code: int, headers: httpx.Headers, body: bytes) -> Optional[str]:
+    """ETag of a buffered GET response, adding a content hash if Node sent none.
+
+    The tag is weak because the same entity may go out gzip- or br-encoded.
+    """
+    if not ETAGS or request.method not in ('GET', 'HEAD') or status_code != 200:
+        return None
+    etag = headers.get('etag')
+    if etag is None:
+        # A HEAD body is empty, so only GETs can be hashed
+        if request.method != 'GET' or not headers.get('content-type', '').startswith('application/json'):
+            return None
+        etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        headers['etag'] = etag
+        etag_stats['issued'] += 1
+    return etag
+
+
+# Headers a 304 repeats from the full response (RFC 9110 section 15.4.5)
+NOT_MODIFIED_HEADERS = ('cache-control', 'content-location', 'date', 'etag', 'expires', 'vary', 'x-proxy-cache')
+
+
+def not_modified_response(headers: httpx.Headers) -> ProxyResponse:
+    etag_stats['not_modified'] += 1
+    return ProxyResponse(304, httpx.Headers([
+        (name, value) for name, value in headers.multi_items() if name in NOT_MODIFIED_HEADERS
+    ]))
+
+
+def build_response(request: Request, status_code: int, headers: httpx.Headers, body: bytes) -> ProxyResponse:
+    """Response for a fully buffered body, compressed if negotiated.
+
+    Answers 304 instead when the client's If-None-Match still matches.
+    """
+    etag = ensure_etag(request, status_code, headers, body)
+    if etag is not None and etag_matches(request.headers.get('if-none-match', ''), etag):
+        return not_modified_response(headers)
+    encoding = choose_encoding(request, status_code, headers, len(body))
+    if encoding:
+        compressor = Compressor(encoding, compression_stats)
+        body = compressor.compress(body) + compressor.finish()
+        mark_encoded(headers, encoding)
+    return ProxyResponse(status_code, headers, body)
+
+
+def cached_response(request: Request, entry: CachedResponse) -> ProxyResponse:
+    headers = entry.headers.copy()
+    headers['x-proxy-cache'] = 'HIT'
+    return build_response(request, entry.status_code, headers, entry.body)
+
+
+def too_many_requests(retry_after: float) -> Response:
+    return JSONResponse(
+        {'message': 'Too many requests'},
+        status_code=429,
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def gateway_timeout() -> Response:
+    return Response(content="Upstream timed out", status_code=504)
+
+
+def overloaded_response() -> Response:
+    return Response(
+        content="Upstream busy, retry shortly",
+        status_code=503,
+        headers={'Retry-After': '1'},
+    )
+
+
+def finish_upstream(worker: NodeWorker, gate: AdmissionControl, ok: Optional[bool] = True):
+    """Give back the worker slot and the admission permit of a finished call"""
+    worker.release(ok)
+    gate.release()
+
+
+def unauthorized(message: str) -> Response:
+    return JSONResponse({'message': message}, status_code=401)
+
+
+def edge_auth(request: Request) -> Optional[Response]:
+    """Verify the bearer token before the request reaches Node.
+
+    Returns the 401 to send for a bad token, else None. A verified caller
+    is remembered on request.state so upstream_headers can vouch for it.
+    Requests without an Authorization header go through untouched and
+    Node decides whether the route needs one.
+    """
+    request.state.user_id = None
+    if not EDGE_AUTH or not JWT_ACCESS_SECRET or not request.scope['path'].startswith('/api/'):
+        return None
+    if 'authorization' not in request.headers or request.scope['path'].rstrip('/') in PUBLIC_API_PATHS:
+        return None
+    token = bearer_token(request.headers)
+    if not token:
+        edge_auth_stats['rejected'] += 1
+        return unauthorized('Invalid authorization format')
+    payload = verify_access_token(token)
+    if payload is None:
+        edge_auth_stats['rejected'] += 1
+        return unauthorized('Invalid or expired token')
+    edge_auth_stats['verified'] += 1
+    if payload.get('sub') is not None:
+        request.state.user_id = str(payload['sub'])
+    return None
+
+
+# Dropped from buffered GETs when the proxy answers them itself, and always
+# from coalesced ones: a 304 from Node cannot be shared with callers who
+# sent no validator
+CONDITIONAL_HEADERS = frozenset((b'if-none-match', b'if-modified-since'))
+
+
+def upstream_headers(request: Request, conditional: bool = True) -> list:
+    """Client headers as raw pairs, minus hop-by-hop ones and anything
+    claiming to be the trusted identity"""
+    drop = PROXY_ONLY_HEADERS if conditional else PROXY_ONLY_HEADERS | CONDITIONAL_HEADERS
+    headers = relayable(request.scope['headers'], drop)
+    user_id = getattr(request.state, 'user_id', None)
+    if user_id:
+        headers.append((TRUSTED_USER_HEADER.encode(), user_id.encode()))
+        headers.append((TRUSTED_SECRET_HEADER.encode(), PROXY_TRUST_SECRET.encode()))
+    return headers
+
+
+def proxy_error(e: Exception) -> Response:
+    return Response(content=f"Proxy error: {str(e)}", status_code=502)
+
+
+async def send_upstream(request: Request, url: str, route: str, stream: bool, shared: bool = False):
+    """Send the request to a ready worker and return (worker, gate, response).
+
+    The worker and the admission permit from gate stay acquired on success;
+    the caller releases both with finish_upstream once the body has been
+    consumed. socket.io requests are admitted by their own gate. Idempotent requests without a body are replayed
+    once if the worker dies under them; the retry waits for the restarted
+    process and shares the route's time budget. A `shared` response is
+    handed to other callers too, so it is never made conditional. Raises UpstreamNotReady,
+    UpstreamOverloaded, UpstreamTimeout or the upstream error.
+    """
+    is_socketio = request.scope['path'].startswith('/socket.io/')
+    retryable = request.method in RETRYABLE_METHODS and not is_socketio and not has_request_body(request)
+    attempts = 2 if retryable else 1
+    policy = timeout_policies.policy(request.method, route)
+    deadline = time.monotonic() + policy['total']
+    gate = socketio_admission if is_socketio else admission
+
+    for attempt in range(attempts):
+        if is_socketio:
+            worker = workers.sticky(client_address(request.headers, request.client))
+            await workers.wait_ready(worker)
+            await gate.acquire()
+        else:
+            await workers.wait_ready()
+            await gate.acquire()
+            worker = workers.pick()
+        upstream = worker.pool
+        worker.acquire()
+
+        try:
+            if stream:
+                # Pass request chunks upstream as they arrive
+                content = request.stream() if has_request_body(request) else None
+            else:
+                content = await request.body()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UpstreamTimeout('total')
+            headers = upstream_headers(request, conditional=not shared and (stream or not ETAGS))
+            headers.append((DEADLINE_HEADER.encode(), str(int((time.time() + remaining) * 1000)).encode()))
+            upstream_request = upstream.build_request(
+                request.method,
+                url,
+                headers=headers,
+                content=content,
+                timeout=timeout_policies.timeout(policy, remaining),
             )
-        except Exception as e:
-            return Response(content=f"Proxy error: {str(e)}", status_code=502)
+            try:
+                return worker, gate, await asyncio.wait_for(upstream.send(upstream_request, stream=stream), remaining)
+            except asyncio.TimeoutError:
+                raise UpstreamTimeout('total') from None
+            except httpx.TimeoutException as e:
+                phase = next((name for kind, name in TIMEOUT_PHASES if isinstance(e, kind)), 'total')
+                raise UpstreamTimeout(phase) from e
+        except UpstreamTimeout as e:
+            # A slow handler is not a dead worker; only failing to connect counts
+            finish_upstream(worker, gate, ok=e.phase != 'connect')
+            raise
+        except WORKER_GONE_ERRORS:
+            finish_upstream(worker, gate, ok=False)
+            if attempt + 1 < attempts:
+                workers.retries += 1
+                continue
+            raise
+        except BaseException:
+            # Client disconnects, cancellation and our own bugs are not the
+            # worker's fault
+            finish_upstream(worker, gate, ok=None)
+            raise
+
+
+async def fetch_buffered(request: Request, url: str, route: str, shared: bool = False) -> tuple:
+    """Forward the request and return (status_code, headers, body)"""
+    worker, gate, response = await send_upstream(request, url, route, stream=False, shared=shared)
+    finish_upstream(worker, gate)
+    return response.status_code, response_headers(response, decoded=True), response.content
+
+
+def is_spa_request(request: Request) -> bool:
+    return (
+        SERVE_SPA
+        and request.method in ('GET', 'HEAD')
+        and not request.scope['path'].startswith(NODE_PREFIXES)
+    )
+
+
+async def forward_request(request: Request, route: str, timing: dict) -> Response:
+    if is_spa_request(request):
+        response = await spa_assets.serve(request)
+        if response is not None:
+            return response
+        return Response(content="Not Found", status_code=404)
+
+    if SERVE_UPLOADS and request.method in ('GET', 'HEAD') and request.scope['path'].startswith('/uploads/'):
+        response = await upload_assets.serve(request, request.scope['path'][len('/uploads'):])
+        if response is not None:
+            return response
+        return Response(content="Not Found", status_code=404)
+
+    rejected = edge_auth(request)
+    if rejected is not None:
+        return rejected
+
+    if RATE_LIMIT and request.scope['path'].startswith('/api/'):
+        limited = rate_limiter.check(request.method, route, request.state.user_id,
+                                     client_address(request.headers, request.client))
+        if limited:
+            return too_many_requests(limited[1])
+
+    path = request.scope['path']
+    query = request.scope['query_string'].decode('latin-1')
+    url = f"{path}?{query}" if query else path
+    is_socketio = path.startswith('/socket.io/')
+    # socket.io long-polling POSTs are mostly pings and pongs; only the
+    # event frames inside them are writes
+    is_write = request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and not is_socketio
+    if is_socketio and request.method == 'POST':
+        response_cache.invalidate_polling_payload(await request.body())
+    # Long-polling GETs carry Node's acks (`card:update:ok`, `activity:new`),
+    # so they are buffered and read like frames on the WebSocket bridge
+    is_poll = is_socketio and request.method == 'GET'
+
+    cacheable = response_cache.lookup(request.method, path, query, request.headers)
+    if cacheable:
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            # No write has touched these boards since this ETag was sent
+            etag = response_cache.current_etag(*cacheable)
+            if etag is not None and etag_matches(if_none_match, etag):
+                response_cache.revalidated += 1
+                return not_modified_response(httpx.Headers({'etag': etag, 'x-proxy-cache': 'REVALIDATED'}))
+        entry = response_cache.get(cacheable[0])
+        if entry is not None:
+            return cached_response(request, entry)
+        stamp = response_cache.stamp(cacheable[1])
+
+    coalesce_tags = route_tags(path) if COALESCE_GETS and request.method == 'GET' else None
+    coalesce = coalesce_tags is not None and not has_request_body(request)
+
+    upstream_started = time.perf_counter()
+    try:
+        if STREAM_BODIES and not cacheable and not coalesce and not is_poll:
+            # Relay the response without holding the whole body in memory
+            worker, gate, response = await send_upstream(request, url, route, stream=True)
+            # The worker is released once the body has been relayed, or
+            # right here if anything fails before the relay starts
+            upstream = UpstreamBody(response, worker, gate)
+            try:
+                timing['upstream'] = time.perf_counter() - upstream_started
+                if is_write and response.status_code < 400:
+                    response_cache.invalidate_write(request.method, path)
+
+                headers = response_headers(response, decoded=False)
+                body = relay_body(upstream)
+                length = headers.get('content-length')
+                encoding = choose_encoding(request, response.status_code, headers,
+                                           int(length) if length else None)
+                if encoding:
+                    body = compress_stream(body, Compressor(encoding, compression_stats))
+                    mark_encoded(headers, encoding)
+                return ProxyResponse(response.status_code, headers, chunks=count_bytes(body, route),
+                                     upstream=upstream)
+            except BaseException:
+                # Failed before relaying anything; nothing the worker did
+                await upstream.release()
+                raise
+
+        if coalesce:
+            # Identical concurrent GETs for the same identity share one call;
+            # the stamp keeps a GET that starts after a write out of a call
+            # that may have read before it
+            key = (url, request_identity(request.headers), response_cache.stamp(coalesce_tags))
+            status_code, headers, body = await single_flight.do(key, lambda: fetch_buffered(request, url, route, shared=True))
+            headers = headers.copy()
+        else:
+            status_code, headers, body = await fetch_buffered(request, url, route)
+    except UpstreamNotReady:
+        return not_ready_response()
+    except UpstreamOverloaded:
+        return overloaded_response()
+    except UpstreamTimeout as e:
+        metrics.add_timeout(route, request.method, e.phase)
+        return gateway_timeout()
+    except Exception as e:
+        return proxy_error(e)
+    finally:
+        timing.setdefault('upstream', time.perf_counter() - upstream_started)
+
+    if is_write and status_code < 400:
+        response_cache.invalidate_write(request.method, path)
+    if is_poll and status_code == 200:
+        response_cache.invalidate_polling_acks(body)
+    if cacheable and status_code == 200:
+        etag = ensure_etag(request, status_code, headers, body)
+        if etag is not None:
+            response_cache.remember_etag(*cacheable, etag, stamp)
+        # A write finished while this read was upstream; its body may predate it
+        if stamp == response_cache.stamp(cacheable[1]):
+            response_cache.put(*cacheable, status_code, headers.copy(), body)
+        headers['x-proxy-cache'] = 'MISS'
+
+    return build_response(request, status_code, headers, body)
+
+
+class ProxyApp:
+    """ASGI entry point that proxies HTTP to Node without FastAPI in the way.
+
+    Lifespan, the WebSocket bridge and the /_proxy/ endpoints are handed to
+    the FastAPI control app; every other request goes straight to
+    forward_request, skipping the router and the middleware stack.
+    """
+
+    def __init__(self, control):
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'].startswith(INTERNAL_PREFIX):
+            await self.control(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        route = route_template(scope['path'])
+        timing = {}
+        started = time.perf_counter()
+        metrics.in_flight += 1
+        try:
+            response = await forward_request(request, route, timing)
+        finally:
+            metrics.in_flight -= 1
+
+        metrics.observe(
+            route,
+            scope['method'],
+            response.status_code,
+            time.perf_counter() - started,
+            timing.get('upstream', 0.0),
+            int(request.headers.get('content-length') or 0),
+        )
+        if isinstance(response, ProxyResponse):
+            if response.chunks is None:
+                metrics.add_response_bytes(route, len(response.body))
+        else:
+            metrics.add_response_bytes(route, int(response.headers.get('content-length') or 0))
+        await response(scope, receive, send)
+
+
+app = ProxyApp(control_app)